@@ -0,0 +1,174 @@
+import base64
+import functools
+import re
+import struct
+
+NONE_TAG = 0
+FALSE_TAG = 1
+TRUE_TAG = 2
+INT_TAG = 3
+FLOAT_TAG = 4
+STRING_TAG = 5
+HEX_STRING_TAG = 6
+LIST_TAG = 7
+DICT_TAG = 8
+PEM_KEY_TAG = 9
+
+PEM_CACHE_SIZE = 1024
+
+FLOAT = struct.Struct('<d')
+HEX_STRING_PATTERN = re.compile('(?:[0-9a-f]{2})+')
+PEM_PREFIX = '-----BEGIN'
+PEM_PATTERN = re.compile(
+    '-----BEGIN ([A-Z ]+)-----\n([A-Za-z0-9+/=\n]+)\n-----END \\1-----')
+
+
+class BinaryCodec():
+    """
+    Compact binary encoding of the JSON-like values that make up blocks and
+    transactions. Every value carries a one byte type tag; hex strings (ids,
+    hashes, signatures) are stored as raw bytes and PEM keys as their DER
+    bytes.
+    """
+
+    @staticmethod
+    def write_varint(buffer, number):
+        while number >= 0x80:
+            buffer.append((number & 0x7f) | 0x80)
+            number >>= 7
+        buffer.append(number)
+
+    @staticmethod
+    def read_varint(data, offset):
+        number = 0
+        shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            number |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return number, offset
+            shift += 7
+
+    @staticmethod
+    def write_bytes(buffer, value):
+        BinaryCodec.write_varint(buffer, len(value))
+        buffer += value
+
+    @staticmethod
+    def read_bytes(data, offset):
+        length, offset = BinaryCodec.read_varint(data, offset)
+        return bytes(data[offset:offset + length]), offset + length
+
+    @staticmethod
+    def pem_to_der(value):
+        """
+        Returns the (label, DER bytes) of a PEM string, or None when the PEM
+        string would not be rebuilt exactly from them.
+        """
+        # Most strings are not keys, and the prefix rules them out cheaply.
+        if not value.startswith(PEM_PREFIX):
+            return None
+        match = PEM_PATTERN.fullmatch(value)
+        if not match:
+            return None
+        label = match.group(1)
+        der = base64.b64decode(match.group(2))
+        if BinaryCodec.der_to_pem(label, der) != value:
+            return None
+        return label, der
+
+    @staticmethod
+    @functools.lru_cache(maxsize=PEM_CACHE_SIZE)
+    def der_to_pem(label, der):
+        # Cached: the same keys come back in transaction after transaction,
+        # and the decoded values then share one string.
+        body = base64.b64encode(der).decode('ascii')
+        lines = [body[i:i + 64] for i in range(0, len(body), 64)]
+        return '\n'.join(
+            [f'-----BEGIN {label}-----'] + lines + [f'-----END {label}-----'])
+
+    @staticmethod
+    def write_value(buffer, value):
+        if value is None:
+            buffer.append(NONE_TAG)
+        elif value is False:
+            buffer.append(FALSE_TAG)
+        elif value is True:
+            buffer.append(TRUE_TAG)
+        elif isinstance(value, int):
+            buffer.append(INT_TAG)
+            BinaryCodec.write_varint(
+                buffer, value << 1 if value >= 0 else (-value << 1) - 1)
+        elif isinstance(value, float):
+            buffer.append(FLOAT_TAG)
+            buffer += FLOAT.pack(value)
+        elif isinstance(value, str):
+            pem_key = BinaryCodec.pem_to_der(value)
+            if HEX_STRING_PATTERN.fullmatch(value):
+                buffer.append(HEX_STRING_TAG)
+                BinaryCodec.write_bytes(buffer, bytes.fromhex(value))
+            elif pem_key is not None:
+                buffer.append(PEM_KEY_TAG)
+                BinaryCodec.write_bytes(buffer, pem_key[0].encode('ascii'))
+                BinaryCodec.write_bytes(buffer, pem_key[1])
+            else:
+                buffer.append(STRING_TAG)
+                BinaryCodec.write_bytes(buffer, value.encode('utf-8'))
+        elif isinstance(value, (list, tuple)):
+            buffer.append(LIST_TAG)
+            BinaryCodec.write_varint(buffer, len(value))
+            for item in value:
+                BinaryCodec.write_value(buffer, item)
+        elif isinstance(value, dict):
+            buffer.append(DICT_TAG)
+            BinaryCodec.write_varint(buffer, len(value))
+            for key, item in value.items():
+                BinaryCodec.write_value(buffer, key)
+                BinaryCodec.write_value(buffer, item)
+        else:
+            raise Exception(
+                f'Cannot encode value of type {type(value).__name__}')
+
+    @staticmethod
+    def read_value(data, offset):
+        tag = data[offset]
+        offset += 1
+        if tag == NONE_TAG:
+            return None, offset
+        if tag == FALSE_TAG:
+            return False, offset
+        if tag == TRUE_TAG:
+            return True, offset
+        if tag == INT_TAG:
+            number, offset = BinaryCodec.read_varint(data, offset)
+            if number & 1:
+                return -((number + 1) >> 1), offset
+            return number >> 1, offset
+        if tag == FLOAT_TAG:
+            return FLOAT.unpack_from(data, offset)[0], offset + FLOAT.size
+        if tag == STRING_TAG:
+            value, offset = BinaryCodec.read_bytes(data, offset)
+            return value.decode('utf-8'), offset
+        if tag == HEX_STRING_TAG:
+            value, offset = BinaryCodec.read_bytes(data, offset)
+            return value.hex(), offset
+        if tag == PEM_KEY_TAG:
+            label, offset = BinaryCodec.read_bytes(data, offset)
+            der, offset = BinaryCodec.read_bytes(data, offset)
+            return BinaryCodec.der_to_pem(label.decode('ascii'), der), offset
+        if tag == LIST_TAG:
+            length, offset = BinaryCodec.read_varint(data, offset)
+            items = []
+            for _ in range(length):
+                item, offset = BinaryCodec.read_value(data, offset)
+                items.append(item)
+            return items, offset
+        if tag == DICT_TAG:
+            length, offset = BinaryCodec.read_varint(data, offset)
+            items = {}
+            for _ in range(length):
+                key, offset = BinaryCodec.read_value(data, offset)
+                items[key], offset = BinaryCodec.read_value(data, offset)
+            return items, offset
+        raise Exception(f'Unknown value tag: {tag}')
@@ -1,17 +1,104 @@
 import time
-import copy
+from BinaryCodec import BinaryCodec
+from Transaction import Transaction
+from MerkleTree import MerkleTree
+from Utils import BlockchainUtils
+
+BLOCK_FORMAT_VERSION = 2
 
 
 class Block():
+    """
+    A forged block. Its merkle_root commits to its transactions, so the
+    payload that is hashed and signed only holds the header fields and the
+    root, and a transaction can be proven to be in the block with a Merkle
+    proof instead of the whole block.
+
+    The fields are slots, so a block carries no per-instance __dict__. The
+    hash of the payload is computed once and cached in the _payload_hash
+    slot. Setting any field drops the cache, and the cache is left out of the
+    pickled state. The transactions are not expected to change once the
+    block is built, since the merkle_root is not recomputed either.
+
+    Blocks of format versions 0 and 1 predate signature schemes and canonical
+    json. Like version 1 transactions, they keep their version, leave
+    signature_scheme out of their header and are hashed with
+    BlockchainUtils.legacy_hash, so stored chains keep their hashes. Version
+    0 blocks also predate Merkle roots: their payload holds every
+    transaction, and their merkle_root is only recomputed for proofs and is
+    left out of their json.
+    """
 
-    def __init__(self, transactions, last_hash, forger, block_number):
+    FIELDS = ('transactions', 'merkle_root', 'last_hash', 'forger',
+              'block_number', 'timestamp', 'signature_scheme', 'signature')
+    __slots__ = FIELDS + ('version', '_payload_hash')
+    # Blocks jsonpickled by older nodes decode field by field, without
+    # __setstate__, and leave these slots unset.
+    DEFAULTS = {'signature_scheme': 'rsa', '_payload_hash': None}
+
+    def __init__(self, transactions, last_hash, forger, block_number,
+                 signature_scheme='rsa'):
         super(Block, self).__init__()
         self.transactions = transactions
+        self.merkle_root = Block.transactions_root(transactions)
         self.last_hash = last_hash
         self.forger = forger
         self.block_number = block_number
         self.timestamp = time.time_ns()
+        self.signature_scheme = signature_scheme
         self.signature = ''
+        self.version = BLOCK_FORMAT_VERSION
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != '_payload_hash':
+            object.__setattr__(self, '_payload_hash', None)
+
+    def __getattr__(self, name):
+        if name in ('version', 'merkle_root'):
+            self.restore_legacy_fields()
+            return object.__getattribute__(self, name)
+        if name in Block.DEFAULTS:
+            return Block.DEFAULTS[name]
+        raise AttributeError(f"'Block' object has no attribute '{name}'")
+
+    def restore_legacy_fields(self):
+        """
+        Fills in the version and merkle_root of a block jsonpickled by an
+        older node. Only blocks of the Merkle era carried a merkle_root, so a
+        block without one is of version 0.
+        """
+        try:
+            object.__getattribute__(self, 'merkle_root')
+            version = 1
+        except AttributeError:
+            version = 0
+            object.__setattr__(self, 'merkle_root',
+                               Block.transactions_root(self.transactions))
+        try:
+            object.__getattribute__(self, 'version')
+        except AttributeError:
+            object.__setattr__(self, 'version', version)
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in Block.FIELDS}
+        if self.version < 2:
+            del state['signature_scheme']
+        if self.version == 0:
+            del state['merkle_root']
+        return state
+
+    def __setstate__(self, state):
+        self.signature_scheme = 'rsa'
+        if 'signature_scheme' in state:
+            self.version = BLOCK_FORMAT_VERSION
+        else:
+            self.version = 1 if 'merkle_root' in state else 0
+        for name, value in state.items():
+            if name in Block.FIELDS:
+                setattr(self, name, value)
+        if self.version == 0:
+            self.merkle_root = Block.transactions_root(self.transactions)
 
     @staticmethod
     def genesis():
@@ -19,24 +106,98 @@ class Block():
         genesis_block.timestamp = 0
         return genesis_block
 
-    def to_json(self):
-        data = {}
+    @staticmethod
+    def transactions_root(transactions):
+        return MerkleTree.root(
+            [transaction.to_json() for transaction in transactions])
 
+    def header(self):
+        data = {}
         data['last_hash'] = self.last_hash
         data['forger'] = self.forger
         data['block_number'] = self.block_number
         data['timestamp'] = self.timestamp
+        if self.version > 1:
+            data['signature_scheme'] = self.signature_scheme
         data['signature'] = self.signature
-        json_transactions = []
-        for transaction in self.transactions:
-            json_transactions.append(transaction.to_json())
-        data['transactions'] = json_transactions
+        if self.version > 0:
+            data['merkle_root'] = self.merkle_root
+        return data
+
+    def to_json(self):
+        data = self.header()
+        data['transactions'] = [
+            transaction.to_json() for transaction in self.transactions]
         return data
 
     def payload(self):
-        json_representation = copy.deepcopy(self.to_json())
+        if self.version == 0:
+            json_representation = self.to_json()
+        else:
+            json_representation = self.header()
         json_representation['signature'] = ''
         return json_representation
 
+    def payload_hash(self):
+        if self._payload_hash is None:
+            self._payload_hash = BlockchainUtils.legacy_hash(self.payload()) \
+                if self.version < 2 else BlockchainUtils.hash(self.payload())
+        return self._payload_hash
+
+    def hash(self):
+        return self.payload_hash().hexdigest()
+
     def sign(self, signature):
         self.signature = signature
+
+    def to_bytes(self):
+        """
+        Serializes the block into a compact, versioned binary form, with each
+        transaction in its own binary form. Versions 0 and 1 had no
+        signature_scheme, and read as RSA blocks. A block is written in its
+        own version.
+        """
+        buffer = bytearray([self.version])
+        BinaryCodec.write_value(buffer, self.last_hash)
+        BinaryCodec.write_value(buffer, self.forger)
+        BinaryCodec.write_value(buffer, self.block_number)
+        BinaryCodec.write_value(buffer, self.timestamp)
+        BinaryCodec.write_value(buffer, self.signature)
+        if self.version > 1:
+            BinaryCodec.write_value(buffer, self.signature_scheme)
+        BinaryCodec.write_varint(buffer, len(self.transactions))
+        for transaction in self.transactions:
+            buffer += transaction.to_bytes()
+        return bytes(buffer)
+
+    @staticmethod
+    def from_bytes(block_bytes, block_hash=None):
+        """
+        Decodes a binary block. Binary blocks written before Merkle roots
+        were also tagged version 1, so a version 1 block that does not match
+        the expected block_hash, when one is given, is read as version 0.
+        """
+        version = block_bytes[0]
+        if version not in (0, 1, BLOCK_FORMAT_VERSION):
+            raise Exception(f'Unsupported block format version: {version}')
+        offset = 1
+        fields = []
+        for _ in range(5 if version < 2 else 6):
+            value, offset = BinaryCodec.read_value(block_bytes, offset)
+            fields.append(value)
+        last_hash, forger, block_number, timestamp, signature = fields[:5]
+        signature_scheme = fields[5] if version > 1 else 'rsa'
+        length, offset = BinaryCodec.read_varint(block_bytes, offset)
+        transactions = []
+        for _ in range(length):
+            transaction, offset = Transaction.read_bytes(block_bytes, offset)
+            transactions.append(transaction)
+        block = Block(transactions, last_hash, forger, block_number,
+                      signature_scheme)
+        block.timestamp = timestamp
+        block.signature = signature
+        block.version = version
+        if version == 1 and block_hash is not None \
+                and block.hash() != block_hash:
+            block.version = 0
+        return block
@@ -0,0 +1,187 @@
+from collections import OrderedDict
+
+BLOCK_MAX_TRANSACTIONS = 1000
+BLOCK_MAX_BYTES = 1024 * 1024
+
+
+class BlockTemplate():
+    """
+    Assembles the transactions of the next block to forge from the
+    transaction pool.
+
+    Pool transactions are picked up by their pool sequence number and kept as
+    candidates while their sender covers them, together with every older
+    candidate of the same sender: the spent total of each sender is kept up
+    to date as candidates come and go, and a transaction that would take it
+    over the sender's balance waits with the uncovered ones instead. A new
+    block only drops the transactions it includes and re-checks the senders
+    and receivers it touched, so keeping the template up to date costs
+    O(new transactions) instead of O(pool), and the oldest candidates that
+    fit in the block can be taken as they are. The template listens to the
+    pool's removals, so an evicted or removed transaction leaves both the
+    candidates and the uncovered ones right away.
+    """
+
+    def __init__(self, blockchain, transaction_pool,
+                 max_transactions=BLOCK_MAX_TRANSACTIONS,
+                 max_bytes=BLOCK_MAX_BYTES):
+        super(BlockTemplate, self).__init__()
+        self.blockchain = blockchain
+        self.transaction_pool = transaction_pool
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+        self.reset()
+        self.transaction_pool.removal_listeners.append(
+            self.pool_transaction_removed)
+
+    def reset(self):
+        self.candidates = OrderedDict()
+        self.sender_candidates = {}
+        self.spent = {}
+        self.uncovered = {}
+        self.pool_sequence = -1
+        self.height = 0
+        self.tip = None
+        self.selected = None
+
+    def add_transaction(self, transaction):
+        sender = transaction.sender_public_key
+        total = self.spent.get(sender, 0) + transaction.amount
+        if transaction.type == 'EXCHANGE' or \
+                total <= self.blockchain.account.get_balance(sender):
+            self.candidates[transaction.id] = transaction
+            self.sender_candidates.setdefault(sender, OrderedDict())[
+                transaction.id] = transaction
+            if transaction.type != 'EXCHANGE':
+                self.spent[sender] = total
+        else:
+            self.uncovered.setdefault(sender, OrderedDict())[
+                transaction.id] = transaction
+        self.selected = None
+
+    def remove_candidate(self, transaction_id):
+        transaction = self.candidates.pop(transaction_id, None)
+        if transaction is None:
+            return None
+        sender = transaction.sender_public_key
+        sender_candidates = self.sender_candidates[sender]
+        del sender_candidates[transaction_id]
+        if not sender_candidates:
+            del self.sender_candidates[sender]
+            self.spent.pop(sender, None)
+        elif transaction.type != 'EXCHANGE':
+            self.spent[sender] -= transaction.amount
+        self.selected = None
+        return transaction
+
+    def remove_transaction(self, transaction):
+        self.remove_candidate(transaction.id)
+        sender = transaction.sender_public_key
+        uncovered = self.uncovered.get(sender)
+        if uncovered is not None:
+            uncovered.pop(transaction.id, None)
+            if not uncovered:
+                del self.uncovered[sender]
+        self.selected = None
+
+    def pool_transaction_removed(self, transaction):
+        """
+        Drops a transaction that left the pool. A dropped candidate no longer
+        counts against its sender, so the sender's uncovered transactions get
+        another chance.
+        """
+        sender = transaction.sender_public_key
+        was_candidate = transaction.id in self.candidates
+        self.remove_transaction(transaction)
+        if was_candidate and sender in self.uncovered:
+            self.recheck_account(sender)
+
+    def recheck_account(self, account):
+        """
+        Moves the candidates sent by the account that its balance no longer
+        covers to the uncovered ones, then gives the uncovered transactions
+        of the account another chance.
+        """
+        balance = self.blockchain.account.get_balance(account)
+        total = 0
+        for transaction in list(
+                self.sender_candidates.get(account, {}).values()):
+            if transaction.type == 'EXCHANGE':
+                continue
+            if total + transaction.amount > balance:
+                self.remove_candidate(transaction.id)
+                self.uncovered.setdefault(account, OrderedDict())[
+                    transaction.id] = transaction
+            else:
+                total += transaction.amount
+
+        for transaction in list(self.uncovered.pop(account, {}).values()):
+            self.add_transaction(transaction)
+
+    def apply_blocks(self, blocks):
+        """
+        Drops the transactions of the new blocks and re-checks the candidates
+        and uncovered transactions of every touched account.
+        """
+        touched_accounts = set()
+        for block in blocks:
+            for transaction in block.transactions:
+                self.remove_transaction(transaction)
+                touched_accounts.add(transaction.sender_public_key)
+                touched_accounts.add(transaction.receiver_public_key)
+
+        for account in touched_accounts:
+            self.recheck_account(account)
+
+    def update(self):
+        blocks = self.blockchain.blocks
+        if self.height > len(blocks) or (
+                self.height > 0 and blocks[self.height - 1] is not self.tip):
+            self.reset()
+
+        if self.height < len(blocks):
+            if self.height > 0:
+                self.apply_blocks(blocks[self.height:])
+            self.height = len(blocks)
+            self.tip = blocks[-1]
+
+        for sequence, transaction in self.transaction_pool.transactions_since(
+                self.pool_sequence):
+            self.add_transaction(transaction)
+            self.pool_sequence = sequence
+
+    def transactions(self):
+        """
+        Returns the oldest candidates that fit in a block. Every sender
+        covers all of its candidates, so no running totals are needed here.
+        The selection is cached until the candidates change.
+        """
+        self.update()
+        if self.selected is not None:
+            return self.selected
+
+        selected = []
+        selected_bytes = 0
+        removed = []
+        for transaction in self.candidates.values():
+            if len(selected) >= self.max_transactions:
+                break
+            size = self.transaction_pool.transaction_sizes.get(transaction.id)
+            if size is None:
+                removed.append(transaction)
+                continue
+            if selected_bytes + size > self.max_bytes:
+                break
+            selected.append(transaction)
+            selected_bytes += size
+
+        for transaction in removed:
+            self.remove_transaction(transaction)
+        self.selected = selected
+        return selected
+
+    def create_block(self, forger_wallet):
+        last_block = self.blockchain.blocks[-1]
+        return forger_wallet.create_block(
+            self.transactions(), last_block.hash(),
+            last_block.block_number + 1)
@@ -1,18 +1,49 @@
 from Block import Block
 from Utils import BlockchainUtils
 from Account import Account
+from MerkleTree import MerkleTree
 
 
 class Blockchain():
 
-    def __init__(self):
+    def __init__(self, store=None):
         super(Blockchain, self).__init__()
         self.blocks = [Block.genesis()]
         self.account = Account()
+        self.transaction_heights = {}
+        self.store = store
+        if self.store is not None:
+            if len(self.store):
+                self.load_from_store()
+            else:
+                self.persist_block(self.blocks[0])
 
     def add_block(self, block):
         self.execute_transactions(block.transactions)
+        self.index_transactions(block, len(self.blocks))
         self.blocks.append(block)
+        self.persist_block(block)
+
+    def index_transactions(self, block, height):
+        for transaction in block.transactions:
+            self.transaction_heights[transaction.id] = height
+
+    def load_from_store(self):
+        self.blocks = []
+        for height in range(len(self.store)):
+            block_hash, block_bytes = self.store.read_entry(height)
+            if block_bytes[:1] == b'{':
+                block = BlockchainUtils.decode(block_bytes.decode('utf-8'))
+            else:
+                block = Block.from_bytes(
+                    block_bytes, block_hash.decode('utf-8'))
+            self.execute_transactions(block.transactions)
+            self.index_transactions(block, len(self.blocks))
+            self.blocks.append(block)
+
+    def persist_block(self, block):
+        if self.store is not None:
+            self.store.append(block.hash(), block.to_bytes())
 
     def to_json(self):
         data = {}
@@ -28,14 +59,45 @@ class Blockchain():
         else:
             return False
 
+    def latest_block_hash(self):
+        return self.blocks[-1].hash()
+
     def last_block_valid_hash(self, block):
-        latest_blockchain_block_hash = BlockchainUtils.hash(
-            self.blocks[-1].payload()).hexdigest()
+        latest_blockchain_block_hash = self.latest_block_hash()
         if latest_blockchain_block_hash == block.last_hash:
             return True
         else:
             return False
 
+    def merkle_root_valid(self, block):
+        return block.merkle_root == Block.transactions_root(block.transactions)
+
+    def transaction_proof(self, transaction_id):
+        """
+        Returns the inclusion proof of a transaction: the height and Merkle
+        root of its block and the sibling hashes up to the root, or None for
+        an unknown transaction.
+        """
+        height = self.transaction_heights.get(transaction_id)
+        if height is None:
+            return None
+        block = self.blocks[height]
+        transactions = [
+            transaction.to_json() for transaction in block.transactions]
+        index = next(index for index, transaction in enumerate(transactions)
+                     if transaction['id'] == transaction_id)
+        return {
+            'height': height,
+            'merkle_root': block.merkle_root,
+            'index': index,
+            'proof': MerkleTree.proof(transactions, index)
+        }
+
+    @staticmethod
+    def verify_transaction_proof(transaction_json, proof):
+        return MerkleTree.verify_proof(
+            transaction_json, proof['proof'], proof['merkle_root'])
+
     def get_covered_transaction_set(self, transactions):
         covered_transactions = []
 
@@ -0,0 +1,127 @@
+import collections
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from Crypto.PublicKey import RSA
+from cryptography.hazmat.primitives import serialization
+
+KEY_SIZE = 2048
+KEY_POOL_SIZE = 8
+KEY_POOL_WORKERS = 2
+
+
+def generate_key_bytes():
+    # Module level, so worker processes can run it. The key is sent back DER
+    # encoded.
+    return RSA.generate(KEY_SIZE).export_key('DER')
+
+
+def load_key_bytes(key_bytes):
+    return RSA.import_key(key_bytes)
+
+
+class KeyStore():
+    """
+    This class saves and loads the RSA or Ed25519 key pair of a wallet. The
+    key is PEM encoded, protected with the passphrase when one is given, and
+    readable by its owner only.
+    """
+
+    @staticmethod
+    def save(key_pair, path, passphrase=None):
+        if isinstance(key_pair, RSA.RsaKey):
+            key_bytes = key_pair.export_key(
+                'PEM', passphrase=passphrase, pkcs=8,
+                protection=None if passphrase is None
+                else 'scryptAndAES128-CBC')
+        else:
+            key_bytes = key_pair.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+                if passphrase is None
+                else serialization.BestAvailableEncryption(
+                    passphrase.encode('utf-8')))
+        temporary_path = f'{path}.tmp'
+        file_descriptor = os.open(
+            temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(file_descriptor, 'wb') as key_file:
+            key_file.write(key_bytes)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def load(path, passphrase=None):
+        with open(path, 'rb') as key_file:
+            key_bytes = key_file.read()
+        try:
+            return RSA.import_key(key_bytes, passphrase=passphrase)
+        except ValueError:
+            return serialization.load_pem_private_key(
+                key_bytes,
+                None if passphrase is None else passphrase.encode('utf-8'))
+
+
+class KeyPool():
+    """
+    This class keeps up to size key pairs generated ahead of time by worker
+    processes, since generating a 2048 bit RSA key takes hundreds of
+    milliseconds. Every key taken is replaced in the background, and a key is
+    generated in the calling thread when the pool runs dry.
+
+    It mirrors backend/wallet/keystore.py KeyPool of Python_blockchain, with
+    RSA keys by default. POS_chain runs on its own, so it keeps a copy; the
+    backend tests check that the two stay alike.
+    """
+
+    def __init__(
+            self, size=KEY_POOL_SIZE, workers=KEY_POOL_WORKERS,
+            generate=generate_key_bytes, load=load_key_bytes):
+        super(KeyPool, self).__init__()
+        self.size = size
+        self.generate = generate
+        self.load = load
+        self.keys = collections.deque()
+        self.pending = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.refill()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def refill(self):
+        with self.lock:
+            if self.closed:
+                return
+            missing = max(self.size - len(self.keys) - self.pending, 0)
+            self.pending += missing
+        for _ in range(missing):
+            try:
+                future = self.executor.submit(self.generate)
+            except RuntimeError:
+                return
+            future.add_done_callback(self.key_generated)
+
+    def key_generated(self, future):
+        with self.lock:
+            self.pending -= 1
+        if future.cancelled():
+            return
+        try:
+            self.keys.append(self.load(future.result()))
+        except Exception as e:
+            print(f'Could not generate a pooled key: {e}')
+
+    def take(self):
+        try:
+            key_pair = self.keys.popleft()
+        except IndexError:
+            key_pair = self.load(self.generate())
+        self.refill()
+        return key_pair
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -5,7 +5,9 @@ from Block import Block
 from Blockchain import Blockchain
 from Utils import BlockchainUtils
 from Account import Account
+from KeyStore import KeyPool
 from Node import Node
+import os
 import pprint
 import sys
 
@@ -15,7 +17,16 @@ if __name__ == '__main__':
     ip = sys.argv[1]
     port = int(sys.argv[2])
     api_port = int(sys.argv[3])
+    store_directory = sys.argv[4] if len(sys.argv) > 4 else None
+    key_file = sys.argv[5] if len(sys.argv) > 5 else None
+    if key_file is None:
+        # Without a store, the port tells apart the nodes of one machine
+        key_file = os.path.join(store_directory, 'node_key.pem') \
+            if store_directory else f'node_{port}_key.pem'
 
-    node = Node(ip, port)
+    if not os.path.exists(key_file):
+        # Only a node without a saved key generates one
+        Wallet.key_pool = KeyPool()
+    node = Node(ip, port, store_directory, key_file)
     node.start_p2p()
     node.start_api(api_port)
@@ -0,0 +1,70 @@
+import hashlib
+import json
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+class MerkleTree():
+    """
+    Merkle tree over the transactions of a block. Leaves are the hashes of
+    the canonical json of each transaction, and a node without a sibling is
+    promoted to the next level unchanged. Leaves and inner nodes are hashed
+    with different prefixes, so an inner node cannot pass for a leaf.
+    """
+
+    @staticmethod
+    def leaf_hash(item):
+        encoded_item = json.dumps(item, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(
+            LEAF_PREFIX + encoded_item.encode('utf-8')).digest()
+
+    @staticmethod
+    def node_hash(left, right):
+        return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+    @staticmethod
+    def levels(items):
+        level = [MerkleTree.leaf_hash(item) for item in items]
+        levels = [level]
+        while len(level) > 1:
+            level = [
+                MerkleTree.node_hash(level[index], level[index + 1])
+                if index + 1 < len(level) else level[index]
+                for index in range(0, len(level), 2)]
+            levels.append(level)
+        return levels
+
+    @staticmethod
+    def root(items):
+        if not items:
+            return hashlib.sha256(b'').hexdigest()
+        return MerkleTree.levels(items)[-1][0].hex()
+
+    @staticmethod
+    def proof(items, index):
+        """
+        Returns the sibling hashes from the item at the index up to the root,
+        each as [side, hex hash] with side 'left' or 'right'.
+        """
+        proof = []
+        for level in MerkleTree.levels(items)[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                side = 'left' if sibling < index else 'right'
+                proof.append([side, level[sibling].hex()])
+            index //= 2
+        return proof
+
+    @staticmethod
+    def verify_proof(item, proof, root):
+        hash = MerkleTree.leaf_hash(item)
+        for side, sibling in proof:
+            sibling = bytes.fromhex(sibling)
+            if side == 'left':
+                hash = MerkleTree.node_hash(sibling, hash)
+            elif side == 'right':
+                hash = MerkleTree.node_hash(hash, sibling)
+            else:
+                return False
+        return hash.hex() == root
@@ -5,18 +5,23 @@ from SocketCommunication import SocketCommunication
 from Message import Message
 from NodeAPI import NodeAPI
 from Utils import BlockchainUtils
+from BlockStore import BlockStore
 
 
 class Node():
 
-    def __init__(self, ip, port):
+    def __init__(self, ip, port, store_directory=None, key_file=None):
         super(Node, self).__init__()
         self.p2p = None
         self.ip = ip
         self.port = port
         self.transaction_pool = TransactionPool()
-        self.wallet = Wallet()
-        self.blockchain = Blockchain()
+        store = BlockStore(store_directory) if store_directory else None
+        self.blockchain = Blockchain(store)
+        if key_file:
+            self.wallet = Wallet.load_or_create(key_file)
+        else:
+            self.wallet = Wallet()
 
     def start_p2p(self):
         self.p2p = SocketCommunication(self.ip, self.port)
@@ -28,14 +33,17 @@ class Node():
         self.api.start(api_port)
 
     def handle_transaction(self, transaction):
-        data = transaction.payload()
+        # The existence check is O(1), so a known transaction is dropped
+        # before its signature is verified.
+        if self.transaction_pool.transaction_exists(transaction):
+            return
+        data_hash = transaction.payload_hash()
         signature = transaction.signature
         signer_public_key = transaction.sender_public_key
-        valid_signature = Wallet.signature_valid(
-            data, signature, signer_public_key)
-        transaction_exists = self.transaction_pool.transaction_exists(
-            transaction)
-        if not transaction_exists and valid_signature:
+        valid_signature = Wallet.signature_hash_valid(
+            data_hash, signature, signer_public_key,
+            transaction.signature_scheme)
+        if valid_signature:
             self.transaction_pool.add_transaction(transaction)
             message = Message(
                 self.p2p.socket_connector, 'TRANSACTION', transaction)
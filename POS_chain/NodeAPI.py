@@ -1,8 +1,36 @@
+import json
 from flask_classful import FlaskView, route
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from Utils import BlockchainUtils
 
 node = None
+# The same limit as API_RANGE_LIMIT in backend/config.py of Python_blockchain;
+# the backend tests hold the two together.
+API_RANGE_LIMIT = 1000
+
+
+def chain_response(create_response):
+    """
+    Answers a request for chain data with an ETag of the latest block hash,
+    which identifies the whole chain. A client that sends it back in
+    If-None-Match gets a 304 without the chain being serialized again.
+    """
+    etag = node.blockchain.latest_block_hash()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = create_response()
+    response.set_etag(etag)
+    return response
+
+
+def stream_blocks(blocks):
+    yield '{"blocks": ['
+    for index, block in enumerate(blocks):
+        if index:
+            yield ','
+        yield json.dumps(block.to_json())
+    yield ']}'
 
 
 class NodeAPI(FlaskView):
@@ -25,7 +53,30 @@ class NodeAPI(FlaskView):
 
     @route('/blockchain', methods=['GET'])
     def blockchain(self):
-        return node.blockchain.to_json(), 200
+        return chain_response(lambda: Response(
+            stream_blocks(list(node.blockchain.blocks)),
+            mimetype='application/json'))
+
+    @route('/blockchain/length', methods=['GET'])
+    def blockchain_length(self):
+        return chain_response(
+            lambda: jsonify(len(node.blockchain.blocks)))
+
+    @route('/blockchain/range', methods=['GET'])
+    def blockchain_range(self):
+        blocks = node.blockchain.blocks
+        start = max(request.args.get('start', 0, type=int), 0)
+        end = request.args.get('end', len(blocks), type=int)
+        end = min(end, len(blocks), start + API_RANGE_LIMIT)
+        return chain_response(lambda: jsonify(
+            [block.to_json() for block in blocks[start:end]]))
+
+    @route('/transaction/<transaction_id>/proof', methods=['GET'])
+    def transaction_proof(self, transaction_id):
+        proof = node.blockchain.transaction_proof(transaction_id)
+        if proof is None:
+            return jsonify({'message': 'Unknown transaction'}), 404
+        return jsonify(proof), 200
 
     @route('/transaction_pool', methods=['GET'])
     def transaction_pool(self):
@@ -0,0 +1,50 @@
+from Wallet import Wallet
+from Block import Block
+from Transaction import Transaction
+from Utils import BlockchainUtils
+import timeit
+
+TRANSACTIONS = 200
+REPEAT = 20
+
+
+def report(name, json_encode, json_decode, binary_encode, binary_decode):
+    json_form = json_encode()
+    binary_form = binary_encode()
+
+    print(f'{name}:')
+    print(f'  JSON size: {len(json_form)} bytes')
+    print(f'  Binary size: {len(binary_form)} bytes '
+          f'({len(binary_form)/len(json_form):.0%} of JSON)')
+
+    for label, function in [('JSON encode', json_encode),
+                            ('JSON decode', json_decode),
+                            ('Binary encode', binary_encode),
+                            ('Binary decode', binary_decode)]:
+        seconds = timeit.timeit(function, number=REPEAT) / REPEAT
+        print(f'  {label}: {seconds * 1000:.3f}ms')
+
+
+if __name__ == '__main__':
+    sender = Wallet()
+    receiver = Wallet().public_key_string()
+
+    transaction = sender.create_transaction(receiver, 10, 'TRANSFER')
+    transaction_json = BlockchainUtils.encode(transaction)
+    transaction_bytes = transaction.to_bytes()
+    report('Transaction',
+           lambda: BlockchainUtils.encode(transaction),
+           lambda: BlockchainUtils.decode(transaction_json),
+           transaction.to_bytes,
+           lambda: Transaction.from_bytes(transaction_bytes))
+
+    transactions = [sender.create_transaction(receiver, 10, 'TRANSFER')
+                    for _ in range(TRANSACTIONS)]
+    block = sender.create_block(transactions, 'genesis_hash', 1)
+    block_json = BlockchainUtils.encode(block)
+    block_bytes = block.to_bytes()
+    report(f'Block with {TRANSACTIONS} transactions',
+           lambda: BlockchainUtils.encode(block),
+           lambda: BlockchainUtils.decode(block_json),
+           block.to_bytes,
+           lambda: Block.from_bytes(block_bytes))
@@ -0,0 +1,50 @@
+from Wallet import Wallet
+from SignatureScheme import SignatureScheme
+import time
+import timeit
+
+MIN_SECONDS = 1
+
+
+def throughput(function):
+    """
+    Returns how many times per second the function runs, timed over at least
+    MIN_SECONDS.
+    """
+    number = 1
+    while True:
+        seconds = timeit.timeit(function, number=number)
+        if seconds >= MIN_SECONDS:
+            return number / seconds
+        number *= 2
+
+
+def report(scheme):
+    start = time.perf_counter()
+    wallet = Wallet(scheme=scheme)
+    key_seconds = time.perf_counter() - start
+
+    receiver = wallet.public_key_string()
+    transaction = wallet.create_transaction(receiver, 10, 'TRANSFER')
+    data = transaction.payload()
+    public_key_string = wallet.public_key_string()
+
+    def verify():
+        # Each transaction comes with its own sender, so the public key is not
+        # served from the import cache.
+        SignatureScheme.get(scheme).import_public_key.cache_clear()
+        Wallet.signature_valid(
+            data, transaction.signature, public_key_string, scheme)
+
+    print(f'{scheme}:')
+    print(f'  Key generation: {key_seconds * 1000:.3f}ms')
+    print(f'  Public key size: {len(public_key_string)} bytes (PEM)')
+    print(f'  Signature size: {len(bytes.fromhex(transaction.signature))} bytes')
+    print(f'  Transaction size: {len(transaction.to_bytes())} bytes (binary)')
+    print(f'  Sign: {throughput(lambda: wallet.sign(data)):.0f}/s')
+    print(f'  Verify: {throughput(verify):.0f}/s')
+
+
+if __name__ == '__main__':
+    for scheme in SignatureScheme.SCHEMES:
+        report(scheme)
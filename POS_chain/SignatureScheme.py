@@ -0,0 +1,133 @@
+import functools
+from Crypto.PublicKey import RSA
+from Crypto.Signature import PKCS1_v1_5
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from Utils import BlockchainUtils
+
+DEFAULT_SIGNATURE_SCHEME = 'rsa'
+PUBLIC_KEY_CACHE_SIZE = 1024
+
+
+class RSAScheme():
+    """
+    RSA-2048 with PKCS#1 v1.5 signatures over the SHA-256 hash of the
+    canonical data. Kept for compatibility with the keys already in use.
+    """
+
+    name = 'rsa'
+
+    @staticmethod
+    def generate():
+        return RSA.generate(2048)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+    def import_public_key(public_key_string):
+        return RSA.importKey(public_key_string)
+
+    @staticmethod
+    def public_key_string(key_pair):
+        return key_pair.public_key().export_key('PEM').decode('utf-8')
+
+    @staticmethod
+    def sign_hash(key_pair, data_hash):
+        return PKCS1_v1_5.new(key_pair).sign(data_hash).hex()
+
+    @staticmethod
+    def verify_hash(data_hash, signature, public_key_string):
+        public_key = RSAScheme.import_public_key(public_key_string)
+        return PKCS1_v1_5.new(public_key).verify(
+            data_hash, bytes.fromhex(signature))
+
+
+class Ed25519Scheme():
+    """
+    Ed25519 (RFC 8032) signatures over the SHA-256 hash of the canonical
+    data, through the OpenSSL bindings of the cryptography package. Signing
+    and verifying are much cheaper than with RSA, and keys and signatures are
+    much smaller.
+    """
+
+    name = 'ed25519'
+
+    @staticmethod
+    def generate():
+        return ed25519.Ed25519PrivateKey.generate()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+    def import_public_key(public_key_string):
+        return serialization.load_pem_public_key(
+            public_key_string.encode('utf-8'))
+
+    @staticmethod
+    def public_key_string(key_pair):
+        return key_pair.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode('utf-8').rstrip('\n')
+
+    @staticmethod
+    def sign_hash(key_pair, data_hash):
+        return key_pair.sign(data_hash.digest()).hex()
+
+    @staticmethod
+    def verify_hash(data_hash, signature, public_key_string):
+        public_key = Ed25519Scheme.import_public_key(public_key_string)
+        try:
+            public_key.verify(bytes.fromhex(signature), data_hash.digest())
+            return True
+        except InvalidSignature:
+            return False
+
+
+class SignatureScheme():
+    """
+    Looks up the signature schemes by the tag that transactions and blocks
+    carry in their signature_scheme field.
+    """
+
+    SCHEMES = {scheme.name: scheme for scheme in [RSAScheme, Ed25519Scheme]}
+
+    @staticmethod
+    def get(name):
+        scheme = SignatureScheme.SCHEMES.get(name)
+        if scheme is None:
+            raise Exception(f'Unknown signature scheme: {name}')
+        return scheme
+
+    @staticmethod
+    def of_key(key_pair):
+        if isinstance(key_pair, RSA.RsaKey):
+            return RSAScheme
+        if isinstance(key_pair, ed25519.Ed25519PrivateKey):
+            return Ed25519Scheme
+        raise Exception(f'Unsupported key: {type(key_pair).__name__}')
+
+    @staticmethod
+    def sign(key_pair, data):
+        return SignatureScheme.of_key(key_pair).sign_hash(
+            key_pair, BlockchainUtils.hash(data))
+
+    @staticmethod
+    def verify(data, signature, public_key_string, name=DEFAULT_SIGNATURE_SCHEME):
+        return SignatureScheme.verify_hash(
+            BlockchainUtils.hash(data), signature, public_key_string, name)
+
+    @staticmethod
+    def verify_hash(data_hash, signature, public_key_string,
+                    name=DEFAULT_SIGNATURE_SCHEME):
+        """
+        Verifies the signature of the SHA-256 data_hash with the named scheme.
+        An unknown scheme or a malformed key or signature is an invalid
+        signature.
+        """
+        scheme = SignatureScheme.SCHEMES.get(name)
+        if scheme is None:
+            return False
+        try:
+            return scheme.verify_hash(data_hash, signature, public_key_string)
+        except (ValueError, TypeError, IndexError):
+            return False
@@ -1,12 +1,36 @@
 import uuid
 import time
-import copy
+from BinaryCodec import BinaryCodec
+from Utils import BlockchainUtils
+
+TRANSACTION_FORMAT_VERSION = 2
 
 
 class Transaction():
-    """docstring for Transaction."""
+    """
+    A transfer, purchase or exchange of tokens, signed by its sender.
+
+    The fields are slots, so a transaction carries no per-instance __dict__,
+    and to_json builds a new dict of them on every call. The SHA-256 hash of
+    the canonical payload is computed once and cached in the _payload_hash
+    slot. Setting any field drops the cache, and the cache is left out of
+    to_json and of the pickled state.
+
+    Transactions of format version 1 predate signature schemes and canonical
+    json. They keep their version, leave signature_scheme out of their json
+    and are hashed with BlockchainUtils.legacy_hash, so the signatures made
+    before still verify.
+    """
+
+    FIELDS = ('sender_public_key', 'receiver_public_key', 'amount', 'type',
+              'id', 'timestamp', 'signature_scheme', 'signature')
+    __slots__ = FIELDS + ('version', '_payload_hash')
+    # Transactions jsonpickled by older nodes decode field by field, without
+    # __setstate__, and leave these slots unset.
+    DEFAULTS = {'signature_scheme': 'rsa', 'version': 1, '_payload_hash': None}
 
-    def __init__(self, sender_public_key, receiver_public_key, amount, type):
+    def __init__(self, sender_public_key, receiver_public_key, amount, type,
+                 signature_scheme='rsa'):
         super(Transaction, self).__init__()
         self.sender_public_key = sender_public_key
         self.receiver_public_key = receiver_public_key
@@ -14,19 +38,93 @@ class Transaction():
         self.type = type
         self.id = uuid.uuid4().hex
         self.timestamp = time.time_ns()
+        self.signature_scheme = signature_scheme
         self.signature = ''
+        self.version = TRANSACTION_FORMAT_VERSION
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != '_payload_hash':
+            object.__setattr__(self, '_payload_hash', None)
+
+    def __getattr__(self, name):
+        if name in Transaction.DEFAULTS:
+            return Transaction.DEFAULTS[name]
+        raise AttributeError(
+            f"'Transaction' object has no attribute '{name}'")
+
+    def __getstate__(self):
+        return self.to_json()
+
+    def __setstate__(self, state):
+        self.signature_scheme = 'rsa'
+        self.version = TRANSACTION_FORMAT_VERSION \
+            if 'signature_scheme' in state else 1
+        for name, value in state.items():
+            if name in Transaction.FIELDS:
+                setattr(self, name, value)
 
     def to_json(self):
-        return self.__dict__
+        data = {name: getattr(self, name) for name in Transaction.FIELDS}
+        if self.version == 1:
+            del data['signature_scheme']
+        return data
 
     def sign(self, signature):
         self.signature = signature
 
+    def to_bytes(self):
+        """
+        Serializes the transaction into a compact, versioned binary form. The
+        keys are stored as DER bytes and the id and signature as raw bytes.
+        Version 1 had no signature_scheme, and reads as an RSA transaction.
+        A transaction is written in its own version.
+        """
+        buffer = bytearray([self.version])
+        BinaryCodec.write_value(buffer, self.sender_public_key)
+        BinaryCodec.write_value(buffer, self.receiver_public_key)
+        BinaryCodec.write_value(buffer, self.amount)
+        BinaryCodec.write_value(buffer, self.type)
+        BinaryCodec.write_value(buffer, self.id)
+        BinaryCodec.write_value(buffer, self.timestamp)
+        BinaryCodec.write_value(buffer, self.signature)
+        if self.version > 1:
+            BinaryCodec.write_value(buffer, self.signature_scheme)
+        return bytes(buffer)
+
+    @staticmethod
+    def from_bytes(transaction_bytes, offset=0):
+        transaction, _ = Transaction.read_bytes(transaction_bytes, offset)
+        return transaction
+
+    @staticmethod
+    def read_bytes(transaction_bytes, offset):
+        version = transaction_bytes[offset]
+        if version not in (1, TRANSACTION_FORMAT_VERSION):
+            raise Exception(
+                f'Unsupported transaction format version: {version}')
+        offset += 1
+        fields = []
+        for _ in range(7 if version == 1 else 8):
+            value, offset = BinaryCodec.read_value(transaction_bytes, offset)
+            fields.append(value)
+        transaction = Transaction(*fields[:4], *fields[7:])
+        transaction.id, transaction.timestamp, transaction.signature = \
+            fields[4:7]
+        transaction.version = version
+        return transaction, offset
+
     def payload(self):
-        json_representation = copy.deepcopy(self.to_json())
+        json_representation = self.to_json()
         json_representation['signature'] = ''
         return json_representation
 
+    def payload_hash(self):
+        if self._payload_hash is None:
+            self._payload_hash = BlockchainUtils.legacy_hash(self.payload()) \
+                if self.version == 1 else BlockchainUtils.hash(self.payload())
+        return self._payload_hash
+
     def equals(self, transaction):
         """
         Checks to see if a transaction is the same as another transaction,
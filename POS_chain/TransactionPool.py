@@ -1,26 +1,170 @@
+import bisect
+import collections
+import heapq
+import itertools
+
+TRANSACTION_POOL_MAX_COUNT = 100000
+TRANSACTION_POOL_MAX_BYTES = 64 * 1024 * 1024
+TRANSACTION_POOL_PRIORITY = 'oldest'
+
+PRIORITIES = {
+    'oldest': lambda transaction, sequence: sequence,
+    'amount': lambda transaction, sequence: transaction.amount,
+    'fee': lambda transaction, sequence: getattr(transaction, 'fee', 0)
+}
 
 
 class TransactionPool():
     """
     The transaction pool serves as a placeholder for proposed transactions
     before they are added to any newly mined blocks in the blockchain.
+
+    The pool holds at most max_count transactions and max_bytes bytes (in
+    their binary form). Once a limit is exceeded, the transactions with the
+    lowest priority are evicted: 'oldest' evicts the oldest first, 'amount'
+    the smallest amount first and 'fee' the lowest fee first. A function of
+    (transaction, sequence) can be given as the priority too.
+
+    The transactions are kept in an OrderedDict keyed by id, in the order they
+    were added, so existence checks are O(1), removing a block's transactions
+    costs O(block) and iteration follows the arrival order. Every function in
+    removal_listeners is called with each transaction that leaves the pool,
+    whether it was evicted or removed.
     """
 
-    def __init__(self):
+    def __init__(self, max_count=TRANSACTION_POOL_MAX_COUNT,
+                 max_bytes=TRANSACTION_POOL_MAX_BYTES,
+                 priority=TRANSACTION_POOL_PRIORITY):
         super(TransactionPool, self).__init__()
-        self.transactions = []
+        self.pool = collections.OrderedDict()
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.priority = PRIORITIES.get(priority, priority)
+        self.sequence = itertools.count()
+        self.sequences = {}
+        self.transaction_sizes = {}
+        self.transaction_bytes = 0
+        self.eviction_heap = []
+        self.best_heap = []
+        self.arrivals = []
+        self.evicted_count = 0
+        self.evicted_bytes = 0
+        self.removal_listeners = []
+
+    @property
+    def transactions(self):
+        return self.pool.values()
 
     def add_transaction(self, transaction):
         """
-        Adds a new transaction to the transaction pool list.
+        Adds a new transaction to the transaction pool.
 
         Params:
         transaction - The proposed transaction to be added to the transaction
         pool.
 
-        Returns: It appends the proposed transaction to the transaction pool.
+        Returns: True when the transaction was added, False when a transaction
+        with its id is already in the pool. The lowest priority transactions
+        are then evicted while the pool is over its limits.
         """
-        self.transactions.append(transaction)
+        added = self.insert(transaction)
+        self.evict()
+        self.compact()
+        return added
+
+    def add_transactions(self, transactions):
+        """
+        Adds many transactions at once, evicting and compacting only once
+        afterwards. Returns the number of transactions that were added.
+        """
+        added = sum(1 for transaction in transactions
+                    if self.insert(transaction))
+        self.evict()
+        self.compact()
+        return added
+
+    def insert(self, transaction):
+        if transaction.id in self.pool:
+            return False
+        self.pool[transaction.id] = transaction
+        size = len(transaction.to_bytes())
+        self.transaction_sizes[transaction.id] = size
+        self.transaction_bytes += size
+
+        sequence = next(self.sequence)
+        priority = self.priority(transaction, sequence)
+        self.sequences[transaction.id] = sequence
+        heapq.heappush(self.eviction_heap,
+                       (priority, sequence, transaction))
+        heapq.heappush(self.best_heap,
+                       (-priority, sequence, transaction))
+        self.arrivals.append((sequence, transaction))
+        return True
+
+    def is_current_entry(self, entry):
+        return self.sequences.get(entry[2].id) == entry[1]
+
+    def evict(self):
+        while self.eviction_heap and (
+                len(self.pool) > self.max_count or
+                self.transaction_bytes > self.max_bytes):
+            entry = heapq.heappop(self.eviction_heap)
+            if self.is_current_entry(entry):
+                self.evicted_count += 1
+                self.evicted_bytes += self.transaction_sizes[entry[2].id]
+                self.forget(entry[2])
+
+    def compact(self):
+        if len(self.eviction_heap) > 2 * len(self.sequences) + 64:
+            self.eviction_heap = list(
+                filter(self.is_current_entry, self.eviction_heap))
+            heapq.heapify(self.eviction_heap)
+        if len(self.best_heap) > 2 * len(self.sequences) + 64:
+            self.best_heap = list(
+                filter(self.is_current_entry, self.best_heap))
+            heapq.heapify(self.best_heap)
+        if len(self.arrivals) > 2 * len(self.sequences) + 64:
+            self.arrivals = [
+                arrival for arrival in self.arrivals
+                if self.sequences.get(arrival[1].id) == arrival[0]]
+
+    def transactions_since(self, sequence):
+        """
+        Returns the (sequence, transaction) pairs of the pool transactions
+        added after the given sequence number, oldest first.
+        """
+        start = bisect.bisect_left(self.arrivals, (sequence + 1,))
+        return [arrival for arrival in self.arrivals[start:]
+                if self.sequences.get(arrival[1].id) == arrival[0]]
+
+    def forget(self, transaction):
+        self.pool.pop(transaction.id, None)
+        self.sequences.pop(transaction.id, None)
+        self.transaction_bytes -= self.transaction_sizes.pop(
+            transaction.id, 0)
+        for listener in self.removal_listeners:
+            listener(transaction)
+
+    def best_transactions(self, count):
+        """
+        Returns up to count transactions of the pool, highest priority first.
+        """
+        entries = []
+        while self.best_heap and len(entries) < count:
+            entry = heapq.heappop(self.best_heap)
+            if self.is_current_entry(entry):
+                entries.append(entry)
+        for entry in entries:
+            heapq.heappush(self.best_heap, entry)
+        return [entry[2] for entry in entries]
+
+    def metrics(self):
+        return {
+            'transaction_count': len(self.pool),
+            'transaction_bytes': self.transaction_bytes,
+            'evicted_count': self.evicted_count,
+            'evicted_bytes': self.evicted_bytes
+        }
 
     def transaction_exists(self, transaction):
         """
@@ -34,19 +178,11 @@ class TransactionPool():
         Returns: A boolean verifying whether or not the proposed transaction
         already exists.
         """
-        for pool_transaction in self.transactions:
-            if pool_transaction.equals(transaction):
-                return True
-        return False
+        return transaction.id in self.pool
 
     def remove_from_pool(self, transactions):
-        new_pool_transactions = []
-
-        for pool_transaction in self.transactions:
-            insert = True
-            for transaction in transactions:
-                if pool_transaction.equals(transaction):
-                    insert = False
-            if insert:
-                new_pool_transactions.append(pool_transaction)
-        self.transactions = new_pool_transactions
+        for transaction in transactions:
+            pool_transaction = self.pool.get(transaction.id)
+            if pool_transaction is not None:
+                self.forget(pool_transaction)
+        self.compact()
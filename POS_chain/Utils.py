@@ -5,12 +5,28 @@ import jsonpickle
 
 class BlockchainUtils():
 
+    @staticmethod
+    def canonical(data):
+        """
+        Returns the canonical json bytes of the data: sorted keys and no
+        spaces, so equal data always hashes the same.
+        """
+        return json.dumps(
+            data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
     @staticmethod
     def hash(data):
-        data_string = json.dumps(data)
-        data_bytes = data_string.encode('utf-8')
-        data_hash = SHA256.new(data_bytes)
-        return data_hash
+        return SHA256.new(BlockchainUtils.canonical(data))
+
+    @staticmethod
+    def legacy_hash(data):
+        """
+        Returns the hash of the data as it was before the json was made
+        canonical: keys in insertion order and default spacing. Transactions
+        of format version 1 and blocks of versions 0 and 1 are still hashed
+        this way, so their signatures and hashes stay valid.
+        """
+        return SHA256.new(json.dumps(data).encode('utf-8'))
 
     @staticmethod
     def encode(object_to_encode):
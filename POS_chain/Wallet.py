@@ -1,8 +1,9 @@
-from Crypto.PublicKey import RSA
-from Crypto.Signature import PKCS1_v1_5
+import os
+from SignatureScheme import SignatureScheme, DEFAULT_SIGNATURE_SCHEME
 from Utils import BlockchainUtils
 from Transaction import Transaction
 from Block import Block
+from KeyStore import KeyStore
 
 
 class Wallet():
@@ -10,13 +11,53 @@ class Wallet():
     This class serves as the private point of access for nodes on the
     blockchain. It generates a signature that validates Transactions.
 
+    The key pair belongs to a signature scheme (see SignatureScheme), and the
+    transactions and blocks the wallet creates carry the scheme's tag. A new
+    RSA wallet takes its key pair from Wallet.key_pool when one is set,
+    instead of generating it.
+
     Functions:
         sign(self, data)
             Returns a hexadecimal signature of given data.
+        save(self, path, passphrase=None)
+            Writes the key pair to a key file.
+        load(path, passphrase=None)
+            Returns the wallet of a key file.
     """
 
-    def __init__(self):
-        self.key_pair = RSA.generate(2048)
+    key_pool = None
+
+    def __init__(self, key_pair=None, scheme=DEFAULT_SIGNATURE_SCHEME):
+        if key_pair is None:
+            key_pair = Wallet.new_key_pair(scheme)
+        self.key_pair = key_pair
+        self.scheme = SignatureScheme.of_key(key_pair)
+
+    @staticmethod
+    def new_key_pair(scheme=DEFAULT_SIGNATURE_SCHEME):
+        if scheme == 'rsa' and Wallet.key_pool is not None:
+            return Wallet.key_pool.take()
+        return SignatureScheme.get(scheme).generate()
+
+    def save(self, path, passphrase=None):
+        KeyStore.save(self.key_pair, path, passphrase)
+
+    @staticmethod
+    def load(path, passphrase=None):
+        return Wallet(KeyStore.load(path, passphrase))
+
+    @staticmethod
+    def load_or_create(path, passphrase=None, scheme=DEFAULT_SIGNATURE_SCHEME):
+        """
+        Loads the wallet of the key file, or creates a wallet and saves it
+        there when the file does not exist yet, so a node keeps its identity
+        across restarts.
+        """
+        if os.path.exists(path):
+            return Wallet.load(path, passphrase)
+        wallet = Wallet(scheme=scheme)
+        wallet.save(path, passphrase)
+        return wallet
 
     def sign(self, data):
         """
@@ -29,13 +70,11 @@ class Wallet():
 
         Returns: A hexadecimal signature object.
         """
-        data_hash = BlockchainUtils.hash(data)
-        signature_scheme_object = PKCS1_v1_5.new(self.key_pair)
-        signature = signature_scheme_object.sign(data_hash)
-        return signature.hex()
+        return self.scheme.sign_hash(self.key_pair, BlockchainUtils.hash(data))
 
     @staticmethod
-    def signature_valid(data, signature, public_key_string):
+    def signature_valid(data, signature, public_key_string,
+                        scheme=DEFAULT_SIGNATURE_SCHEME):
         """
         Verifies the transaction signature provided by the sender.
 
@@ -43,31 +82,39 @@ class Wallet():
         data - the provided transaction data.
         signature - the sender's private key signature.
         public_key_string - the public key.
+        scheme - the signature scheme tag of the transaction or block.
 
         Returns: A boolean verifying the validity of the sender's signature.
         """
-        signature = bytes.fromhex(signature)
-        data_hash = BlockchainUtils.hash(data)
-        public_key = RSA.importKey(public_key_string)
-        signature_scheme_object = PKCS1_v1_5.new(public_key)
-        signature_valid = signature_scheme_object.verify(data_hash, signature)
-        return signature_valid
+        return SignatureScheme.verify(
+            data, signature, public_key_string, scheme)
+
+    @staticmethod
+    def signature_hash_valid(data_hash, signature, public_key_string,
+                             scheme=DEFAULT_SIGNATURE_SCHEME):
+        """
+        Verifies a signature against an already computed hash of the data,
+        such as Transaction.payload_hash().
+        """
+        return SignatureScheme.verify_hash(
+            data_hash, signature, public_key_string, scheme)
 
     def public_key_string(self):
-        public_key_string = self.key_pair.public_key().exportKey(
-            'PEM').decode('utf-8')
-        return public_key_string
+        return self.scheme.public_key_string(self.key_pair)
 
     def create_transaction(self, receiver, amount, type):
         transaction = Transaction(
-            self.public_key_string(), receiver, amount, type)
-        signature = self.sign(transaction.payload())
+            self.public_key_string(), receiver, amount, type,
+            self.scheme.name)
+        signature = self.scheme.sign_hash(
+            self.key_pair, transaction.payload_hash())
         transaction.sign(signature)
         return transaction
 
     def create_block(self, transactions, last_hash, block_number):
         block = Block(transactions, last_hash,
-                      self.public_key_string(), block_number)
-        signature = self.sign(block.payload())
+                      self.public_key_string(), block_number,
+                      self.scheme.name)
+        signature = self.scheme.sign_hash(self.key_pair, block.payload_hash())
         block.sign(signature)
         return block
@@ -0,0 +1,253 @@
+import json
+import os
+import random
+
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+
+from backend.blockchain.blockchain import Blockchain
+from backend.blockchain.block_store import BlockStore
+from backend.blockchain.block_template import BlockTemplate
+from backend.blockchain.chain_sync import (
+    ChainSync,
+    HttpPeer,
+    chain_tip,
+    locate_ancestor,
+    chain_headers,
+    chain_blocks
+)
+from backend.wallet.wallet import Wallet
+from backend.wallet.keystore import KeyPool
+from backend.wallet.transaction import Transaction
+from backend.wallet.transaction_pool import TransactionPool
+from backend.pubsub import PubSub
+from backend.config import (
+    API_RANGE_LIMIT,
+    API_HEADER_RANGE_LIMIT,
+    BLOCK_STORE_DIRECTORY
+)
+
+ROOT_PORT = 5000
+
+def range_arguments(blockchain, limit=None):
+    """
+    Read the start and end heights of a range request, clamped to the chain
+    and, with a limit, to at most limit blocks.
+    """
+    start = max(request.args.get('start', 0, type=int), 0)
+    end = min(
+        request.args.get('end', len(blockchain.chain), type=int),
+        len(blockchain.chain)
+    )
+
+    if limit is not None:
+        end = min(end, start + limit)
+
+    return start, max(start, end)
+
+def chain_response(blockchain, create_response):
+    """
+    Answer a request for chain data with an ETag of the tip hash. The tip hash
+    identifies the whole chain, so a client that sends it back in
+    If-None-Match gets a 304 without the chain being serialized again.
+    """
+    etag = blockchain.chain[-1].hash
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = create_response()
+
+    response.set_etag(etag)
+
+    return response
+
+def stream_blocks(chain):
+    """
+    Yield the json of a list of blocks piece by piece, one block at a time.
+    """
+    yield '['
+    for height, block in enumerate(chain):
+        if height:
+            yield ','
+        yield json.dumps(block.to_json())
+    yield ']'
+
+def create_app(blockchain, transaction_pool, wallet, pubsub=None):
+    """
+    Create the Flask app that serves the node's blockchain, wallet and
+    transaction pool. Mined blocks and new transactions are broadcast through
+    pubsub, when there is one.
+    """
+    app = Flask(__name__)
+    CORS(app, resources={ r'/*': { 'origins': 'http://localhost:3000' } })
+    block_template = BlockTemplate(blockchain, transaction_pool)
+
+    @app.route('/')
+    def route_default():
+        return 'Welcome to the blockchain'
+
+    @app.route('/blockchain')
+    def route_blockchain():
+        return chain_response(blockchain, lambda: Response(
+            stream_blocks(list(blockchain.chain)),
+            mimetype='application/json'
+        ))
+
+    @app.route('/blockchain/length')
+    def route_blockchain_length():
+        return chain_response(
+            blockchain,
+            lambda: jsonify(len(blockchain.chain))
+        )
+
+    @app.route('/blockchain/tip')
+    def route_blockchain_tip():
+        return jsonify(chain_tip(blockchain))
+
+    @app.route('/blockchain/ancestor', methods=['POST'])
+    def route_blockchain_ancestor():
+        return jsonify({
+            'height': locate_ancestor(blockchain, request.get_json()['locator'])
+        })
+
+    @app.route('/headers')
+    @app.route('/blockchain/headers')
+    def route_blockchain_headers():
+        return chain_response(blockchain, lambda: jsonify(chain_headers(
+            blockchain,
+            *range_arguments(blockchain, API_HEADER_RANGE_LIMIT)
+        )))
+
+    @app.route('/blockchain/range')
+    def route_blockchain_range():
+        return chain_response(blockchain, lambda: jsonify(chain_blocks(
+            blockchain,
+            *range_arguments(blockchain, API_RANGE_LIMIT)
+        )))
+
+    @app.route('/transaction/<transaction_id>/proof')
+    def route_transaction_proof(transaction_id):
+        proof = blockchain.transaction_proof(transaction_id)
+
+        if proof is None:
+            return jsonify({'message': 'Unknown transaction'}), 404
+
+        return jsonify(proof)
+
+    @app.route('/blockchain/mine')
+    def route_blockchain_mine():
+        blockchain.add_block(block_template.block_data(wallet))
+        block = blockchain.chain[-1]
+        if pubsub is not None:
+            pubsub.broadcast_block(block)
+        transaction_pool.clear_blockchain_transactions(blockchain)
+
+        return jsonify(block.to_json())
+
+    @app.route('/wallet/transact', methods=['POST'])
+    def route_wallet_transact():
+        transaction_json = request.get_json()
+        transaction = transaction_pool.existing_transaction(wallet.address)
+
+        if transaction:
+            transaction.update(
+                wallet,
+                transaction_json['recipient'],
+                transaction_json['amount']
+            )
+        else:
+            transaction = Transaction(
+                wallet,
+                transaction_json['recipient'],
+                transaction_json['amount']
+            )
+
+        transaction_pool.set_transaction(transaction)
+        if pubsub is not None:
+            pubsub.broadcast_transaction(transaction)
+
+        return jsonify(transaction.to_json())
+
+    @app.route('/wallet/info')
+    def route_wallet_info():
+        return jsonify({ 'address': wallet.address, 'balance': wallet.balance })
+
+    @app.route('/known-addresses')
+    def route_known_addresses():
+        known_addresses = set()
+
+        for block in blockchain.chain:
+            if not isinstance(block.data, list):
+                continue
+            for transaction in block.data:
+                known_addresses.update(transaction['output'].keys())
+
+        return jsonify(list(known_addresses))
+
+    @app.route('/transactions')
+    def route_transactions():
+        return jsonify(transaction_pool.transaction_data())
+
+    return app
+
+def open_block_store(peer):
+    """
+    Open the block store named by the BLOCK_STORE environment variable, or
+    BLOCK_STORE_DIRECTORY for the root node. Peers run on random ports, so
+    they keep their chain in memory unless BLOCK_STORE is set. An empty
+    BLOCK_STORE keeps the chain in memory too.
+    """
+    directory = os.environ.get('BLOCK_STORE')
+
+    if directory is None and not peer:
+        directory = BLOCK_STORE_DIRECTORY
+
+    return BlockStore(directory) if directory else None
+
+def main():
+    blockchain = Blockchain(
+        store=open_block_store(os.environ.get('PEER') == 'True')
+    )
+    Wallet.key_pool = KeyPool()
+    keystore_path = os.environ.get('WALLET_KEYSTORE')
+
+    if keystore_path:
+        wallet = Wallet.load_or_create(
+            keystore_path,
+            blockchain,
+            os.environ.get('WALLET_PASSWORD')
+        )
+    else:
+        wallet = Wallet(blockchain)
+
+    transaction_pool = TransactionPool()
+    pubsub = PubSub(blockchain, transaction_pool)
+    app = create_app(blockchain, transaction_pool, wallet, pubsub)
+    port = ROOT_PORT
+
+    if os.environ.get('PEER') == 'True':
+        port = random.randint(5001, 6000)
+
+        try:
+            synced_blocks = ChainSync(
+                blockchain,
+                [HttpPeer(f'http://localhost:{ROOT_PORT}')]
+            ).sync()
+            print(f'\n -- Successfully synchronized {synced_blocks} blocks')
+        except Exception as e:
+            print(f'\n -- Error synchronizing: {e}')
+
+    if os.environ.get('SEED_DATA') == 'True':
+        for i in range(10):
+            blockchain.add_block([
+                Transaction(Wallet(), Wallet().address, random.randint(2, 50)).to_json(),
+                Transaction(Wallet(), Wallet().address, random.randint(2, 50)).to_json()
+            ])
+
+        for i in range(3):
+            transaction_pool.set_transaction(
+                Transaction(Wallet(), Wallet().address, random.randint(2, 50))
+            )
+
+    app.run(port=port)
@@ -1,8 +1,22 @@
 import time
+import multiprocessing
+import queue
 
-from backend.utils.crypto_hash import crypto_hash
-from backend.utils.hex_to_binary import hex_to_binary
-from backend.config import MINE_RATE
+from backend.utils.crypto_hash import crypto_hash, CryptoHashTemplate
+from backend.utils.binary_codec import (
+    write_value,
+    read_value,
+    write_varint,
+    read_varint
+)
+from backend.utils.merkle import merkle_root
+from backend.utils.proof_of_work import (
+    difficulty_to_target,
+    digest_meets_target,
+    hash_meets_difficulty
+)
+from backend.wallet.transaction import Transaction
+from backend.config import MINE_RATE, MERKLE_ROOT_HEIGHT
 
 GENESIS_DATA = {
     'timestamp': 1,
@@ -13,15 +27,52 @@ GENESIS_DATA = {
     'nonce': 'genesis_nonce'
 }
 
+BLOCK_FORMAT_VERSION = 2
+
+VALUE_DATA = 0
+TRANSACTION_DATA = 1
+
+TRANSACTION_KEYS = ['id', 'output', 'input']
+
+# How many nonces a mining worker tries between checks of the shared stop flag.
+STOP_CHECK_INTERVAL = 256
+
+# Seconds between checks that the mining workers are still alive.
+WORKER_CHECK_INTERVAL = 0.5
+
 
 class Block:
     """
     Each Block will serve as a unit of storage.
     Those units will store transactions in a blockchain that supports
     a cryptocurrency.
+    A block of transactions (list data) carries the merkle_root of its data,
+    and its hash covers the root instead of the data itself, so the header
+    alone commits to every transaction. Blocks without a merkle_root (other
+    data, or blocks below MERKLE_ROOT_HEIGHT mined before the root existed)
+    hash their data directly.
+    The fields are slots, so a block carries no per-instance __dict__.
     """
+    __slots__ = (
+        'timestamp',
+        'last_hash',
+        'hash',
+        'data',
+        'difficulty',
+        'nonce',
+        'merkle_root'
+    )
 
-    def __init__(self, timestamp, last_hash, hash, data, difficulty, nonce):
+    def __init__(
+        self,
+        timestamp,
+        last_hash,
+        hash,
+        data,
+        difficulty,
+        nonce,
+        merkle_root=None
+    ):
         super(Block, self).__init__()
         self.timestamp = timestamp
         self.last_hash = last_hash
@@ -29,6 +80,7 @@ class Block:
         self.data = data
         self.difficulty = difficulty
         self.nonce = nonce
+        self.merkle_root = merkle_root
 
     def __repr__(self):
         return (
@@ -38,40 +90,149 @@ class Block:
             f'hash: {self.hash}, '
             f'data: {self.data}, '
             f'difficulty: {self.difficulty}, '
-            f'nonce: {self.nonce})'
+            f'nonce: {self.nonce}, '
+            f'merkle_root: {self.merkle_root})'
         )
 
     def __eq__(self, other):
-        return self.__dict__ == other.__dict__
+        return self.to_json() == other.to_json()
 
     def to_json(self):
         """
         This method will serialize the block object into a dictionary of
         its attributes so that Flask's JSONify method can effectively create a
         JSON from the existing individual block data.
+        - The dictionary is new on every call, so changing it leaves the block
+        alone. Its values are the block's own, not copies.
+        """
+        return {name: getattr(self, name) for name in Block.__slots__}
+
+    @staticmethod
+    def data_root(data):
+        """
+        Return the Merkle root of a list of transactions, or None for any
+        other data.
+        """
+        if isinstance(data, list):
+            return merkle_root(data)
+
+        return None
+
+    @staticmethod
+    def requires_merkle_root(height):
         """
-        return self.__dict__
+        Whether a block of transactions at the given height must carry a
+        Merkle root. A height of None stands for a new block, which always
+        does.
+        """
+        return height is None or height >= MERKLE_ROOT_HEIGHT
+
+    def hashed_content(self):
+        """
+        Return what the block hash covers next to the header fields: the
+        Merkle root, or the data for blocks without one.
+        """
+        return self.data if self.merkle_root is None else self.merkle_root
 
     @staticmethod
-    def mine_block(last_block, data):
+    def mine_block(last_block, data, workers=1):
         """
         Mines a block based on the given last_block and data, until a block hash
         is found that meets the leading 0's proof of work requirement (as
         indicated by the difficulty [1 == 1 leading zero 2 == 2, etc.]).
+        - The Merkle root of the data is computed once, and the last_hash and
+        root are serialized once into a CryptoHashTemplate, so each nonce only
+        hashes the timestamp, difficulty and nonce on top.
+        - The raw digest is compared against the integer target of the
+        difficulty, which is the same as counting its leading zero bits.
+        - With more than one worker the nonce search is handed over to
+        Block.mine_block_parallel.
         """
+        if workers > 1:
+            return Block.mine_block_parallel(last_block, data, workers)
+
         timestamp = time.time_ns()
         last_hash = last_block.hash
+        root = Block.data_root(data)
+        hasher = CryptoHashTemplate(last_hash, data if root is None else root)
         difficulty = Block.adjust_difficulty(last_block, timestamp)
         nonce = 0
-        hash = crypto_hash(timestamp, last_hash, data, difficulty, nonce)
+        digest = hasher.digest(timestamp, difficulty, nonce)
 
-        while hex_to_binary(hash)[0:difficulty] != '0' * difficulty:
+        while not digest_meets_target(digest, difficulty_to_target(difficulty)):
             nonce += 1
             timestamp = time.time_ns()
             difficulty = Block.adjust_difficulty(last_block, timestamp)
-            hash = crypto_hash(timestamp, last_hash, data, difficulty, nonce)
+            digest = hasher.digest(timestamp, difficulty, nonce)
 
-        return Block(timestamp, last_hash, hash, data, difficulty, nonce)
+        return Block(
+            timestamp,
+            last_hash,
+            digest.hex(),
+            data,
+            difficulty,
+            nonce,
+            root
+        )
+
+    @staticmethod
+    def mine_block_parallel(last_block, data, workers):
+        """
+        Mines a block the same way as Block.mine_block, but partitions the nonce
+        space across a pool of worker processes.
+        - Worker i tries the nonces i, i + workers, i + 2 * workers, etc.
+        - The first worker to find a valid hash reports it and sets the shared
+        stop flag, which makes every other worker quit its search.
+        - The result is an ordinary Block, so it is validated exactly like a
+        block mined on a single core.
+        - While waiting, the workers are checked every WORKER_CHECK_INTERVAL
+        seconds, and mining fails if all of them exited without a result.
+        """
+        root = Block.data_root(data)
+        content = data if root is None else root
+        found = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=search_nonces,
+                args=(last_block, content, first_nonce, workers, found, results),
+                daemon=True
+            )
+            for first_nonce in range(workers)
+        ]
+
+        for process in processes:
+            process.start()
+
+        try:
+            result = None
+            while result is None:
+                # Checked before waiting, so a result that a worker put on the
+                # queue right before it exited is still picked up.
+                workers_alive = any(process.is_alive() for process in processes)
+                try:
+                    result = results.get(timeout=WORKER_CHECK_INTERVAL)
+                except queue.Empty:
+                    if not workers_alive:
+                        raise Exception(
+                            'Every mining worker exited without a result. '\
+                            f'Exit codes: {[process.exitcode for process in processes]}'
+                        )
+            timestamp, hash, difficulty, nonce = result
+        finally:
+            found.set()
+            for process in processes:
+                process.join()
+
+        return Block(
+            timestamp,
+            last_block.hash,
+            hash,
+            data,
+            difficulty,
+            nonce,
+            root
+        )
 
     @staticmethod
     def genesis():
@@ -87,6 +248,71 @@ class Block:
         a block instance.
         """
         return Block(**block_json)
+
+    def to_bytes(self):
+        """
+        This method will serialize the block into a compact, versioned binary
+        form. A list of transactions is stored with Transaction.to_bytes, any
+        other data as a generic value.
+        """
+        buffer = bytearray([BLOCK_FORMAT_VERSION])
+        write_value(buffer, self.timestamp)
+        write_value(buffer, self.last_hash)
+        write_value(buffer, self.hash)
+        write_value(buffer, self.difficulty)
+        write_value(buffer, self.nonce)
+        write_value(buffer, self.merkle_root)
+
+        if isinstance(self.data, list) and all(
+            isinstance(transaction_json, dict)
+            and list(transaction_json) == TRANSACTION_KEYS
+            for transaction_json in self.data
+        ):
+            buffer.append(TRANSACTION_DATA)
+            write_varint(buffer, len(self.data))
+            for transaction_json in self.data:
+                buffer += Transaction.from_json(transaction_json).to_bytes()
+        else:
+            buffer.append(VALUE_DATA)
+            write_value(buffer, self.data)
+
+        return bytes(buffer)
+
+    @staticmethod
+    def from_bytes(block_bytes):
+        """
+        This method will deserialize the binary form created by to_bytes back
+        into a block instance, with its data in JSON form. Version 1 blocks
+        have no Merkle root.
+        """
+        version = block_bytes[0]
+        if version not in (1, BLOCK_FORMAT_VERSION):
+            raise Exception(f'Unsupported block format version: {version}')
+
+        timestamp, offset = read_value(block_bytes, 1)
+        last_hash, offset = read_value(block_bytes, offset)
+        hash, offset = read_value(block_bytes, offset)
+        difficulty, offset = read_value(block_bytes, offset)
+        nonce, offset = read_value(block_bytes, offset)
+        root = None
+        if version >= 2:
+            root, offset = read_value(block_bytes, offset)
+        data_type = block_bytes[offset]
+        offset += 1
+
+        if data_type == TRANSACTION_DATA:
+            length, offset = read_varint(block_bytes, offset)
+            data = []
+            for _ in range(length):
+                transaction, offset = Transaction.read_bytes(block_bytes, offset)
+                data.append(transaction.to_json())
+        elif data_type == VALUE_DATA:
+            data, offset = read_value(block_bytes, offset)
+        else:
+            raise Exception(f'Unknown block data type: {data_type}')
+
+        return Block(timestamp, last_hash, hash, data, difficulty, nonce, root)
+
     @staticmethod
     def adjust_difficulty(last_block, new_timestamp):
         """
@@ -102,27 +328,42 @@ class Block:
         return 1
 
     @staticmethod
-    def is_valid_block(last_block, block):
+    def is_valid_block(last_block, block, height=None):
         """
         Validate block by enforcing the following rules:
         - the block must have the proper last_hash reference
         - the block must meet the proof of work requirement
         - the difficulty must only adjust by 1
+        - the Merkle root must match the block data. Blocks of transactions
+        must have one, unless their height is below MERKLE_ROOT_HEIGHT.
         - the block hash must be a valid combination of the block fields
         """
         if block.last_hash != last_block.hash:
             raise Exception('The block last_hash must be correct')
 
-        if hex_to_binary(block.hash)[0:block.difficulty] != '0' * block.difficulty:
+        if not hash_meets_difficulty(block.hash, block.difficulty):
             raise Exception('The proof of work requirement was not met')
 
         if abs(last_block.difficulty - block.difficulty) > 1:
             raise Exception('The block difficulty must only adjust by 1')
 
+        if (
+            block.merkle_root is None
+            and isinstance(block.data, list)
+            and Block.requires_merkle_root(height)
+        ):
+            raise Exception('The block must have a merkle_root')
+
+        if (
+            block.merkle_root is not None
+            and block.merkle_root != Block.data_root(block.data)
+        ):
+            raise Exception('The block merkle_root must match its data')
+
         reconstructed_hash = crypto_hash(
             block.timestamp,
             block.last_hash,
-            block.data,
+            block.hashed_content(),
             block.nonce,
             block.difficulty
         )
@@ -130,6 +371,32 @@ class Block:
         if block.hash != reconstructed_hash:
             raise Exception('The block hash must be correct.')
 
+def search_nonces(last_block, content, first_nonce, step, found, results):
+    """
+    Worker loop of Block.mine_block_parallel. It walks its share of the nonce
+    space (first_nonce, first_nonce + step, ...) until it finds a hash that
+    meets the proof of work requirement or another worker sets the found flag.
+    content is what the hash covers: the Merkle root or the data.
+    """
+    hasher = CryptoHashTemplate(last_block.hash, content)
+    nonce = first_nonce
+
+    while True:
+        for _ in range(STOP_CHECK_INTERVAL):
+            timestamp = time.time_ns()
+            difficulty = Block.adjust_difficulty(last_block, timestamp)
+            digest = hasher.digest(timestamp, difficulty, nonce)
+
+            if digest_meets_target(digest, difficulty_to_target(difficulty)):
+                found.set()
+                results.put((timestamp, digest.hex(), difficulty, nonce))
+                return
+
+            nonce += step
+
+        if found.is_set():
+            return
+
 def main():
     genesis_block = Block.genesis()
     bad_block = Block.mine_block(genesis_block, 'foo')
@@ -0,0 +1,167 @@
+from backend.blockchain.block import Block, GENESIS_DATA
+from backend.utils.crypto_hash import crypto_hash
+from backend.utils.proof_of_work import hash_meets_difficulty
+
+class BlockHeader:
+    """
+    The header of a block: every field except its data, with the Merkle root
+    of the data in its place.
+    - For blocks with a Merkle root the block hash covers the header fields
+    only, so the hash of a header can be checked without the block data.
+    - Blocks without a Merkle root hash their data, so their headers cannot
+    be checked on their own. They are only accepted below MERKLE_ROOT_HEIGHT,
+    by full nodes that check the hash once the block arrives.
+    """
+    __slots__ = (
+        'timestamp',
+        'last_hash',
+        'hash',
+        'difficulty',
+        'nonce',
+        'merkle_root'
+    )
+
+    def __init__(self, timestamp, last_hash, hash, difficulty, nonce, merkle_root=None):
+        super(BlockHeader, self).__init__()
+        self.timestamp = timestamp
+        self.last_hash = last_hash
+        self.hash = hash
+        self.difficulty = difficulty
+        self.nonce = nonce
+        self.merkle_root = merkle_root
+
+    def __repr__(self):
+        return (
+            'BlockHeader('
+            f'timestamp: {self.timestamp}, '
+            f'last_hash: {self.last_hash}, '
+            f'hash: {self.hash}, '
+            f'difficulty: {self.difficulty}, '
+            f'nonce: {self.nonce}, '
+            f'merkle_root: {self.merkle_root})'
+        )
+
+    def __eq__(self, other):
+        return self.to_json() == other.to_json()
+
+    def to_json(self):
+        return {name: getattr(self, name) for name in BlockHeader.__slots__}
+
+    @staticmethod
+    def from_json(header_json):
+        return BlockHeader(**header_json)
+
+    @staticmethod
+    def from_block(block):
+        return BlockHeader(
+            block.timestamp,
+            block.last_hash,
+            block.hash,
+            block.difficulty,
+            block.nonce,
+            block.merkle_root
+        )
+
+    @staticmethod
+    def genesis():
+        return BlockHeader.from_block(Block(**GENESIS_DATA))
+
+    def matches_block(self, block):
+        """
+        Check that the block is the one this header describes: the header
+        fields must be equal, the data must match the Merkle root and the hash
+        must cover them.
+        """
+        if self != BlockHeader.from_block(block):
+            return False
+
+        if (
+            block.merkle_root is not None
+            and block.merkle_root != Block.data_root(block.data)
+        ):
+            return False
+
+        return self.hash == crypto_hash(
+            block.timestamp,
+            block.last_hash,
+            block.hashed_content(),
+            block.nonce,
+            block.difficulty
+        )
+
+    @staticmethod
+    def is_valid_header(last_header, header, height=None):
+        """
+        Validate a header by enforcing the rules of Block.is_valid_block that
+        do not need the block data:
+        - the header must have the proper last_hash reference
+        - the header must meet the proof of work requirement
+        - the difficulty must only adjust by 1
+        - the header must have a Merkle root, unless its height is below
+        MERKLE_ROOT_HEIGHT. A height of None always requires one.
+        - the header hash must be a valid combination of the header fields,
+        when the header has a Merkle root
+        """
+        if header.last_hash != last_header.hash:
+            raise Exception('The header last_hash must be correct')
+
+        if not hash_meets_difficulty(header.hash, header.difficulty):
+            raise Exception('The proof of work requirement was not met')
+
+        if abs(last_header.difficulty - header.difficulty) > 1:
+            raise Exception('The header difficulty must only adjust by 1')
+
+        if header.merkle_root is None:
+            if Block.requires_merkle_root(height):
+                raise Exception('The header must have a merkle_root')
+        else:
+            reconstructed_hash = crypto_hash(
+                header.timestamp,
+                header.last_hash,
+                header.merkle_root,
+                header.nonce,
+                header.difficulty
+            )
+
+            if header.hash != reconstructed_hash:
+                raise Exception('The header hash must be correct.')
+
+class HeaderChain:
+    """
+    A chain of block headers, without any block data. It tracks the tip of
+    the network at a small fraction of the memory of the full chain.
+    """
+    def __init__(self):
+        super(HeaderChain, self).__init__()
+        self.headers = [BlockHeader.genesis()]
+
+    def __len__(self):
+        return len(self.headers)
+
+    @staticmethod
+    def is_valid_header_chain(last_header, headers, first_height=None):
+        """
+        Validate headers that follow the given last_header, the first of which
+        is at first_height. Without a first_height every header must have a
+        Merkle root.
+        """
+        for index, header in enumerate(headers):
+            height = None if first_height is None else first_height + index
+            BlockHeader.is_valid_header(last_header, header, height)
+            last_header = header
+
+    def extend(self, ancestor, headers):
+        """
+        Put the given headers after the ancestor height, replacing any headers
+        above it. The result must be longer than the current chain.
+        Every header must have a Merkle root, since nothing checks the hashes
+        of root-less headers later on.
+        """
+        if ancestor + 1 + len(headers) <= len(self.headers):
+            raise Exception('Cannot replace. The incoming chain must be longer.')
+
+        HeaderChain.is_valid_header_chain(self.headers[ancestor], headers)
+        self.headers = self.headers[:ancestor + 1] + headers
+
+    def to_json(self):
+        return [header.to_json() for header in self.headers]
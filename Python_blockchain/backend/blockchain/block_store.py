@@ -0,0 +1,296 @@
+import mmap
+import os
+import struct
+import zlib
+
+from backend.config import (
+    BLOCK_STORE_SEGMENT_SIZE,
+    BLOCK_STORE_FSYNC,
+    BLOCK_STORE_FSYNC_INTERVAL
+)
+
+# payload length, crc32 of key + payload, key length
+RECORD_HEADER = struct.Struct('<IIH')
+# segment number, offset of the record in the segment
+INDEX_ENTRY = struct.Struct('<IQ')
+
+INDEX_FILE = 'blocks.idx'
+SEGMENT_FILE = 'blocks-{:05d}.dat'
+
+FSYNC_POLICIES = ('always', 'batch', 'never')
+
+class BlockStore:
+    """
+    This class is an append-only, on-disk store of serialized blocks.
+    - Records are appended to segment files of at most segment_size bytes.
+    Each record holds a key (the block hash) and a payload (the serialized
+    block), protected by a crc32.
+    - An index file maps every height to the segment and offset of its record,
+    and the keys are indexed in memory, so blocks can be read by height or by
+    hash. Reads go through memory maps of the segment files.
+    - The fsync policy decides how durable an append is: 'always' syncs every
+    append, 'batch' syncs every fsync_interval appends and 'never' leaves it to
+    the operating system.
+    - On open, a torn record at the tail (from a crash in the middle of a
+    write) is truncated away, and complete records that never made it into the
+    index are indexed again.
+    """
+    def __init__(
+        self,
+        directory,
+        segment_size=BLOCK_STORE_SEGMENT_SIZE,
+        fsync=BLOCK_STORE_FSYNC,
+        fsync_interval=BLOCK_STORE_FSYNC_INTERVAL
+    ):
+        super(BlockStore, self).__init__()
+        if fsync not in FSYNC_POLICIES:
+            raise Exception(f'Unknown fsync policy: {fsync}')
+
+        self.directory = directory
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.unsynced_appends = 0
+
+        self.entries = []
+        self.heights = {}
+        self.maps = {}
+
+        os.makedirs(directory, exist_ok=True)
+        self.index_file = open(os.path.join(directory, INDEX_FILE), 'a+b', buffering=0)
+        self.load_index()
+        self.recover()
+
+        self.segment_number = self.entries[-1][0] if self.entries else 0
+        self.segment_file = open(self.segment_path(self.segment_number), 'ab', buffering=0)
+
+        for height in range(len(self.entries)):
+            self.heights[self.read_key(height)] = height
+
+    def __len__(self):
+        return len(self.entries)
+
+    def segment_path(self, segment_number):
+        return os.path.join(self.directory, SEGMENT_FILE.format(segment_number))
+
+    def load_index(self):
+        """
+        Read the index file, dropping a torn entry at its end.
+        """
+        self.index_file.seek(0)
+        index_bytes = self.index_file.read()
+        complete_length = len(index_bytes) - len(index_bytes) % INDEX_ENTRY.size
+
+        if complete_length != len(index_bytes):
+            self.index_file.truncate(complete_length)
+
+        self.entries = [
+            INDEX_ENTRY.unpack_from(index_bytes, offset)
+            for offset in range(0, complete_length, INDEX_ENTRY.size)
+        ]
+
+    def read_record(self, segment_file, offset):
+        """
+        Return the (key, payload) of the record at the offset of an open
+        segment file, or None when the record is incomplete or corrupt.
+        """
+        segment_file.seek(offset)
+        header = segment_file.read(RECORD_HEADER.size)
+
+        if len(header) < RECORD_HEADER.size:
+            return None
+
+        payload_length, checksum, key_length = RECORD_HEADER.unpack(header)
+        body = segment_file.read(key_length + payload_length)
+
+        if len(body) < key_length + payload_length or zlib.crc32(body) != checksum:
+            return None
+
+        return body[:key_length], body[key_length:]
+
+    def recover(self):
+        """
+        Make the index and the segment files agree after an unclean shutdown.
+        - Index entries whose record is missing or corrupt are dropped.
+        - Complete records written after the last indexed one are indexed.
+        - Everything from the first torn record on is removed, the segments
+        after it included, so no record is indexed past a gap.
+        """
+        while self.entries:
+            segment_number, offset = self.entries[-1]
+            path = self.segment_path(segment_number)
+            if os.path.exists(path):
+                with open(path, 'rb') as segment_file:
+                    if self.read_record(segment_file, offset) is not None:
+                        break
+            self.entries.pop()
+
+        if self.entries:
+            segment_number, offset = self.entries[-1]
+            with open(self.segment_path(segment_number), 'rb') as segment_file:
+                key, payload = self.read_record(segment_file, offset)
+            offset += RECORD_HEADER.size + len(key) + len(payload)
+        else:
+            segment_number, offset = 0, 0
+
+        recovered_entries = []
+
+        while os.path.exists(self.segment_path(segment_number)):
+            with open(self.segment_path(segment_number), 'r+b') as segment_file:
+                segment_length = os.fstat(segment_file.fileno()).st_size
+                while True:
+                    record = self.read_record(segment_file, offset)
+                    if record is None:
+                        break
+                    recovered_entries.append((segment_number, offset))
+                    offset += RECORD_HEADER.size + len(record[0]) + len(record[1])
+                segment_file.truncate(offset)
+
+            torn = offset < segment_length
+            segment_number, offset = segment_number + 1, 0
+
+            if torn:
+                while os.path.exists(self.segment_path(segment_number)):
+                    os.remove(self.segment_path(segment_number))
+                    segment_number += 1
+
+        self.entries.extend(recovered_entries)
+        self.index_file.truncate(0)
+        self.index_file.write(b''.join(
+            INDEX_ENTRY.pack(*entry) for entry in self.entries
+        ))
+        os.fsync(self.index_file.fileno())
+
+    def segment_map(self, segment_number, end):
+        """
+        Return a memory map of the segment that covers at least end bytes.
+        """
+        segment_map = self.maps.get(segment_number)
+
+        if segment_map is None or len(segment_map) < end:
+            if segment_map is not None:
+                segment_map.close()
+            with open(self.segment_path(segment_number), 'rb') as segment_file:
+                segment_map = mmap.mmap(
+                    segment_file.fileno(),
+                    0,
+                    access=mmap.ACCESS_READ
+                )
+            self.maps[segment_number] = segment_map
+
+        return segment_map
+
+    def read_entry(self, height):
+        """
+        Return the (key, payload) of the record at the given height.
+        """
+        segment_number, offset = self.entries[height]
+        segment_map = self.segment_map(segment_number, offset + RECORD_HEADER.size)
+        payload_length, _, key_length = RECORD_HEADER.unpack_from(segment_map, offset)
+        start = offset + RECORD_HEADER.size
+        end = start + key_length + payload_length
+        segment_map = self.segment_map(segment_number, end)
+
+        return (
+            segment_map[start:start + key_length],
+            segment_map[start + key_length:end]
+        )
+
+    def read(self, height):
+        """
+        Return the payload stored at the given height.
+        """
+        return self.read_entry(height)[1]
+
+    def read_key(self, height):
+        return self.read_entry(height)[0].decode('utf-8')
+
+    def height_of(self, key):
+        """
+        Return the height of the block with the given key (hash), or None.
+        """
+        return self.heights.get(key)
+
+    def append(self, key, payload):
+        """
+        Append a record with the given key and payload bytes and return its
+        height.
+        """
+        encoded_key = key.encode('utf-8')
+        body = encoded_key + payload
+        record = RECORD_HEADER.pack(
+            len(payload),
+            zlib.crc32(body),
+            len(encoded_key)
+        ) + body
+
+        offset = self.segment_file.tell()
+        if offset > 0 and offset + len(record) > self.segment_size:
+            self.segment_file.close()
+            self.segment_number += 1
+            self.segment_file = open(
+                self.segment_path(self.segment_number),
+                'ab',
+                buffering=0
+            )
+            offset = 0
+
+        self.segment_file.write(record)
+        self.index_file.write(INDEX_ENTRY.pack(self.segment_number, offset))
+
+        self.entries.append((self.segment_number, offset))
+        self.heights[key] = len(self.entries) - 1
+        self.unsynced_appends += 1
+
+        if self.fsync == 'always' or (
+            self.fsync == 'batch'
+            and self.unsynced_appends >= self.fsync_interval
+        ):
+            self.sync()
+
+        return len(self.entries) - 1
+
+    def truncate(self, height):
+        """
+        Remove every record at or above the given height.
+        """
+        if height >= len(self.entries):
+            return
+
+        segment_number, offset = self.entries[height]
+
+        for removed_height in range(height, len(self.entries)):
+            self.heights.pop(self.read_key(removed_height), None)
+
+        for mapped_segment in list(self.maps):
+            if mapped_segment >= segment_number:
+                self.maps.pop(mapped_segment).close()
+
+        self.segment_file.close()
+        for removed_segment in range(segment_number + 1, self.segment_number + 1):
+            os.remove(self.segment_path(removed_segment))
+
+        with open(self.segment_path(segment_number), 'r+b') as segment_file:
+            segment_file.truncate(offset)
+
+        self.entries = self.entries[:height]
+        self.index_file.truncate(height * INDEX_ENTRY.size)
+        self.segment_number = segment_number
+        self.segment_file = open(self.segment_path(segment_number), 'ab', buffering=0)
+        self.sync()
+
+    def sync(self):
+        os.fsync(self.segment_file.fileno())
+        os.fsync(self.index_file.fileno())
+        self.unsynced_appends = 0
+
+    def close(self):
+        if self.fsync != 'never':
+            self.sync()
+
+        for segment_map in self.maps.values():
+            segment_map.close()
+        self.maps = {}
+
+        self.segment_file.close()
+        self.index_file.close()
@@ -0,0 +1,195 @@
+from collections import OrderedDict
+
+from backend.config import BLOCK_MAX_TRANSACTIONS, BLOCK_MAX_BYTES
+from backend.wallet.transaction import Transaction
+
+class BlockTemplate:
+    """
+    This class assembles the data of the next block to mine from the
+    transaction pool.
+    - It keeps the candidate transactions: those in the pool whose input amount
+    matches the sender's balance on the chain, at most one per sender.
+    - The candidates are kept up to date incrementally. New pool transactions
+    are picked up by their pool sequence number, and a new block only drops
+    the transactions it includes and re-checks the senders whose balance it
+    changed. Only a fork that replaces the tip rebuilds the candidates from the
+    whole pool.
+    - The data takes the oldest candidates while they fit in max_transactions
+    transactions and max_bytes bytes (in their binary form), reward transaction
+    included, then adds the reward transaction.
+    """
+    def __init__(
+        self,
+        blockchain,
+        transaction_pool,
+        max_transactions=BLOCK_MAX_TRANSACTIONS,
+        max_bytes=BLOCK_MAX_BYTES
+    ):
+        super(BlockTemplate, self).__init__()
+        self.blockchain = blockchain
+        self.transaction_pool = transaction_pool
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+
+        self.candidates = OrderedDict()
+        self.sender_map = {}
+        self.pool_sequence = -1
+        self.height = 0
+        self.tip_hash = None
+        self.selected = None
+
+    def covered(self, transaction):
+        """
+        This BlockTemplate class method checks that the transaction is valid
+        and spends exactly the sender's current balance on the chain.
+        """
+        try:
+            Transaction.is_valid_transaction(transaction)
+        except Exception:
+            return False
+
+        return transaction.input['amount'] == self.blockchain.get_balance(
+            transaction.input['address']
+        )
+
+    def add_candidate(self, transaction):
+        sender = transaction.input['address']
+        self.remove_candidate(self.sender_map.get(sender))
+
+        if self.covered(transaction):
+            self.candidates[transaction.id] = transaction
+            self.sender_map[sender] = transaction.id
+
+        self.selected = None
+
+    def remove_candidate(self, transaction_id):
+        transaction = self.candidates.pop(transaction_id, None)
+
+        if transaction is not None:
+            sender = transaction.input['address']
+            if self.sender_map.get(sender) == transaction_id:
+                del self.sender_map[sender]
+            self.selected = None
+
+    def reset(self):
+        self.candidates = OrderedDict()
+        self.sender_map = {}
+        self.pool_sequence = -1
+        self.height = 0
+        self.tip_hash = None
+        self.selected = None
+
+    def apply_blocks(self, blocks):
+        """
+        This BlockTemplate class method drops the transactions included in the
+        new blocks, and re-checks the pool transaction of every address whose
+        balance the blocks changed.
+        """
+        touched_addresses = set()
+
+        for block in blocks:
+            if not isinstance(block.data, list):
+                continue
+
+            for transaction_json in block.data:
+                if not isinstance(transaction_json, dict):
+                    continue
+
+                self.remove_candidate(transaction_json.get('id'))
+                touched_addresses.add(transaction_json['input'].get('address'))
+                touched_addresses.update(transaction_json['output'])
+
+        for address in touched_addresses:
+            transaction = self.transaction_pool.existing_transaction(address)
+
+            if transaction is None or not self.covered(transaction):
+                self.remove_candidate(self.sender_map.get(address))
+            elif self.sender_map.get(address) != transaction.id:
+                self.add_candidate(transaction)
+
+    def update(self):
+        """
+        This BlockTemplate class method brings the candidates up to date with
+        the blockchain and the transaction pool.
+        - New blocks on top of the last seen tip are applied one by one.
+        - A chain that no longer contains the last seen tip starts over.
+        - Pool transactions set since the last update are added.
+        """
+        chain = self.blockchain.chain
+
+        if self.height > len(chain) or (
+            self.height > 0 and chain[self.height - 1].hash != self.tip_hash
+        ):
+            self.reset()
+
+        if self.height < len(chain):
+            if self.height > 0:
+                self.apply_blocks(
+                    chain[height] for height in range(self.height, len(chain))
+                )
+            self.height = len(chain)
+            self.tip_hash = chain[-1].hash
+
+        for sequence, transaction in self.transaction_pool.transactions_since(
+            self.pool_sequence
+        ):
+            self.add_candidate(transaction)
+            self.pool_sequence = sequence
+
+    def selected_transactions(self, reserved_bytes=0):
+        """
+        This BlockTemplate class method returns the oldest candidates that fit
+        in a block next to reserved_bytes of other data. Candidates that have
+        left the pool are dropped along the way. The selection is cached until
+        the candidates change.
+        """
+        if self.selected is not None and self.selected[0] == reserved_bytes and all(
+            self.transaction_pool.transaction_map.get(transaction.id) is transaction
+            for transaction in self.selected[1]
+        ):
+            return self.selected[1]
+
+        selected = []
+        selected_bytes = reserved_bytes
+        removed_ids = []
+
+        for transaction_id, transaction in self.candidates.items():
+            if len(selected) >= self.max_transactions - 1:
+                break
+
+            if self.transaction_pool.transaction_map.get(transaction_id) is not transaction:
+                removed_ids.append(transaction_id)
+                continue
+
+            size = self.transaction_pool.transaction_sizes[transaction_id]
+            if selected_bytes + size > self.max_bytes:
+                break
+
+            selected.append(transaction)
+            selected_bytes += size
+
+        for transaction_id in removed_ids:
+            self.remove_candidate(transaction_id)
+
+        self.selected = (reserved_bytes, selected)
+
+        return selected
+
+    def block_data(self, miner_wallet):
+        """
+        This BlockTemplate class method returns the data of the next block: the
+        selected transactions in their json form, followed by the reward
+        transaction for the given miner wallet.
+        """
+        self.update()
+
+        reward_transaction = Transaction.reward_transaction(miner_wallet)
+        data = [
+            transaction.to_json()
+            for transaction in self.selected_transactions(
+                len(reward_transaction.to_bytes())
+            )
+        ]
+        data.append(reward_transaction.to_json())
+
+        return data
@@ -1,38 +1,247 @@
+import json
+
 from backend.blockchain.block import Block
 from backend.wallet.transaction import Transaction
-from backend.wallet.wallet import Wallet
-from backend.config import MINING_REWARD_INPUT
+from backend.wallet.ledger import BalanceLedger
+from backend.wallet.signature_batch import verify_signatures
+from backend.utils.merkle import merkle_proof, verify_merkle_proof
+from backend.config import (
+    MINING_REWARD_INPUT,
+    MINING_WORKERS,
+    SIGNATURE_VERIFY_WORKERS
+)
 
 class Blockchain(object):
     """
     The Blockchain will be a public ledger of transactions. It will be
     implemented as a list of blocks, which are data sets of transactions.
+    It also owns a BalanceLedger of the wallet balances on its chain, which is
+    kept up to date as blocks are added and rebuilt when the chain is swapped.
+    When it is given a BlockStore, the chain is loaded from the store and every
+    change to the chain is written back to it.
     """
-    def __init__(self, ):
+    def __init__(self, mining_workers=MINING_WORKERS, store=None):
         super(Blockchain, self).__init__()
         self.chain = [Block.genesis()]
+        self.mining_workers = mining_workers
+        self.store = store
+
+        if self.store is not None:
+            if len(self.store):
+                self.chain = [
+                    Blockchain.decode_block(self.store.read(height))
+                    for height in range(len(self.store))
+                ]
+            else:
+                self.persist(0)
+
+    @property
+    def chain(self):
+        return self._chain
+
+    @chain.setter
+    def chain(self, chain):
+        self._chain = chain
+        self.ledger = BalanceLedger()
 
     def add_block(self, data):
-        self.chain.append(Block.mine_block(self.chain[-1], data))
+        self.chain.append(
+            Block.mine_block(self.chain[-1], data, self.mining_workers)
+        )
+        self.ledger.sync(self.chain)
+        self.persist(len(self.chain) - 1)
+
+    def persist(self, height):
+        """
+        This Blockchain class method writes the chain from the given height
+        onwards to the block store, replacing whatever the store held there.
+        """
+        if self.store is None:
+            return
+
+        self.store.truncate(height)
+        for block in self.chain[height:]:
+            self.store.append(block.hash, Blockchain.encode_block(block))
+
+    @staticmethod
+    def encode_block(block):
+        return block.to_bytes()
+
+    @staticmethod
+    def decode_block(block_bytes):
+        """
+        Blocks are stored in their binary form. Stores written before the
+        binary form existed hold JSON, which always starts with a '{'.
+        """
+        if block_bytes[:1] == b'{':
+            return Block.from_json(json.loads(block_bytes))
+
+        return Block.from_bytes(block_bytes)
+
+    def get_balance(self, address):
+        """
+        This Blockchain class method looks up the balance of the given wallet
+        address in the ledger, after applying any blocks it has not seen yet.
+        """
+        self.ledger.sync(self.chain)
+
+        return self.ledger.get_balance(address)
+
+    def transaction_proof(self, transaction_id):
+        """
+        This Blockchain class method returns the inclusion proof of the
+        transaction with the given id: the height and hash of its block, the
+        block's Merkle root, and the sibling hashes that lead from the
+        transaction up to the root. It returns None for unknown transactions
+        and for blocks without a Merkle root.
+        """
+        self.ledger.sync(self.chain)
+        height = self.ledger.transaction_heights.get(transaction_id)
+
+        if height is None or self.chain[height].merkle_root is None:
+            return None
+
+        block = self.chain[height]
+        index = next(
+            index for index, transaction_json in enumerate(block.data)
+            if isinstance(transaction_json, dict)
+            and transaction_json.get('id') == transaction_id
+        )
+
+        return {
+            'height': height,
+            'block_hash': block.hash,
+            'merkle_root': block.merkle_root,
+            'index': index,
+            'proof': merkle_proof(block.data, index)
+        }
+
+    @staticmethod
+    def verify_transaction_proof(transaction_json, proof):
+        """
+        This static method checks an inclusion proof against the transaction.
+        The caller still has to check that the proof's merkle_root belongs to
+        the block header it trusts at that height.
+        """
+        return verify_merkle_proof(
+            transaction_json,
+            proof['proof'],
+            proof['merkle_root']
+        )
 
     def __repr__(self):
         return f'Blockchain: {self.chain}'
 
-    def replace_chain(self, chain):
+    def append_block(self, block, full_validation=False):
+        """
+        This Blockchain class method appends a block received from the network
+        to the local chain.
+        - The block is only validated against the current tip, and its
+        transactions against the ledger, so accepting a block costs the same at
+        any chain height.
+        - With full_validation, the extended chain is validated from the
+        genesis block instead.
+        """
+        if full_validation:
+            self.replace_chain(self.chain + [block], full_validation=True)
+            return
+
+        self.ledger.sync(self.chain)
+        height = len(self.chain)
+
+        try:
+            Blockchain.is_valid_chain_extension(
+                self.chain[-1],
+                [block],
+                self.ledger
+            )
+        except Exception as e:
+            self.ledger.revert_to(height)
+            raise Exception(f'Cannot append. The incoming block is invalid: {e}')
+
+        self.chain.append(block)
+        self.persist(len(self.chain) - 1)
+
+    def common_ancestor(self, chain):
+        """
+        This Blockchain class method returns the height of the highest block
+        that the incoming chain shares with the local chain, or None when they
+        do not even share the genesis block.
+        """
+        for height in range(min(len(chain), len(self.chain)) - 1, -1, -1):
+            if chain[height].hash == self.chain[height].hash:
+                if chain[height] != self.chain[height]:
+                    return None
+                return height
+
+        return None
+
+    def replace_chain(self, chain, full_validation=False):
         """
         This Blockchain class method replaces the local chain with a new
         incoming chain if the following applies:
         - The incoming chain must be longer than the local one.
         - The incoming chain is formatted properly.
+        Only the blocks after the common ancestor of the two chains are
+        validated: the ledger is rolled back to the ancestor and the incoming
+        blocks are checked and applied on top of it. With full_validation, or
+        when there is no common ancestor, the whole incoming chain is validated
+        and the ledger is rebuilt.
         """
         if len(chain) <= len(self.chain):
             raise Exception('Cannot replace. The incoming chain must be longer.')
+
+        ancestor = None if full_validation else self.common_ancestor(chain)
+
+        if ancestor is None:
+            try:
+                Blockchain.is_valid_chain(chain)
+            except Exception as e:
+                raise Exception(f'Cannot replace. The incoming chain is invalid: {e}')
+
+            self.chain = chain
+            self.ledger.sync(self.chain)
+            self.persist(0)
+            return
+
+        self.replace_from(ancestor, [chain[ancestor + 1:]])
+
+    def replace_from(self, ancestor, ranges):
+        """
+        This Blockchain class method replaces the blocks after the ancestor
+        height with the blocks of the given ranges, an iterable of block lists.
+        - Each range is validated against the ledger as soon as it arrives, so
+        the ranges can be streamed in from the network.
+        - The resulting chain must be longer than the local one.
+        - If a range is invalid, or the iterable fails, the local chain and
+        ledger are left as they were.
+        """
+        self.ledger.sync(self.chain)
+        self.ledger.revert_to(ancestor + 1)
+        last_block = self.chain[ancestor]
+        suffix = []
+
         try:
-            Blockchain.is_valid_chain(chain)
+            for blocks in ranges:
+                Blockchain.is_valid_chain_extension(
+                    last_block,
+                    blocks,
+                    self.ledger
+                )
+                suffix.extend(blocks)
+                last_block = suffix[-1] if suffix else last_block
         except Exception as e:
+            self.ledger.revert_to(ancestor + 1)
+            self.ledger.sync(self.chain)
             raise Exception(f'Cannot replace. The incoming chain is invalid: {e}')
 
-        self.chain = chain
+        if ancestor + 1 + len(suffix) <= len(self.chain):
+            self.ledger.revert_to(ancestor + 1)
+            self.ledger.sync(self.chain)
+            raise Exception('Cannot replace. The incoming chain must be longer.')
+
+        self._chain = self.chain[:ancestor + 1] + suffix
+        self.persist(ancestor + 1)
 
     def to_json(self):
         """
@@ -63,12 +272,14 @@ class Blockchain(object):
         return blockchain
 
     @staticmethod
-    def is_valid_chain(chain):
+    def is_valid_chain(chain, signature_workers=SIGNATURE_VERIFY_WORKERS):
         """
         This static method validates the incoming chain.
         It should enforce the following rules of the blockchain:
         - The chain must start with the genesis block.
         - Blocks must be formatted correctly.
+        - Transactions must be valid, with their signatures verified across
+        signature_workers processes.
         """
         if chain[0] != Block.genesis():
             raise Exception('The genesis block must be valid.')
@@ -76,54 +287,118 @@ class Blockchain(object):
         for i in range(1, len(chain)):
             block = chain[i]
             last_block = chain[i-1]
-            Block.is_valid_block(last_block, block)
+            Block.is_valid_block(last_block, block, i)
 
-        Blockchain.is_valid_transaction_chain(chain)
+        Blockchain.is_valid_transaction_chain(chain, signature_workers)
 
     @staticmethod
-    def is_valid_transaction_chain(chain):
+    def is_valid_chain_extension(
+        last_block,
+        blocks,
+        ledger,
+        signature_workers=SIGNATURE_VERIFY_WORKERS
+    ):
+        """
+        This static method validates blocks that follow the given last_block,
+        where the ledger holds the balances and transaction ids of the chain up
+        to and including last_block.
+        - Each block must be a valid successor of the one before it, at the
+        height given by the ledger.
+        - Each block's transactions must be valid against the ledger, after
+        which the block is applied to the ledger.
+        The caller is responsible for rolling the ledger back when the blocks
+        turn out to be invalid.
+        """
+        signatures = []
+
+        for block in blocks:
+            Block.is_valid_block(last_block, block, ledger.height)
+            Blockchain.validate_block_transactions(block, ledger, signatures)
+            ledger.apply_block(block)
+            last_block = block
+
+        verify_signatures(signatures, signature_workers)
+
+    @staticmethod
+    def is_valid_transaction_chain(
+        chain,
+        signature_workers=SIGNATURE_VERIFY_WORKERS
+    ):
         """
         This static method enforces the rules of a chain composed of blocks of
         transactions. The rules are as follows:
             - Each transaction must only appear once in the chain.
             - There can only be 1(one) mining reward per block.
             - Each transaction must be valid.
+        The chain is walked once. A running BalanceLedger holds the balances of
+        every address as of the previous block, which is what each transaction
+        input amount is checked against.
+        The signatures are collected along the way and verified together in a
+        batch at the end, spread over signature_workers processes.
         """
-        transaction_ids = set()
+        historic_ledger = BalanceLedger()
+        signatures = []
 
-        for i in range(len(chain)):
-            block = chain[i]
-            has_mining_reward = False
-
-            for transaction_json in block.data:
-                transaction = Transaction.from_json(transaction_json)
-                # Enforces the 1 transaction id per chain parameter
-                if transaction.id in transaction_ids:
-                    raise Exception(f'Transaction {transaction.id} is not unique')
-                transaction_ids.add(transaction.id)
-                # Enforces the mining reward parameter
-                if transaction.input == MINING_REWARD_INPUT:
-                    if has_mining_reward:
-                        raise Exception(
-                            'There can only be one mining reward per block. '\
-                            f'Check block with hash: {block.hash}'
-                        )
-
-                    has_mining_reward = True
-                else:
-                    historic_blockchain = Blockchain()
-                    historic_blockchain.chain = chain[:i]
-                    historic_balance = Wallet.calculate_balance(
-                        historic_blockchain,
-                        transaction.input['address']
+        for block in chain:
+            Blockchain.validate_block_transactions(
+                block,
+                historic_ledger,
+                signatures
+            )
+            historic_ledger.apply_block(block)
+
+        verify_signatures(signatures, signature_workers)
+
+    @staticmethod
+    def validate_block_transactions(block, historic_ledger, signatures):
+        """
+        This static method enforces the transaction rules for a single block,
+        given a ledger of the chain before the block. The signature entries of
+        the block's transactions are appended to signatures for batch
+        verification.
+        """
+        has_mining_reward = False
+        block_transaction_ids = set()
+
+        for transaction_json in block.data:
+            transaction = Transaction.from_json(transaction_json)
+            # Enforces the 1 transaction id per chain parameter
+            if (
+                transaction.id in historic_ledger.transaction_ids
+                or transaction.id in block_transaction_ids
+            ):
+                raise Exception(f'Transaction {transaction.id} is not unique')
+            block_transaction_ids.add(transaction.id)
+            # Enforces the mining reward parameter
+            if transaction.input == MINING_REWARD_INPUT:
+                if has_mining_reward:
+                    raise Exception(
+                        'There can only be one mining reward per block. '\
+                        f'Check block with hash: {block.hash}'
+                    )
+
+                has_mining_reward = True
+            else:
+                historic_balance = historic_ledger.get_balance(
+                    transaction.input['address']
+                )
+                if historic_balance != transaction.input['amount']:
+                    raise Exception(
+                        f'Transaction {transaction.id} has an '\
+                        'invalid input amount'
                     )
-                    if historic_balance != transaction.input['amount']:
-                        raise Exception(
-                            f'Transaction {transaction.id} has an '\
-                            'invalid input amount'
-                        )
-                # Enforces the valid transaction parameter
-                Transaction.is_valid_transaction(transaction)
+                signatures.append((
+                    transaction.id,
+                    transaction.input['public_key'],
+                    transaction.output,
+                    transaction.input['signature']
+                ))
+            # Enforces the valid transaction parameter
+            Transaction.is_valid_transaction(
+                transaction,
+                verify_signature=False
+            )
+
 def main():
     blockchain = Blockchain()
     blockchain.add_block('one')
@@ -0,0 +1,284 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from backend.blockchain.block import Block
+from backend.blockchain.block_header import BlockHeader, HeaderChain
+from backend.config import (
+    SYNC_RANGE_SIZE,
+    SYNC_HEADER_RANGE_SIZE,
+    SYNC_WORKERS,
+    SYNC_TIMEOUT
+)
+
+def block_header(block):
+    """
+    Return the header json of a block: every field except its data, and the
+    Merkle root of the data.
+    """
+    return BlockHeader.from_block(block).to_json()
+
+def block_locator(chain):
+    """
+    Return [height, hash] pairs that describe the chain compactly: the last
+    ten blocks one by one, then every 2nd, 4th, 8th ... block below them, and
+    always the genesis block. A peer finds the common ancestor from these in
+    O(log n) lookups.
+    """
+    locator = []
+    height = len(chain) - 1
+    step = 1
+
+    while height > 0:
+        locator.append([height, chain[height].hash])
+        if len(locator) >= 10:
+            step *= 2
+        height -= step
+
+    locator.append([0, chain[0].hash])
+
+    return locator
+
+def chain_tip(blockchain):
+    return {
+        'height': len(blockchain.chain) - 1,
+        'hash': blockchain.chain[-1].hash
+    }
+
+def locate_ancestor(blockchain, locator):
+    """
+    Return the height of the highest block of the locator that is part of the
+    given blockchain, or None.
+    """
+    chain = blockchain.chain
+
+    for height, hash in locator:
+        if 0 <= height < len(chain) and chain[height].hash == hash:
+            return height
+
+    return None
+
+def chain_headers(blockchain, start, end):
+    return [block_header(block) for block in blockchain.chain[start:end]]
+
+def chain_blocks(blockchain, start, end):
+    return [block.to_json() for block in blockchain.chain[start:end]]
+
+def validate_headers(last_header, headers, first_height):
+    """
+    Check the header jsons, the first of which is at first_height, with the
+    rules of BlockHeader.is_valid_header. The block data is checked against
+    the Merkle roots once the blocks arrive.
+    """
+    HeaderChain.is_valid_header_chain(
+        BlockHeader.from_json(last_header),
+        [BlockHeader.from_json(header) for header in headers],
+        first_height
+    )
+
+def find_best_peer(peers):
+    """
+    Return the peer with the highest tip, its tip, and the peers that report
+    the same tip.
+    """
+    tips = []
+
+    for peer in peers:
+        try:
+            tips.append((peer, peer.tip()))
+        except Exception as e:
+            print(f'\n -- Could not reach peer {peer}: {e}')
+
+    if not tips:
+        return None, None, []
+
+    best, best_tip = max(tips, key=lambda peer_tip: peer_tip[1]['height'])
+    same_tip_peers = [peer for peer, tip in tips if tip == best_tip]
+
+    return best, best_tip, same_tip_peers
+
+class HttpPeer:
+    """
+    A peer reached over the HTTP API of its node (see backend/app).
+    """
+    def __init__(self, url, timeout=SYNC_TIMEOUT):
+        super(HttpPeer, self).__init__()
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def get(self, path, **params):
+        response = self.session.get(
+            f'{self.url}{path}',
+            params=params,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+        return response.json()
+
+    def tip(self):
+        return self.get('/blockchain/tip')
+
+    def ancestor(self, locator):
+        response = self.session.post(
+            f'{self.url}/blockchain/ancestor',
+            json={'locator': locator},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+        return response.json()['height']
+
+    def headers(self, start, end):
+        return self.get('/blockchain/headers', start=start, end=end)
+
+    def blocks(self, start, end):
+        return self.get('/blockchain/range', start=start, end=end)
+
+    def __repr__(self):
+        return f'HttpPeer({self.url})'
+
+class LocalPeer:
+    """
+    A peer whose blockchain lives in the same process. It answers with the
+    same json as the HTTP API.
+    """
+    def __init__(self, blockchain):
+        super(LocalPeer, self).__init__()
+        self.blockchain = blockchain
+
+    def tip(self):
+        return chain_tip(self.blockchain)
+
+    def ancestor(self, locator):
+        return locate_ancestor(self.blockchain, locator)
+
+    def headers(self, start, end):
+        return chain_headers(self.blockchain, start, end)
+
+    def blocks(self, start, end):
+        return chain_blocks(self.blockchain, start, end)
+
+class ChainSync:
+    """
+    This class brings a blockchain up to the best tip among its peers.
+    - The peers report their tip, and the peer with the highest one is synced
+    from.
+    - The common ancestor is found from a block locator, so only the missing
+    blocks are transferred.
+    - The headers of the missing blocks are fetched in ranges of
+    header_range_size and checked first.
+    - The blocks are then fetched in ranges of range_size, in parallel from
+    every peer on the same chain, and validated range by range as they arrive
+    in order. A range a peer fails to serve correctly is fetched again from
+    the best peer.
+    """
+    def __init__(
+        self,
+        blockchain,
+        peers,
+        range_size=SYNC_RANGE_SIZE,
+        header_range_size=SYNC_HEADER_RANGE_SIZE,
+        workers=SYNC_WORKERS
+    ):
+        super(ChainSync, self).__init__()
+        self.blockchain = blockchain
+        self.peers = peers
+        self.range_size = range_size
+        self.header_range_size = header_range_size
+        self.workers = workers
+
+    def best_peer(self):
+        return find_best_peer(self.peers)
+
+    def fetch_headers(self, peer, ancestor, tip_height):
+        headers = []
+        last_header = block_header(self.blockchain.chain[ancestor])
+
+        for start in range(ancestor + 1, tip_height + 1, self.header_range_size):
+            end = min(start + self.header_range_size, tip_height + 1)
+            range_headers = peer.headers(start, end)
+            if len(range_headers) != end - start:
+                raise Exception(f'Peer {peer} sent an incomplete header range')
+            validate_headers(last_header, range_headers, start)
+            headers.extend(range_headers)
+            last_header = range_headers[-1]
+
+        return headers
+
+    def fetch_range(self, peer, start, end, headers):
+        """
+        Fetch the blocks from start up to end and check them against their
+        headers.
+        """
+        blocks = [Block.from_json(block_json) for block_json in peer.blocks(start, end)]
+
+        if [block_header(block) for block in blocks] != headers:
+            raise Exception(f'Peer {peer} sent blocks that do not match the headers')
+
+        return blocks
+
+    def fetch_ranges(self, best_peer, peers, first_height, headers):
+        """
+        Yield the block ranges in order, keeping up to twice the number of
+        workers of range requests in flight. headers are the headers of the
+        blocks from first_height on.
+        """
+        end_height = first_height + len(headers)
+        starts = list(range(first_height, end_height, self.range_size))
+
+        def range_headers(start):
+            end = min(start + self.range_size, end_height)
+            return start, end, headers[start - first_height:end - first_height]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {}
+
+            def submit(index):
+                futures[index] = executor.submit(
+                    self.fetch_range,
+                    peers[index % len(peers)],
+                    *range_headers(starts[index])
+                )
+
+            for index in range(min(len(starts), 2 * self.workers)):
+                submit(index)
+
+            for index, start in enumerate(starts):
+                try:
+                    blocks = futures.pop(index).result()
+                except Exception as e:
+                    print(f'\n -- Retrying blocks from {start} with {best_peer}: {e}')
+                    blocks = self.fetch_range(best_peer, *range_headers(start))
+
+                if index + 2 * self.workers < len(starts):
+                    submit(index + 2 * self.workers)
+
+                yield blocks
+
+    def sync(self):
+        """
+        Sync the blockchain with its peers. Return the number of blocks that
+        were added or replaced.
+        """
+        best_peer, best_tip, peers = self.best_peer()
+
+        if best_peer is None or best_tip['height'] < len(self.blockchain.chain):
+            return 0
+
+        ancestor = best_peer.ancestor(block_locator(self.blockchain.chain))
+        if ancestor is None:
+            raise Exception(f'Peer {best_peer} does not share the genesis block')
+
+        headers = self.fetch_headers(best_peer, ancestor, best_tip['height'])
+        ranges = self.fetch_ranges(best_peer, peers, ancestor + 1, headers)
+
+        if ancestor == len(self.blockchain.chain) - 1:
+            for blocks in ranges:
+                for block in blocks:
+                    self.blockchain.append_block(block)
+        else:
+            self.blockchain.replace_from(ancestor, ranges)
+
+        return len(headers)
@@ -0,0 +1,139 @@
+import os
+import time
+from collections import OrderedDict
+
+from backend.blockchain.block import Block
+from backend.blockchain.block_header import BlockHeader, HeaderChain
+from backend.blockchain.blockchain import Blockchain
+from backend.blockchain.chain_sync import HttpPeer, block_locator, find_best_peer
+from backend.config import (
+    SYNC_HEADER_RANGE_SIZE,
+    LIGHT_NODE_BLOCK_CACHE_SIZE,
+    LIGHT_NODE_POLL_INTERVAL
+)
+
+class LightNode:
+    """
+    A node that keeps only the header chain of the network and fetches block
+    bodies from its peers on demand.
+    - The headers are validated for linkage and proof of work, and the header
+    hashes cover the Merkle roots, so a fetched body is checked against its
+    header without validating the rest of the chain. Headers without a Merkle
+    root cannot be checked this way, so chains with them are refused.
+    - The last block_cache_size fetched blocks are kept in memory.
+    """
+    def __init__(
+        self,
+        peers,
+        header_range_size=SYNC_HEADER_RANGE_SIZE,
+        block_cache_size=LIGHT_NODE_BLOCK_CACHE_SIZE
+    ):
+        super(LightNode, self).__init__()
+        self.peers = peers
+        self.header_chain = HeaderChain()
+        self.header_range_size = header_range_size
+        self.block_cache_size = block_cache_size
+        self.block_cache = OrderedDict()
+
+    @property
+    def tip(self):
+        return self.header_chain.headers[-1]
+
+    def header(self, height):
+        return self.header_chain.headers[height]
+
+    def sync(self):
+        """
+        Bring the header chain up to the best tip among the peers. Return the
+        number of headers that were added or replaced.
+        """
+        peer, tip, _ = find_best_peer(self.peers)
+
+        if peer is None or tip['height'] < len(self.header_chain):
+            return 0
+
+        ancestor = peer.ancestor(block_locator(self.header_chain.headers))
+        if ancestor is None:
+            raise Exception(f'Peer {peer} does not share the genesis block')
+
+        headers = []
+        for start in range(ancestor + 1, tip['height'] + 1, self.header_range_size):
+            end = min(start + self.header_range_size, tip['height'] + 1)
+            range_headers = peer.headers(start, end)
+            if len(range_headers) != end - start:
+                raise Exception(f'Peer {peer} sent an incomplete header range')
+            headers.extend(BlockHeader.from_json(header) for header in range_headers)
+
+        self.header_chain.extend(ancestor, headers)
+
+        for hash, (height, _) in list(self.block_cache.items()):
+            if height >= len(self.header_chain) or self.header(height).hash != hash:
+                del self.block_cache[hash]
+
+        return len(headers)
+
+    def block(self, height):
+        """
+        Return the block at the given height, fetched from the first peer that
+        serves a body matching the header.
+        """
+        header = self.header(height)
+
+        if header.hash in self.block_cache:
+            self.block_cache.move_to_end(header.hash)
+            return self.block_cache[header.hash][1]
+
+        for peer in self.peers:
+            try:
+                block = Block.from_json(peer.blocks(height, height + 1)[0])
+            except Exception as e:
+                print(f'\n -- Could not fetch block {height} from {peer}: {e}')
+                continue
+
+            if header.matches_block(block):
+                self.block_cache[header.hash] = (height, block)
+                if len(self.block_cache) > self.block_cache_size:
+                    self.block_cache.popitem(last=False)
+                return block
+
+            print(f'\n -- Peer {peer} sent a block that does not match header {height}')
+
+        raise Exception(f'No peer served a valid block at height {height}')
+
+    def verify_transaction(self, transaction_json, proof):
+        """
+        Check an inclusion proof (see Blockchain.transaction_proof) against the
+        header chain, without fetching the block.
+        """
+        height = proof['height']
+
+        if not 0 <= height < len(self.header_chain):
+            return False
+
+        header = self.header(height)
+
+        return (
+            header.hash == proof['block_hash']
+            and header.merkle_root == proof['merkle_root']
+            and Blockchain.verify_transaction_proof(transaction_json, proof)
+        )
+
+def main():
+    peer_urls = os.environ.get('PEERS', 'http://localhost:5000').split(',')
+    light_node = LightNode([HttpPeer(url) for url in peer_urls])
+
+    while True:
+        try:
+            synced_headers = light_node.sync()
+            if synced_headers:
+                print(
+                    f'\n -- Synchronized {synced_headers} headers, '
+                    f'tip {len(light_node.header_chain) - 1}: {light_node.tip.hash}'
+                )
+        except Exception as e:
+            print(f'\n -- Error synchronizing headers: {e}')
+
+        time.sleep(LIGHT_NODE_POLL_INTERVAL)
+
+if __name__ == '__main__':
+    main()
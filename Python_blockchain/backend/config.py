@@ -7,6 +7,57 @@ HOURS = 60 * MINUTES
 
 MINE_RATE = 4 * SECONDS
 
+MINING_WORKERS = 1
+
+SIGNATURE_VERIFY_WORKERS = 1
+SIGNATURE_BATCH_SIZE = 256
+
+PUBLIC_KEY_CACHE_SIZE = 1024
+SIGNATURE_CACHE_SIZE = 65536
+
+KEY_POOL_SIZE = 32
+KEY_POOL_WORKERS = 2
+
+BLOCK_STORE_DIRECTORY = 'block_store'
+BLOCK_STORE_SEGMENT_SIZE = 64 * 1024 * 1024
+BLOCK_STORE_FSYNC = 'batch'
+BLOCK_STORE_FSYNC_INTERVAL = 100
+
+TRANSACTION_POOL_MAX_COUNT = 100000
+TRANSACTION_POOL_MAX_BYTES = 64 * 1024 * 1024
+TRANSACTION_POOL_PRIORITY = 'oldest'
+
+# Blocks of transactions (list data) from this height on must carry the Merkle
+# root of their data. Chains mined before Merkle roots existed raise it to the
+# height of their first block with a root.
+MERKLE_ROOT_HEIGHT = 1
+
+BLOCK_MAX_TRANSACTIONS = 1000
+BLOCK_MAX_BYTES = 1024 * 1024
+
+PUBSUB_TRANSPORT = 'pubnub'
+PUBSUB_BROKER_HOST = '127.0.0.1'
+PUBSUB_BROKER_PORT = 5050
+PUBSUB_BROKER_MAX_FRAME = 16 * 1024 * 1024
+PUBSUB_BROKER_MAX_BUFFER = 64 * 1024 * 1024
+PUBSUB_RECONNECT_DELAY = 1
+PUBSUB_MAX_PENDING_FRAMES = 10000
+
+BROADCAST_BATCH_SIZE = 100
+BROADCAST_BATCH_MAX_BYTES = 30 * 1024
+BROADCAST_BATCH_DELAY = 0.05
+
+SYNC_RANGE_SIZE = 500
+SYNC_HEADER_RANGE_SIZE = 2000
+SYNC_WORKERS = 4
+SYNC_TIMEOUT = 10
+
+API_RANGE_LIMIT = 1000
+API_HEADER_RANGE_LIMIT = 2000
+
+LIGHT_NODE_BLOCK_CACHE_SIZE = 16
+LIGHT_NODE_POLL_INTERVAL = 10
+
 STARTING_BALANCE = 1000
 
 MINING_REWARD = 25.5
@@ -1,3 +1,8 @@
+import asyncio
+import collections
+import copy
+import json
+import threading
 import time
 
 from pubnub.pubnub import PubNub
@@ -6,6 +11,17 @@ from pubnub.callbacks import SubscribeCallback
 
 from backend.blockchain.block import Block
 from backend.wallet.transaction import Transaction
+from backend.pubsub_broker import encode_frame, read_frame
+from backend.config import (
+    PUBSUB_TRANSPORT,
+    PUBSUB_BROKER_HOST,
+    PUBSUB_BROKER_PORT,
+    PUBSUB_RECONNECT_DELAY,
+    PUBSUB_MAX_PENDING_FRAMES,
+    BROADCAST_BATCH_SIZE,
+    BROADCAST_BATCH_MAX_BYTES,
+    BROADCAST_BATCH_DELAY
+)
 
 pnconfig = PNConfiguration()
 pnconfig.subscribe_key = 'sub-c-5e7c720e-4fd0-11ec-b60b-aa41d66f579f'
@@ -23,42 +39,299 @@ class Listener(SubscribeCallback):
         self.transaction_pool = transaction_pool
 
     def message(self, pubnub, message_object):
-        print(f'\n-- Channel: {message_object.channel} | Message: {message_object.message}')
+        self.handle(message_object.channel, message_object.message)
 
-        if message_object.channel == CHANNELS['BLOCK']:
-            block = Block.from_json(message_object.message)
-            potential_chain = self.blockchain.chain[:]
-            potential_chain.append(block)
+    def handle(self, channel, message):
+        """
+        This Listener class method handles a message received on a channel,
+        whichever transport delivered it.
+        """
+        print(f'\n-- Channel: {channel} | Message: {message}')
+
+        if channel == CHANNELS['BLOCK']:
+            block = Block.from_json(message)
 
             try:
-                self.blockchain.replace_chain(potential_chain)
+                self.blockchain.append_block(block)
                 self.transaction_pool.clear_blockchain_transactions(
                     self.blockchain
                 )
                 print('\n -- The local chain has been successfully updated and replaced!')
             except Exception as e:
                 print(f'\n -- Did not replace chain: {e}')
-        elif message_object.channel == CHANNELS['TRANSACTION']:
-            transaction = Transaction.from_json(message_object.message)
-            self.transaction_pool.set_transaction(transaction)
-            print('\n -- Set the new transaction into the transaction pool')
+        elif channel == CHANNELS['TRANSACTION']:
+            # A list is a batch of transactions, see TransactionBatcher
+            transaction_jsons = message if isinstance(message, list) else [message]
+
+            pooled = 0
+
+            # A bad entry is skipped, so it cannot cost the rest of the batch
+            for transaction_json in transaction_jsons:
+                try:
+                    transaction = Transaction.from_json(transaction_json)
+                    self.transaction_pool.set_transaction(transaction)
+                    pooled += 1
+                except Exception as e:
+                    print(f'\n -- Skipped a transaction: {e}')
+            print(
+                f'\n -- Set {pooled} new transaction(s) into '\
+                'the transaction pool'
+            )
+
+class PubNubTransport:
+    """
+    This transport publishes and subscribes through the hosted PubNub service.
+    Publishing does not wait for PubNub to acknowledge the message.
+    """
+    def __init__(self):
+        super(PubNubTransport, self).__init__()
+        self.pubnub = PubNub(pnconfig)
+
+    def subscribe(self, channels, listener):
+        self.pubnub.subscribe().channels(channels).execute()
+        self.pubnub.add_listener(listener)
+
+    def publish(self, channel, message):
+        self.pubnub.publish().channel(channel).message(message)\
+            .pn_async(self.published)
+
+    def published(self, result, status):
+        if status.is_error():
+            print(f'\n -- Failed to publish: {status.error_data}')
+
+    def close(self):
+        self.pubnub.stop()
+
+class BrokerTransport:
+    """
+    This transport publishes and subscribes through a self-hosted PubSubBroker
+    (see backend/pubsub_broker.py).
+    - The connection runs on an asyncio event loop in a background thread.
+    Publishing only queues the frame on that loop, so it never blocks the
+    caller on the network.
+    - Frames published while the broker is unreachable are kept and sent once
+    the connection is back, and the subscriptions are renewed on every
+    reconnect. At most max_pending_frames frames are kept: past that, the
+    oldest are dropped and counted in dropped_frames.
+    """
+    def __init__(
+        self,
+        host=PUBSUB_BROKER_HOST,
+        port=PUBSUB_BROKER_PORT,
+        reconnect_delay=PUBSUB_RECONNECT_DELAY,
+        max_pending_frames=PUBSUB_MAX_PENDING_FRAMES
+    ):
+        super(BrokerTransport, self).__init__()
+        self.host = host
+        self.port = port
+        self.reconnect_delay = reconnect_delay
+        self.channels = []
+        self.listener = None
+        self.writer = None
+        self.pending_frames = collections.deque(maxlen=max_pending_frames)
+        self.dropped_frames = 0
+        self.closed = False
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.connection = asyncio.run_coroutine_threadsafe(
+            self.connect(),
+            self.loop
+        )
+
+    def subscribe(self, channels, listener):
+        self.channels = list(channels)
+        self.listener = listener
+        self.loop.call_soon_threadsafe(
+            self.send,
+            encode_frame({'type': 'subscribe', 'channels': self.channels})
+        )
+
+    def publish(self, channel, message):
+        self.loop.call_soon_threadsafe(
+            self.send,
+            encode_frame({
+                'type': 'publish',
+                'channel': channel,
+                'message': message
+            })
+        )
+
+    def send(self, frame):
+        if self.writer is None:
+            if len(self.pending_frames) == self.pending_frames.maxlen:
+                self.dropped_frames += 1
+            self.pending_frames.append(frame)
+        else:
+            self.writer.write(frame)
+
+    async def connect(self):
+        """
+        This BrokerTransport class method keeps a connection to the broker
+        open until the transport is closed. Whenever the connection fails, be
+        it on connect or while reading (a reset, a frame cut short, a frame
+        that is too large), the writer is closed and the transport reconnects
+        after reconnect_delay.
+        """
+        while not self.closed:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+
+                if self.channels:
+                    writer.write(encode_frame({
+                        'type': 'subscribe',
+                        'channels': self.channels
+                    }))
+                for frame in self.pending_frames:
+                    writer.write(frame)
+                self.pending_frames.clear()
+                self.writer = writer
+
+                while True:
+                    frame = await read_frame(reader)
+                    if frame is None:
+                        break
+                    if frame['type'] == 'message' and self.listener is not None:
+                        try:
+                            self.listener.handle(frame['channel'], frame['message'])
+                        except Exception as e:
+                            print(f'\n -- Could not handle the message: {e}')
+            except Exception as e:
+                print(f'\n -- Lost the connection to the broker: {e}')
+
+            self.writer = None
+            if writer is not None:
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def disconnect(self):
+        self.closed = True
+        self.connection.cancel()
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.disconnect(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+class TransactionBatcher:
+    """
+    This class coalesces outgoing transactions into batches, so a flood of
+    transactions turns into a few publishes instead of one per transaction.
+    - A batch is published as a list of transaction jsons once it holds
+    max_size transactions or about max_bytes bytes of json, or max_delay
+    seconds after its first transaction, whichever comes first.
+    - A transaction that is updated again before its batch goes out is sent
+    once, in the form it had when it was last added.
+    """
+    def __init__(
+        self,
+        publish,
+        max_size=BROADCAST_BATCH_SIZE,
+        max_bytes=BROADCAST_BATCH_MAX_BYTES,
+        max_delay=BROADCAST_BATCH_DELAY
+    ):
+        super(TransactionBatcher, self).__init__()
+        self.publish = publish
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.pending_sizes = {}
+        self.pending_bytes = 0
+        self.timer = None
+
+    def add(self, transaction_json):
+        # The json shares its output and input dicts with the transaction, so
+        # the batch keeps a copy of the transaction as it is now.
+        transaction_json = copy.deepcopy(transaction_json)
+        transaction_id = transaction_json['id']
+        size = len(json.dumps(transaction_json))
+        ready_batches = []
+
+        with self.lock:
+            if (
+                transaction_id not in self.pending
+                and self.pending
+                and self.pending_bytes + size > self.max_bytes
+            ):
+                ready_batches.append(self.take_batch())
+
+            if transaction_id in self.pending:
+                self.pending_bytes -= self.pending_sizes[transaction_id]
+            self.pending[transaction_id] = transaction_json
+            self.pending_sizes[transaction_id] = size
+            self.pending_bytes += size
+
+            if len(self.pending) >= self.max_size:
+                ready_batches.append(self.take_batch())
+            elif self.timer is None:
+                self.timer = threading.Timer(self.max_delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        for batch in ready_batches:
+            self.publish(batch)
+
+    def take_batch(self):
+        batch = list(self.pending.values())
+        self.pending = {}
+        self.pending_sizes = {}
+        self.pending_bytes = 0
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        return batch
+
+    def flush(self):
+        """
+        Publish the pending transactions right away.
+        """
+        with self.lock:
+            batch = self.take_batch()
+
+        if batch:
+            self.publish(batch)
+
+TRANSPORTS = {
+    'pubnub': PubNubTransport,
+    'broker': BrokerTransport
+}
 
 class PubSub():
     """
     This class handles the publish/subscribe layer of the application.
     It also provides communication between the nodes of the blockchain network.
+    The messages travel over a transport: PubNub ('pubnub') or a self-hosted
+    broker ('broker'), or any object with subscribe, publish and close methods.
     """
-    def __init__(self, blockchain, transaction_pool):
+    def __init__(self, blockchain, transaction_pool, transport=PUBSUB_TRANSPORT):
         super(PubSub, self).__init__()
-        self.pubnub = PubNub(pnconfig)
-        self.pubnub.subscribe().channels(CHANNELS.values()).execute()
-        self.pubnub.add_listener(Listener(blockchain, transaction_pool))
+        if isinstance(transport, str):
+            transport = TRANSPORTS[transport]()
+
+        self.transport = transport
+        self.transaction_batcher = TransactionBatcher(
+            lambda batch: self.publish(CHANNELS['TRANSACTION'], batch)
+        )
+        self.transport.subscribe(
+            list(CHANNELS.values()),
+            Listener(blockchain, transaction_pool)
+        )
 
     def publish(self, channel, message):
         """
         This method will take care of publishing messages to the channel.
         """
-        self.pubnub.publish().channel(channel).message(message).sync()
+        self.transport.publish(channel, message)
 
     def broadcast_block(self, block):
         """
@@ -69,12 +342,16 @@ class PubSub():
     def broadcast_transaction(self, transaction):
         """
         This PubSub class method will broadcast a transaction to all nodes in
-        the network.
+        the network. Transactions go out in batches, see TransactionBatcher.
         """
-        self.publish(CHANNELS['TRANSACTION'], transaction.to_json())
+        self.transaction_batcher.add(transaction.to_json())
+
+    def close(self):
+        self.transaction_batcher.flush()
+        self.transport.close()
 
 def main():
-    pubsub = PubSub()
+    pubsub = PubSub(None, None)
 
     time.sleep(1)
 
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import struct
+
+from backend.config import (
+    PUBSUB_BROKER_HOST,
+    PUBSUB_BROKER_PORT,
+    PUBSUB_BROKER_MAX_FRAME,
+    PUBSUB_BROKER_MAX_BUFFER
+)
+
+# length of the json body that follows
+FRAME_HEADER = struct.Struct('>I')
+
+def encode_frame(frame):
+    """
+    Encode a frame (a json-compatible dict) as its length followed by its json
+    body.
+    """
+    body = json.dumps(frame, separators=(',', ':')).encode('utf-8')
+
+    return FRAME_HEADER.pack(len(body)) + body
+
+async def read_frame(reader, max_frame=PUBSUB_BROKER_MAX_FRAME):
+    """
+    Read the next frame from the stream, or return None once the stream ends.
+    """
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+        (length,) = FRAME_HEADER.unpack(header)
+        if length > max_frame:
+            raise Exception(f'Frame of {length} bytes is too large')
+
+        return json.loads(await reader.readexactly(length))
+    except asyncio.IncompleteReadError:
+        return None
+
+class PubSubBroker:
+    """
+    This class is a self-hosted publish/subscribe broker for the nodes of the
+    network, in place of the hosted PubNub service.
+    - Clients connect over TCP and exchange length-prefixed json frames:
+    {'type': 'subscribe', 'channels': [...]}, {'type': 'unsubscribe',
+    'channels': [...]} and {'type': 'publish', 'channel': ..., 'message': ...}.
+    - Every published message is delivered to the subscribers of its channel,
+    the publisher included, as {'type': 'message', 'channel': ...,
+    'message': ...}.
+    - A subscriber that falls more than max_buffer bytes behind is
+    disconnected, so a slow node cannot grow the broker's memory without bound.
+    """
+    def __init__(
+        self,
+        host=PUBSUB_BROKER_HOST,
+        port=PUBSUB_BROKER_PORT,
+        max_buffer=PUBSUB_BROKER_MAX_BUFFER
+    ):
+        super(PubSubBroker, self).__init__()
+        self.host = host
+        self.port = port
+        self.max_buffer = max_buffer
+        self.subscribers = {}
+        self.server = None
+
+    async def start(self):
+        """
+        Start listening, and return the port the broker listens on.
+        """
+        self.server = await asyncio.start_server(
+            self.handle_client,
+            self.host,
+            self.port
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+
+        return self.port
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def deliver(self, channel, message):
+        frame = encode_frame({
+            'type': 'message',
+            'channel': channel,
+            'message': message
+        })
+
+        for writer in list(self.subscribers.get(channel, ())):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.remove_subscriber(writer)
+                writer.close()
+            else:
+                writer.write(frame)
+
+    def remove_subscriber(self, writer):
+        for subscribers in self.subscribers.values():
+            subscribers.discard(writer)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+
+                if frame['type'] == 'subscribe':
+                    for channel in frame['channels']:
+                        self.subscribers.setdefault(channel, set()).add(writer)
+                elif frame['type'] == 'unsubscribe':
+                    for channel in frame['channels']:
+                        self.subscribers.get(channel, set()).discard(writer)
+                elif frame['type'] == 'publish':
+                    self.deliver(frame['channel'], frame['message'])
+                    await writer.drain()
+        except Exception as e:
+            print(f'\n -- Dropped broker client: {e}')
+        finally:
+            self.remove_subscriber(writer)
+            writer.close()
+
+def main():
+    broker = PubSubBroker()
+    print(f'\n -- Broker listening on {broker.host}:{broker.port}')
+    asyncio.run(broker.serve_forever())
+
+if __name__ == '__main__':
+    main()
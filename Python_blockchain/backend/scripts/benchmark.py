@@ -0,0 +1,373 @@
+"""
+Benchmark suite for the blockchain.
+
+Run from the Python_blockchain directory:
+
+    python -m backend.scripts.benchmark --output baseline.json
+    python -m backend.scripts.benchmark --compare baseline.json
+
+Every benchmark reports the seconds one operation takes (the best of a few
+repeats), so lower is always better. With --compare, a benchmark that got
+slower than the baseline by more than the threshold is flagged as a
+regression and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+from backend.blockchain.block import Block
+from backend.blockchain.blockchain import Blockchain
+from backend.utils.crypto_hash import crypto_hash
+from backend.utils.proof_of_work import hash_meets_difficulty
+from backend.wallet.transaction import Transaction
+from backend.wallet.transaction_pool import TransactionPool
+from backend.wallet.wallet import Wallet, verified_signatures, load_public_key
+from backend.config import MINE_RATE
+
+POS_CHAIN_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '..', 'POS_chain'
+)
+
+REPEAT = 5
+CHAIN_SIZES = [10, 100, 1000]
+TRANSACTIONS_PER_BLOCK = 4
+MINING_DIFFICULTY = 12
+POOL_TRANSACTIONS = 2000
+SERIALIZATION_TRANSACTIONS = 500
+DEFAULT_THRESHOLD = 0.1
+
+BENCHMARKS = []
+
+def benchmark(function):
+    BENCHMARKS.append(function)
+    return function
+
+def seconds_per_operation(function, number=1, setup=None):
+    """
+    Return the best time, out of REPEAT repeats, that one call of function
+    takes. setup runs before every repeat and is not timed.
+    """
+    times = []
+
+    for _ in range(REPEAT):
+        if setup is not None:
+            setup()
+        times.append(timeit.timeit(function, number=number) / number)
+
+    return min(times)
+
+def clear_signature_caches():
+    verified_signatures.clear()
+    load_public_key.cache_clear()
+
+def build_chain(length, transactions_per_block=TRANSACTIONS_PER_BLOCK):
+    """
+    Build a valid chain quickly: every block is timestamped one MINE_RATE after
+    the last, so the difficulty drops to 1 and mining takes a few hashes.
+    """
+    chain = [Block.genesis()]
+    miner_wallet = Wallet()
+
+    for _ in range(length - 1):
+        last_block = chain[-1]
+        data = [
+            Transaction(Wallet(), 'recipient', 1).to_json()
+            for _ in range(transactions_per_block)
+        ]
+        data.append(Transaction.reward_transaction(miner_wallet).to_json())
+        timestamp = max(last_block.timestamp, 0) + MINE_RATE
+        difficulty = Block.adjust_difficulty(last_block, timestamp)
+        root = Block.data_root(data)
+        nonce = 0
+        hash = crypto_hash(timestamp, last_block.hash, root, nonce, difficulty)
+
+        while not hash_meets_difficulty(hash, difficulty):
+            nonce += 1
+            hash = crypto_hash(timestamp, last_block.hash, root, nonce, difficulty)
+
+        chain.append(
+            Block(timestamp, last_block.hash, hash, data, difficulty, nonce, root)
+        )
+
+    return chain
+
+@benchmark
+def mining_hash():
+    """
+    Seconds per proof of work hash while mining a block.
+    """
+    results = {}
+    data = [Transaction(Wallet(), 'recipient', 1).to_json()]
+
+    for name, workers in [('mining_hash', 1), ('mining_hash_parallel', os.cpu_count() or 1)]:
+        seconds = 0
+        hashes = 0
+
+        while seconds < 1:
+            last_block = Block(
+                time.time_ns(),
+                'last_hash',
+                'last_hash',
+                [],
+                MINING_DIFFICULTY - 1,
+                0
+            )
+            start = time.perf_counter()
+            block = Block.mine_block(last_block, data, workers)
+            seconds += time.perf_counter() - start
+            hashes += block.nonce + 1
+
+        results[name] = seconds / hashes
+
+    return results
+
+@benchmark
+def chain_validation():
+    """
+    Seconds to validate chains of several sizes from scratch, with cold
+    signature caches.
+    """
+    results = {}
+
+    for size in CHAIN_SIZES:
+        chain = build_chain(size)
+        results[f'is_valid_chain_{size}'] = seconds_per_operation(
+            lambda: Blockchain.is_valid_chain(chain),
+            setup=clear_signature_caches
+        )
+
+    return results
+
+@benchmark
+def balance():
+    """
+    Seconds to look up a balance on the largest chain, and to build the
+    balance ledger of that chain from scratch.
+    """
+    blockchain = Blockchain()
+    blockchain.chain = build_chain(max(CHAIN_SIZES))
+    address = blockchain.chain[-1].data[0]['input']['address']
+
+    def rebuild_ledger():
+        blockchain.chain = blockchain.chain
+
+    return {
+        'calculate_balance': seconds_per_operation(
+            lambda: Wallet.calculate_balance(blockchain, address),
+            number=1000
+        ),
+        f'ledger_sync_{max(CHAIN_SIZES)}': seconds_per_operation(
+            lambda: Wallet.calculate_balance(blockchain, address),
+            setup=rebuild_ledger
+        )
+    }
+
+@benchmark
+def ecdsa_signatures():
+    """
+    Seconds to sign and to verify (without the signature cache) with the
+    ECDSA wallet of the backend.
+    """
+    wallet = Wallet()
+    data = {'recipient': 1}
+    signature = wallet.sign(data)
+
+    def verify():
+        verified_signatures.clear()
+        Wallet.verify(wallet.public_key, data, signature)
+
+    return {
+        'ecdsa_sign': seconds_per_operation(lambda: wallet.sign(data), number=100),
+        'ecdsa_verify': seconds_per_operation(verify, number=100)
+    }
+
+@benchmark
+def pos_signatures():
+    """
+    Seconds to sign and to verify with the RSA and Ed25519 wallets of
+    POS_chain.
+    """
+    sys.path.insert(0, os.path.abspath(POS_CHAIN_DIRECTORY))
+    try:
+        from Wallet import Wallet as POSWallet
+    finally:
+        sys.path.pop(0)
+
+    results = {}
+
+    for scheme in ['rsa', 'ed25519']:
+        wallet = POSWallet(scheme=scheme)
+        transaction = wallet.create_transaction('receiver', 1, 'TRANSFER')
+        data = transaction.payload()
+        public_key_string = wallet.public_key_string()
+
+        results[f'{scheme}_sign'] = seconds_per_operation(
+            lambda: wallet.sign(data),
+            number=20
+        )
+        results[f'{scheme}_verify'] = seconds_per_operation(
+            lambda: POSWallet.signature_valid(
+                data,
+                transaction.signature,
+                public_key_string,
+                scheme
+            ),
+            number=20
+        )
+
+    return results
+
+@benchmark
+def serialization():
+    """
+    Seconds to encode and decode a transaction and a block in their JSON and
+    binary forms.
+    """
+    transaction = Transaction(Wallet(), 'recipient', 10)
+    transaction_json = json.dumps(transaction.to_json())
+    transaction_bytes = transaction.to_bytes()
+    block = Block.mine_block(Block.genesis(), [
+        Transaction(Wallet(), 'recipient', 10).to_json()
+        for _ in range(SERIALIZATION_TRANSACTIONS)
+    ])
+    block_json = json.dumps(block.to_json())
+    block_bytes = block.to_bytes()
+
+    return {
+        'transaction_json_encode': seconds_per_operation(
+            lambda: json.dumps(transaction.to_json()), number=1000),
+        'transaction_json_decode': seconds_per_operation(
+            lambda: Transaction.from_json(json.loads(transaction_json)), number=1000),
+        'transaction_binary_encode': seconds_per_operation(
+            transaction.to_bytes, number=1000),
+        'transaction_binary_decode': seconds_per_operation(
+            lambda: Transaction.from_bytes(transaction_bytes), number=1000),
+        'block_json_encode': seconds_per_operation(
+            lambda: json.dumps(block.to_json()), number=10),
+        'block_json_decode': seconds_per_operation(
+            lambda: Block.from_json(json.loads(block_json)), number=10),
+        'block_binary_encode': seconds_per_operation(block.to_bytes, number=10),
+        'block_binary_decode': seconds_per_operation(
+            lambda: Block.from_bytes(block_bytes), number=10)
+    }
+
+@benchmark
+def transaction_pool():
+    """
+    Seconds per transaction to fill a pool, to pick the best transactions out
+    of it and to clear a block's transactions from it.
+    """
+    transactions = [
+        Transaction(Wallet(), 'recipient', 1)
+        for _ in range(POOL_TRANSACTIONS)
+    ]
+    blockchain = Blockchain()
+    blockchain.chain = build_chain(2, transactions_per_block=0)
+    blockchain.chain[-1].data = [
+        transaction.to_json() for transaction in transactions
+    ]
+    pools = []
+
+    def fill_pool():
+        pool = TransactionPool()
+        for transaction in transactions:
+            pool.set_transaction(transaction)
+        pools.append(pool)
+
+    def clear_pool():
+        pools.pop().clear_blockchain_transactions(blockchain)
+
+    fill_pool()
+
+    return {
+        'pool_set_transaction': seconds_per_operation(fill_pool) / POOL_TRANSACTIONS,
+        'pool_best_transactions_100': seconds_per_operation(
+            lambda: pools[0].best_transactions(100),
+            number=100
+        ),
+        'pool_clear_transaction': seconds_per_operation(
+            clear_pool,
+            setup=fill_pool
+        ) / POOL_TRANSACTIONS
+    }
+
+def run(name_filter=None):
+    results = {}
+
+    for function in BENCHMARKS:
+        if name_filter and name_filter not in function.__name__:
+            continue
+
+        print(f'Running {function.__name__}...', file=sys.stderr)
+        results.update(function())
+
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Print every result next to its baseline and return the names of the
+    benchmarks that got slower by more than the threshold.
+    """
+    regressions = []
+
+    for name, seconds in results.items():
+        baseline_seconds = baseline.get(name)
+
+        if baseline_seconds is None:
+            print(f'{name:32} {seconds:12.3e}s {"(new)":>12}')
+            continue
+
+        change = seconds / baseline_seconds - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+
+        print(f'{name:32} {seconds:12.3e}s {change:+11.1%}{flag}')
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the blockchain.')
+    parser.add_argument('--output', help='write the results as json to this file')
+    parser.add_argument('--compare', help='compare against a baseline json file')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help='slowdown that counts as a regression (default: %(default)s)'
+    )
+    parser.add_argument('--filter', help='only run benchmarks with this in their name')
+    arguments = parser.parse_args()
+
+    results = run(arguments.filter)
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+
+    if arguments.output:
+        with open(arguments.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+        regressions = compare(results, baseline, arguments.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s): {", ".join(regressions)}')
+            sys.exit(1)
+    else:
+        for name, seconds in results.items():
+            print(f'{name:32} {seconds:12.3e}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Memory benchmark for the transactions and blocks of both chains.
+
+Run from the Python_blockchain directory:
+
+    python -m backend.scripts.memory_benchmark
+
+Every object is decoded from its binary form, the way a node receives it, and
+the memory it holds is measured with tracemalloc. The results are bytes per
+transaction and per block, so lower is better.
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+from backend.blockchain.block import Block
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+POS_CHAIN_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '..', 'POS_chain'
+)
+
+TRANSACTIONS = 10000
+BLOCKS = 100
+TRANSACTIONS_PER_BLOCK = 100
+
+def bytes_per_object(decode, encoded_objects):
+    """
+    Return the memory that the decoded objects hold, per object. One object
+    is decoded first, so caches filled on the way are not counted.
+    """
+    decode(encoded_objects[0])
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = [decode(encoded_object) for encoded_object in encoded_objects]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del objects
+
+    return used / len(encoded_objects)
+
+def backend_objects():
+    wallets = [Wallet() for _ in range(10)]
+    transactions = [
+        Transaction(wallets[index % len(wallets)], 'recipient', 1).to_bytes()
+        for index in range(TRANSACTIONS)
+    ]
+    block = Block.mine_block(Block.genesis(), [
+        Transaction.from_bytes(transaction).to_json()
+        for transaction in transactions[:TRANSACTIONS_PER_BLOCK]
+    ])
+
+    return {
+        'backend_transaction': bytes_per_object(
+            Transaction.from_bytes, transactions),
+        'backend_block': bytes_per_object(
+            Block.from_bytes, [block.to_bytes()] * BLOCKS)
+    }
+
+def pos_objects():
+    sys.path.insert(0, os.path.abspath(POS_CHAIN_DIRECTORY))
+    try:
+        from Wallet import Wallet as POSWallet
+        from Transaction import Transaction as POSTransaction
+        from Block import Block as POSBlock
+    finally:
+        sys.path.pop(0)
+
+    wallet = POSWallet()
+    receiver = POSWallet().public_key_string()
+    transaction = wallet.create_transaction(receiver, 1, 'TRANSFER')
+    transactions = [
+        wallet.create_transaction(receiver, 1, 'TRANSFER')
+        for _ in range(TRANSACTIONS_PER_BLOCK)
+    ]
+    block = wallet.create_block(transactions, 'genesis_hash', 1)
+
+    return {
+        'pos_transaction': bytes_per_object(
+            POSTransaction.from_bytes, [transaction.to_bytes()] * TRANSACTIONS),
+        'pos_block': bytes_per_object(
+            POSBlock.from_bytes, [block.to_bytes()] * BLOCKS)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure object memory.')
+    parser.add_argument('--output', help='write the results as json to this file')
+    arguments = parser.parse_args()
+
+    results = {}
+    results.update(backend_objects())
+    results.update(pos_objects())
+
+    for name, size in results.items():
+        print(f'{name:24} {size:12.0f} bytes')
+
+    if arguments.output:
+        with open(arguments.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+if __name__ == '__main__':
+    main()
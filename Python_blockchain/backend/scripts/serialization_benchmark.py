@@ -0,0 +1,57 @@
+import json
+import timeit
+
+from backend.blockchain.block import Block
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+TRANSACTIONS = 500
+REPEAT = 20
+
+def report(name, json_encode, json_decode, binary_encode, binary_decode):
+    """
+    Prints the size and the encode/decode time of the JSON and binary forms.
+    """
+    json_form = json_encode()
+    binary_form = binary_encode()
+
+    print(f'{name}:')
+    print(f'  JSON size: {len(json_form)} bytes')
+    print(f'  Binary size: {len(binary_form)} bytes '
+          f'({len(binary_form)/len(json_form):.0%} of JSON)')
+
+    for label, function in [
+        ('JSON encode', json_encode),
+        ('JSON decode', json_decode),
+        ('Binary encode', binary_encode),
+        ('Binary decode', binary_decode)
+    ]:
+        seconds = timeit.timeit(function, number=REPEAT)/REPEAT
+        print(f'  {label}: {seconds * 1000:.3f}ms')
+
+transaction = Transaction(Wallet(), 'recipient', 10)
+transaction_json = json.dumps(transaction.to_json())
+transaction_bytes = transaction.to_bytes()
+
+report(
+    'Transaction',
+    lambda: json.dumps(transaction.to_json()),
+    lambda: Transaction.from_json(json.loads(transaction_json)),
+    transaction.to_bytes,
+    lambda: Transaction.from_bytes(transaction_bytes)
+)
+
+block = Block.mine_block(Block.genesis(), [
+    Transaction(Wallet(), 'recipient', 10).to_json()
+    for _ in range(TRANSACTIONS)
+])
+block_json = json.dumps(block.to_json())
+block_bytes = block.to_bytes()
+
+report(
+    f'Block with {TRANSACTIONS} transactions',
+    lambda: json.dumps(block.to_json()),
+    lambda: Block.from_json(json.loads(block_json)),
+    block.to_bytes,
+    lambda: Block.from_bytes(block_bytes)
+)
@@ -0,0 +1,94 @@
+import pytest
+
+from backend.app import create_app, open_block_store
+from backend.blockchain.blockchain import Blockchain
+from backend.blockchain.chain_sync import block_locator
+from backend.wallet.transaction_pool import TransactionPool
+from backend.wallet.wallet import Wallet
+
+@pytest.fixture
+def client():
+    blockchain = Blockchain()
+    app = create_app(blockchain, TransactionPool(), Wallet(blockchain))
+
+    return app.test_client()
+
+def test_mine_and_sync_routes(client):
+    client.post('/wallet/transact', json={'recipient': 'recipient', 'amount': 5})
+    block_json = client.get('/blockchain/mine').get_json()
+
+    assert client.get('/blockchain/tip').get_json() == {
+        'height': 1,
+        'hash': block_json['hash']
+    }
+    assert client.get('/blockchain/range?start=1&end=5').get_json() == [block_json]
+    assert client.get('/blockchain/headers?start=1').get_json()[0]['hash'] == \
+        block_json['hash']
+    assert client.get('/headers?start=1').get_json()[0]['merkle_root'] == \
+        block_json['merkle_root']
+    assert len(block_json['data']) == 2
+
+def test_ancestor_route(client):
+    chain = Blockchain().chain
+
+    response = client.post(
+        '/blockchain/ancestor',
+        json={'locator': block_locator(chain)}
+    )
+
+    assert response.get_json() == {'height': 0}
+
+def test_blockchain_route_streams_the_chain(client):
+    client.get('/blockchain/mine')
+    response = client.get('/blockchain')
+
+    assert response.is_streamed
+    assert len(response.get_json()) == 2
+    assert client.get('/blockchain/length').get_json() == 2
+
+def test_blockchain_routes_etag(client):
+    response = client.get('/blockchain')
+    etag = response.headers['ETag']
+
+    for path in ['/blockchain', '/blockchain/length', '/blockchain/range']:
+        assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+
+    client.get('/blockchain/mine')
+
+    response = client.get('/blockchain', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_range_route_limit(client, monkeypatch):
+    monkeypatch.setattr('backend.app.API_RANGE_LIMIT', 1)
+    client.get('/blockchain/mine')
+
+    assert len(client.get('/blockchain/range?start=0&end=2').get_json()) == 1
+
+def test_transaction_proof_route(client):
+    transaction_json = client.post(
+        '/wallet/transact',
+        json={'recipient': 'recipient', 'amount': 5}
+    ).get_json()
+    client.get('/blockchain/mine')
+
+    proof = client.get(f'/transaction/{transaction_json["id"]}/proof').get_json()
+
+    assert Blockchain.verify_transaction_proof(transaction_json, proof)
+    assert client.get('/transaction/unknown/proof').status_code == 404
+
+def test_open_block_store(tmp_path, monkeypatch):
+    monkeypatch.delenv('BLOCK_STORE', raising=False)
+
+    assert open_block_store(peer=True) is None
+
+    monkeypatch.setenv('BLOCK_STORE', str(tmp_path / 'blocks'))
+    blockchain = Blockchain(store=open_block_store(peer=True))
+
+    assert len(blockchain.store) == 1
+    assert Blockchain(store=open_block_store(peer=False)).chain == \
+        blockchain.chain
+
+    monkeypatch.setenv('BLOCK_STORE', '')
+
+    assert open_block_store(peer=False) is None
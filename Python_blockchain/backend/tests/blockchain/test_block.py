@@ -1,9 +1,13 @@
+import json
 import pytest
 import time
 
-from backend.blockchain.block import Block, GENESIS_DATA
+from backend.blockchain.block import Block, GENESIS_DATA, VALUE_DATA
 from backend.config import MINE_RATE, SECONDS
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
 from backend.utils.hex_to_binary import hex_to_binary
+from backend.utils.binary_codec import write_value
 
 def test_mine_block():
     last_block = Block.genesis()
@@ -15,6 +19,27 @@ def test_mine_block():
     assert block.last_hash == last_block.hash
     assert hex_to_binary(block.hash)[0:block.difficulty] == '0' * block.difficulty
 
+def test_mine_block_parallel():
+    last_block = Block.genesis()
+    data = 'test-data'
+    block = Block.mine_block(last_block, data, workers=2)
+
+    assert isinstance(block, Block)
+    assert block.data == data
+    assert block.last_hash == last_block.hash
+    assert hex_to_binary(block.hash)[0:block.difficulty] == '0' * block.difficulty
+    Block.is_valid_block(last_block, block)
+
+def exit_without_result(*args):
+    pass
+
+def test_mine_block_parallel_workers_exited(monkeypatch):
+    monkeypatch.setattr('backend.blockchain.block.search_nonces', exit_without_result)
+    monkeypatch.setattr('backend.blockchain.block.WORKER_CHECK_INTERVAL', 0.05)
+
+    with pytest.raises(Exception, match='exited without a result'):
+        Block.mine_block(Block.genesis(), 'test-data', workers=2)
+
 def test_genesis():
     genesis = Block.genesis()
 
@@ -22,6 +47,15 @@ def test_genesis():
     for key, value in GENESIS_DATA.items():
         getattr(genesis, key) == value
 
+def test_block_to_json_is_a_new_dict():
+    block = Block.genesis()
+    block_json = block.to_json()
+    block_json['hash'] = 'evil_hash'
+
+    assert block.hash == GENESIS_DATA['hash']
+    assert list(Block.genesis().to_json()) == list(GENESIS_DATA) + ['merkle_root']
+    assert not hasattr(block, '__dict__')
+
 def test_quickly_mined_block():
     last_block = Block.mine_block(Block.genesis(), 'foo')
     mined_block = Block.mine_block(last_block, 'bar')
@@ -88,3 +122,76 @@ def test_is_valid_block_bad_block_hash(last_block, block):
 
     with pytest.raises(Exception, match = 'block hash must be correct.'):
         Block.is_valid_block(last_block, block)
+
+def test_block_bytes_round_trip():
+    data = [
+        Transaction(Wallet(), 'recipient', 10).to_json(),
+        Transaction.reward_transaction(Wallet()).to_json()
+    ]
+    block = Block.mine_block(Block.genesis(), data)
+    restored_block = Block.from_bytes(block.to_bytes())
+
+    assert json.dumps(restored_block.to_json()) == json.dumps(block.to_json())
+    Block.is_valid_block(Block.genesis(), restored_block)
+
+def test_block_bytes_round_trip_plain_data():
+    for block in [Block.genesis(), Block.mine_block(Block.genesis(), 'test-data')]:
+        assert Block.from_bytes(block.to_bytes()) == block
+
+def test_mined_block_merkle_root():
+    data = [Transaction(Wallet(), 'recipient', i).to_json() for i in range(3)]
+    block = Block.mine_block(Block.genesis(), data)
+
+    assert block.merkle_root == Block.data_root(data)
+    Block.is_valid_block(Block.genesis(), block)
+
+def test_is_valid_block_bad_merkle_root():
+    data = [Transaction(Wallet(), 'recipient', i).to_json() for i in range(3)]
+    block = Block.mine_block(Block.genesis(), data)
+    block.data = data[:2]
+
+    with pytest.raises(Exception, match='merkle_root'):
+        Block.is_valid_block(Block.genesis(), block)
+
+def test_block_from_version_1_bytes():
+    block = Block.mine_block(Block.genesis(), 'test-data')
+    version_1_bytes = bytearray([1])
+    for value in [
+        block.timestamp,
+        block.last_hash,
+        block.hash,
+        block.difficulty,
+        block.nonce
+    ]:
+        write_value(version_1_bytes, value)
+    version_1_bytes.append(VALUE_DATA)
+    write_value(version_1_bytes, block.data)
+
+    assert block.merkle_root is None
+    assert Block.from_bytes(bytes(version_1_bytes)) == block
+
+def legacy_block(data):
+    """
+    Mine a block the way nodes did before Merkle roots: hashing its data.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(Block, 'data_root', staticmethod(lambda data: None))
+        return Block.mine_block(Block.genesis(), data)
+
+def test_is_valid_block_missing_merkle_root():
+    data = [Transaction(Wallet(), 'recipient', i).to_json() for i in range(3)]
+    block = legacy_block(data)
+
+    assert block.merkle_root is None
+    with pytest.raises(Exception, match='must have a merkle_root'):
+        Block.is_valid_block(Block.genesis(), block, 1)
+
+def test_is_valid_block_missing_merkle_root_below_merkle_root_height(monkeypatch):
+    monkeypatch.setattr('backend.blockchain.block.MERKLE_ROOT_HEIGHT', 2)
+    data = [Transaction(Wallet(), 'recipient', i).to_json() for i in range(3)]
+    block = legacy_block(data)
+
+    Block.is_valid_block(Block.genesis(), block, 1)
+
+    with pytest.raises(Exception, match='must have a merkle_root'):
+        Block.is_valid_block(Block.genesis(), block)
@@ -0,0 +1,86 @@
+import pytest
+
+from backend.blockchain.block import Block
+from backend.blockchain.block_header import BlockHeader, HeaderChain
+from backend.blockchain.blockchain import Blockchain
+
+@pytest.fixture
+def blockchain_three_blocks():
+    blockchain = Blockchain()
+    for i in range(3):
+        blockchain.add_block([f'data-{i}'])
+
+    return blockchain
+
+def headers(blockchain):
+    return [BlockHeader.from_block(block) for block in blockchain.chain]
+
+def test_block_header(blockchain_three_blocks):
+    block = blockchain_three_blocks.chain[-1]
+    header = BlockHeader.from_block(block)
+
+    assert header.hash == block.hash
+    assert header.merkle_root == block.merkle_root
+    assert 'data' not in header.to_json()
+    assert BlockHeader.from_json(header.to_json()) == header
+    assert header.matches_block(block)
+
+def test_header_does_not_match_tampered_data(blockchain_three_blocks):
+    block = blockchain_three_blocks.chain[-1]
+    header = BlockHeader.from_block(block)
+    block.data = ['evil']
+
+    assert not header.matches_block(block)
+
+def test_is_valid_header_chain(blockchain_three_blocks):
+    chain_headers = headers(blockchain_three_blocks)
+
+    HeaderChain.is_valid_header_chain(chain_headers[0], chain_headers[1:])
+
+def test_is_valid_header_bad_last_hash(blockchain_three_blocks):
+    last_header, header = headers(blockchain_three_blocks)[-2:]
+    header.last_hash = 'evil_last_hash'
+
+    with pytest.raises(Exception, match='last_hash must be correct'):
+        BlockHeader.is_valid_header(last_header, header)
+
+def test_is_valid_header_bad_merkle_root(blockchain_three_blocks):
+    last_header, header = headers(blockchain_three_blocks)[-2:]
+    header.merkle_root = Block.data_root(['evil'])
+
+    with pytest.raises(Exception, match='header hash must be correct'):
+        BlockHeader.is_valid_header(last_header, header)
+
+def test_is_valid_header_missing_merkle_root(blockchain_three_blocks):
+    last_header, header = headers(blockchain_three_blocks)[-2:]
+    header.merkle_root = None
+
+    with pytest.raises(Exception, match='must have a merkle_root'):
+        BlockHeader.is_valid_header(last_header, header)
+
+    with pytest.raises(Exception, match='must have a merkle_root'):
+        BlockHeader.is_valid_header(last_header, header, 3)
+
+def test_is_valid_header_missing_merkle_root_below_merkle_root_height(
+    blockchain_three_blocks,
+    monkeypatch
+):
+    monkeypatch.setattr('backend.blockchain.block.MERKLE_ROOT_HEIGHT', 4)
+    last_header, header = headers(blockchain_three_blocks)[-2:]
+    header.merkle_root = None
+
+    BlockHeader.is_valid_header(last_header, header, 3)
+
+def test_header_chain_extend(blockchain_three_blocks):
+    header_chain = HeaderChain()
+    header_chain.extend(0, headers(blockchain_three_blocks)[1:])
+
+    assert len(header_chain) == 4
+    assert header_chain.headers[-1].hash == blockchain_three_blocks.chain[-1].hash
+
+def test_header_chain_extend_not_longer(blockchain_three_blocks):
+    header_chain = HeaderChain()
+    header_chain.extend(0, headers(blockchain_three_blocks)[1:])
+
+    with pytest.raises(Exception, match='must be longer'):
+        header_chain.extend(1, headers(blockchain_three_blocks)[2:])
@@ -0,0 +1,157 @@
+import json
+import os
+
+import pytest
+
+from backend.blockchain.block_store import BlockStore, INDEX_FILE, INDEX_ENTRY
+from backend.blockchain.blockchain import Blockchain
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+@pytest.fixture
+def store_directory(tmp_path):
+    return str(tmp_path / 'blocks')
+
+def test_append_and_read(store_directory):
+    store = BlockStore(store_directory)
+    store.append('hash_0', b'block zero')
+    store.append('hash_1', b'block one')
+
+    assert len(store) == 2
+    assert store.read(0) == b'block zero'
+    assert store.read(1) == b'block one'
+    assert store.height_of('hash_1') == 1
+    assert store.height_of('unknown') is None
+
+def test_reopen(store_directory):
+    store = BlockStore(store_directory, fsync='always')
+    for height in range(5):
+        store.append(f'hash_{height}', f'block {height}'.encode('utf-8'))
+    store.close()
+
+    store = BlockStore(store_directory)
+
+    assert len(store) == 5
+    assert store.read(3) == b'block 3'
+    assert store.height_of('hash_4') == 4
+
+def test_segments_roll_over(store_directory):
+    store = BlockStore(store_directory, segment_size=64)
+    for height in range(10):
+        store.append(f'hash_{height}', b'x' * 30)
+    store.close()
+
+    store = BlockStore(store_directory, segment_size=64)
+
+    assert len(os.listdir(store_directory)) > 2
+    assert [store.read(height) for height in range(10)] == [b'x' * 30] * 10
+
+def test_truncate(store_directory):
+    store = BlockStore(store_directory, segment_size=64)
+    for height in range(10):
+        store.append(f'hash_{height}', f'block {height}'.encode('utf-8'))
+
+    store.truncate(4)
+    store.append('new_hash_4', b'new block 4')
+    store.close()
+
+    store = BlockStore(store_directory, segment_size=64)
+
+    assert len(store) == 5
+    assert store.read(4) == b'new block 4'
+    assert store.height_of('hash_7') is None
+    assert store.height_of('new_hash_4') == 4
+
+def test_recover_torn_tail(store_directory):
+    store = BlockStore(store_directory)
+    for height in range(3):
+        store.append(f'hash_{height}', b'complete block')
+    store.close()
+
+    segment_path = os.path.join(store_directory, 'blocks-00000.dat')
+    with open(segment_path, 'ab') as segment_file:
+        segment_file.write(b'\x40\x00\x00\x00torn')
+
+    store = BlockStore(store_directory)
+
+    assert len(store) == 3
+    store.append('hash_3', b'after recovery')
+    store.close()
+
+    store = BlockStore(store_directory)
+
+    assert len(store) == 4
+    assert store.read(3) == b'after recovery'
+
+def test_recover_stops_at_first_torn_record(store_directory):
+    store = BlockStore(store_directory, segment_size=64)
+    for height in range(10):
+        store.append(f'hash_{height}', b'x' * 30)
+    store.close()
+
+    with open(os.path.join(store_directory, INDEX_FILE), 'r+b') as index_file:
+        index_file.truncate(2 * INDEX_ENTRY.size)
+    with open(os.path.join(store_directory, 'blocks-00004.dat'), 'r+b') as segment_file:
+        segment_file.seek(-1, os.SEEK_END)
+        segment_file.write(b'y')
+
+    store = BlockStore(store_directory, segment_size=64)
+
+    assert len(store) == 4
+    assert store.height_of('hash_5') is None
+    assert not os.path.exists(os.path.join(store_directory, 'blocks-00005.dat'))
+
+    store.append('hash_4', b'after recovery')
+    store.close()
+    store = BlockStore(store_directory, segment_size=64)
+
+    assert len(store) == 5
+    assert store.read(4) == b'after recovery'
+
+def test_recover_unindexed_record(store_directory):
+    store = BlockStore(store_directory)
+    for height in range(3):
+        store.append(f'hash_{height}', b'block')
+    store.close()
+
+    index_path = os.path.join(store_directory, INDEX_FILE)
+    with open(index_path, 'r+b') as index_file:
+        index_file.truncate(2 * INDEX_ENTRY.size + 5)
+
+    store = BlockStore(store_directory)
+
+    assert len(store) == 3
+    assert store.height_of('hash_2') == 2
+
+def test_unknown_fsync_policy(store_directory):
+    with pytest.raises(Exception, match='Unknown fsync policy'):
+        BlockStore(store_directory, fsync='sometimes')
+
+def test_blockchain_backed_by_store(store_directory):
+    blockchain = Blockchain(store=BlockStore(store_directory))
+    wallet = Wallet(blockchain)
+    blockchain.add_block([Transaction(wallet, 'recipient', 10).to_json()])
+    blockchain.add_block([Transaction(wallet, 'recipient', 15).to_json()])
+    blockchain.store.close()
+
+    restarted_blockchain = Blockchain(store=BlockStore(store_directory))
+
+    assert json.dumps(restarted_blockchain.to_json()) == \
+        json.dumps(blockchain.to_json())
+    assert restarted_blockchain.get_balance(wallet.address) == wallet.balance
+    Blockchain.is_valid_chain(restarted_blockchain.chain)
+
+def test_blockchain_store_follows_replaced_chain(store_directory):
+    blockchain = Blockchain(store=BlockStore(store_directory))
+    blockchain.add_block([Transaction(Wallet(), 'recipient', 1).to_json()])
+
+    fork = Blockchain()
+    for i in range(3):
+        fork.add_block([Transaction(Wallet(), 'recipient', i).to_json()])
+    blockchain.replace_chain(fork.chain)
+    blockchain.store.close()
+
+    restarted_blockchain = Blockchain(store=BlockStore(store_directory))
+
+    assert [block.hash for block in restarted_blockchain.chain] == \
+        [block.hash for block in fork.chain]
@@ -0,0 +1,68 @@
+from backend.blockchain.block_template import BlockTemplate
+from backend.blockchain.blockchain import Blockchain
+from backend.wallet.transaction import Transaction
+from backend.wallet.transaction_pool import TransactionPool
+from backend.wallet.wallet import Wallet
+from backend.config import MINING_REWARD_INPUT
+
+def test_block_data():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool()
+    transaction = Transaction(Wallet(), 'recipient', 1)
+    transaction_pool.set_transaction(transaction)
+
+    data = BlockTemplate(blockchain, transaction_pool).block_data(Wallet())
+
+    assert data[0] == transaction.to_json()
+    assert data[-1]['input'] == MINING_REWARD_INPUT
+    blockchain.add_block(data)
+    Blockchain.is_valid_chain(blockchain.chain)
+
+def test_block_data_drops_uncovered_transactions():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool()
+    wallet = Wallet(blockchain)
+    blockchain.add_block([Transaction(wallet, 'recipient', 1).to_json()])
+    stale_transaction = Transaction(Wallet(), 'recipient', 1)
+    stale_transaction.input['amount'] = 1
+    transaction_pool.set_transaction(stale_transaction)
+
+    data = BlockTemplate(blockchain, transaction_pool).block_data(Wallet())
+
+    assert len(data) == 1
+
+def test_block_data_limits():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool()
+    transactions = [Transaction(Wallet(), 'recipient', i) for i in range(5)]
+    for transaction in transactions:
+        transaction_pool.set_transaction(transaction)
+
+    data = BlockTemplate(blockchain, transaction_pool, max_transactions=3)\
+        .block_data(Wallet())
+
+    assert data[:-1] == [transaction.to_json() for transaction in transactions[:2]]
+
+def test_block_data_follows_new_blocks():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool()
+    block_template = BlockTemplate(blockchain, transaction_pool)
+    wallet = Wallet(blockchain)
+    transaction_1 = Transaction(Wallet(), 'recipient', 1)
+    transaction_2 = Transaction(wallet, 'recipient', 2)
+    transaction_pool.set_transaction(transaction_1)
+    transaction_pool.set_transaction(transaction_2)
+
+    blockchain.add_block(block_template.block_data(Wallet()))
+    transaction_pool.clear_blockchain_transactions(blockchain)
+    transaction_3 = Transaction(Wallet(), 'recipient', 3)
+    transaction_pool.set_transaction(transaction_3)
+    # The wallet's next transaction spends its balance after the block
+    transaction_4 = Transaction(wallet, 'recipient', 4)
+    transaction_pool.set_transaction(transaction_4)
+
+    data = block_template.block_data(Wallet())
+
+    assert data[:-1] == [transaction_3.to_json(), transaction_4.to_json()]
+    blockchain.add_block(data)
+    Blockchain.is_valid_chain(blockchain.chain)
@@ -4,6 +4,7 @@ from backend.blockchain.blockchain import Blockchain
 from backend.blockchain.block import GENESIS_DATA
 from backend.wallet.wallet import Wallet
 from backend.wallet.transaction import Transaction
+from backend.config import STARTING_BALANCE
 
 def test_blockchain_instance():
     blockchain = Blockchain()
@@ -16,6 +17,13 @@ def test_add_block():
 
     assert blockchain.chain[-1].data == data
 
+def test_add_block_parallel_mining():
+    blockchain = Blockchain(mining_workers=2)
+    for i in range(3):
+        blockchain.add_block([Transaction(Wallet(), 'recipient', i).to_json()])
+
+    Blockchain.is_valid_chain(blockchain.chain)
+
 @pytest.fixture
 def blockchain_three_blocks():
     blockchain = Blockchain()
@@ -89,3 +97,121 @@ def test_is_valid_transaction_chain_bad_historic_balance(blockchain_three_blocks
 
     with pytest.raises(Exception, match='has an invalid input amount'):
         Blockchain.is_valid_transaction_chain(blockchain_three_blocks.chain)
+
+def test_is_valid_transaction_chain_carries_balances_forward():
+    blockchain = Blockchain()
+    wallet = Wallet(blockchain)
+    blockchain.add_block([Transaction(wallet, 'recipient', 10).to_json()])
+    blockchain.add_block([Transaction(wallet, 'recipient', 20).to_json()])
+
+    Blockchain.is_valid_transaction_chain(blockchain.chain)
+
+    stale_transaction = Transaction(Wallet(), 'recipient', 1)
+    stale_transaction.input['address'] = wallet.address
+    stale_transaction.input['amount'] = blockchain.chain[1].data[0]['input']['amount']
+    blockchain.add_block([stale_transaction.to_json()])
+
+    with pytest.raises(Exception, match='has an invalid input amount'):
+        Blockchain.is_valid_transaction_chain(blockchain.chain)
+
+def test_is_valid_chain_parallel_signatures(blockchain_three_blocks):
+    Blockchain.is_valid_chain(blockchain_three_blocks.chain, signature_workers=2)
+
+def test_is_valid_transaction_chain_bad_signature_names_transaction(
+    blockchain_three_blocks
+):
+    bad_transaction = Transaction(Wallet(), 'recipient', 1)
+    bad_transaction.input['signature'] = Wallet().sign(bad_transaction.output)
+    blockchain_three_blocks.add_block([bad_transaction.to_json()])
+
+    with pytest.raises(Exception, match=f'{bad_transaction.id} has an invalid signature'):
+        Blockchain.is_valid_transaction_chain(blockchain_three_blocks.chain)
+
+def test_append_block(blockchain_three_blocks):
+    blockchain = Blockchain()
+    blockchain.replace_chain(blockchain_three_blocks.chain[:2])
+    blockchain.append_block(blockchain_three_blocks.chain[2])
+
+    assert blockchain.chain == blockchain_three_blocks.chain[:3]
+
+def test_append_block_full_validation(blockchain_three_blocks):
+    blockchain = Blockchain()
+    blockchain.append_block(blockchain_three_blocks.chain[1], full_validation=True)
+
+    assert blockchain.chain == blockchain_three_blocks.chain[:2]
+
+def test_append_block_bad_last_hash(blockchain_three_blocks):
+    blockchain = Blockchain()
+
+    with pytest.raises(Exception, match='last_hash must be correct'):
+        blockchain.append_block(blockchain_three_blocks.chain[2])
+
+def test_append_block_invalid_transaction_keeps_ledger(blockchain_three_blocks):
+    wallet = Wallet(blockchain_three_blocks)
+    transaction = Transaction(wallet, 'recipient', 10).to_json()
+    duplicate_block = Blockchain()
+    duplicate_block.chain = blockchain_three_blocks.chain[:]
+    duplicate_block.add_block([transaction, transaction])
+
+    with pytest.raises(Exception, match='is not unique'):
+        blockchain_three_blocks.append_block(duplicate_block.chain[-1])
+
+    assert len(blockchain_three_blocks.chain) == 4
+    assert wallet.balance == Wallet.calculate_balance(
+        Blockchain.from_json(blockchain_three_blocks.to_json()),
+        wallet.address
+    )
+
+def test_replace_chain_with_fork(blockchain_three_blocks):
+    wallet = Wallet(blockchain_three_blocks)
+    blockchain_three_blocks.add_block(
+        [Transaction(wallet, 'recipient', 10).to_json()]
+    )
+
+    fork = Blockchain()
+    fork.chain = blockchain_three_blocks.chain[:2]
+    fork_wallet = Wallet(fork)
+    for amount in [20, 30, 40, 50]:
+        fork.add_block([Transaction(fork_wallet, wallet.address, amount).to_json()])
+
+    assert blockchain_three_blocks.common_ancestor(fork.chain) == 1
+
+    blockchain_three_blocks.replace_chain(fork.chain)
+
+    assert blockchain_three_blocks.chain == fork.chain
+    assert wallet.balance == STARTING_BALANCE + 20 + 30 + 40 + 50
+    assert blockchain_three_blocks.ledger.height == len(fork.chain)
+
+def test_replace_chain_invalid_fork_keeps_chain(blockchain_three_blocks):
+    chain = blockchain_three_blocks.chain[:]
+    wallet = Wallet(blockchain_three_blocks)
+    balance = wallet.balance
+
+    fork = Blockchain()
+    fork.chain = blockchain_three_blocks.chain[:2]
+    for amount in [20, 30, 40]:
+        fork.add_block([Transaction(Wallet(), wallet.address, amount).to_json()])
+    fork.chain[3].hash = 'evil_hash'
+
+    with pytest.raises(Exception, match='The incoming chain is invalid'):
+        blockchain_three_blocks.replace_chain(fork.chain)
+
+    assert blockchain_three_blocks.chain == chain
+    assert wallet.balance == balance
+
+def test_transaction_proof():
+    blockchain = Blockchain()
+    transactions = [Transaction(Wallet(), 'recipient', i).to_json() for i in range(5)]
+    blockchain.add_block(transactions[:2])
+    blockchain.add_block(transactions[2:])
+
+    for height, transaction in [(1, transactions[1]), (2, transactions[3])]:
+        proof = blockchain.transaction_proof(transaction['id'])
+
+        assert proof['height'] == height
+        assert proof['merkle_root'] == blockchain.chain[height].merkle_root
+        assert Blockchain.verify_transaction_proof(transaction, proof)
+        assert not Blockchain.verify_transaction_proof(transactions[0], proof)
+
+def test_transaction_proof_unknown_transaction():
+    assert Blockchain().transaction_proof('unknown') is None
@@ -0,0 +1,106 @@
+import pytest
+
+from backend.blockchain.block import Block
+from backend.blockchain.blockchain import Blockchain
+from backend.blockchain.chain_sync import (
+    ChainSync,
+    LocalPeer,
+    block_locator,
+    locate_ancestor
+)
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+def transaction_blockchain(length):
+    blockchain = Blockchain()
+    for i in range(length - 1):
+        blockchain.add_block([Transaction(Wallet(), 'recipient', i).to_json()])
+
+    return blockchain
+
+def copy_blockchain(blockchain, length):
+    copy = Blockchain()
+    copy.replace_chain(blockchain.chain[:length])
+
+    return copy
+
+class FailingPeer(LocalPeer):
+    def blocks(self, start, end):
+        raise Exception('connection reset')
+
+def test_block_locator():
+    chain = [
+        Block(height, f'{height - 1}', f'{height}', [], 1, 0)
+        for height in range(1000)
+    ]
+    locator = block_locator(chain)
+
+    assert [height for height, _ in locator[:10]] == list(range(999, 989, -1))
+    assert locator[-1] == [0, '0']
+    assert len(locator) < 20
+
+def test_locate_ancestor():
+    blockchain = transaction_blockchain(8)
+    fork = copy_blockchain(blockchain, 5)
+    fork.add_block([Transaction(Wallet(), 'fork', 1).to_json()])
+
+    assert locate_ancestor(blockchain, block_locator(fork.chain)) == 4
+
+def test_sync_fresh_node():
+    blockchain = transaction_blockchain(12)
+    local_blockchain = Blockchain()
+
+    synced_blocks = ChainSync(
+        local_blockchain,
+        [LocalPeer(blockchain), LocalPeer(blockchain)],
+        range_size=3,
+        header_range_size=4,
+        workers=2
+    ).sync()
+
+    assert synced_blocks == 11
+    assert local_blockchain.chain == blockchain.chain
+
+def test_sync_only_missing_blocks():
+    blockchain = transaction_blockchain(8)
+    local_blockchain = copy_blockchain(blockchain, 6)
+
+    assert ChainSync(local_blockchain, [LocalPeer(blockchain)]).sync() == 2
+    assert local_blockchain.chain == blockchain.chain
+
+def test_sync_fork():
+    blockchain = transaction_blockchain(8)
+    local_blockchain = copy_blockchain(blockchain, 5)
+    local_blockchain.add_block([Transaction(Wallet(), 'fork', 1).to_json()])
+
+    assert ChainSync(local_blockchain, [LocalPeer(blockchain)], range_size=2)\
+        .sync() == 3
+    assert local_blockchain.chain == blockchain.chain
+
+def test_sync_shorter_peer():
+    blockchain = transaction_blockchain(4)
+    local_blockchain = copy_blockchain(blockchain, 4)
+
+    assert ChainSync(local_blockchain, [LocalPeer(Blockchain())]).sync() == 0
+
+def test_sync_retries_failed_ranges_with_best_peer():
+    blockchain = transaction_blockchain(6)
+    local_blockchain = Blockchain()
+    peers = [LocalPeer(blockchain), FailingPeer(blockchain)]
+
+    ChainSync(local_blockchain, peers, range_size=1).sync()
+
+    assert local_blockchain.chain == blockchain.chain
+
+def test_sync_bad_fork_keeps_local_chain():
+    blockchain = transaction_blockchain(8)
+    local_blockchain = copy_blockchain(blockchain, 5)
+    local_blockchain.add_block([Transaction(Wallet(), 'fork', 1).to_json()])
+    local_chain = list(local_blockchain.chain)
+    blockchain.chain[-1].data = []
+    blockchain.chain[-1].hash = 'corrupt'
+
+    with pytest.raises(Exception):
+        ChainSync(local_blockchain, [LocalPeer(blockchain)]).sync()
+
+    assert local_blockchain.chain == local_chain
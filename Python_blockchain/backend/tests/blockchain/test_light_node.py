@@ -0,0 +1,82 @@
+import pytest
+
+from backend.blockchain.blockchain import Blockchain
+from backend.blockchain.chain_sync import LocalPeer
+from backend.blockchain.light_node import LightNode
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+class TamperingPeer(LocalPeer):
+    def blocks(self, start, end):
+        blocks = super().blocks(start, end)
+        return [dict(block_json, data=[]) for block_json in blocks]
+
+class MalformedPeer(LocalPeer):
+    def blocks(self, start, end):
+        return [{'data': []} for _ in range(start, end)]
+
+class RootlessPeer(LocalPeer):
+    def headers(self, start, end):
+        headers = super().headers(start, end)
+        return [dict(header, merkle_root=None) for header in headers]
+
+@pytest.fixture
+def blockchain():
+    blockchain = Blockchain()
+    for i in range(5):
+        blockchain.add_block([Transaction(Wallet(), 'recipient', i).to_json()])
+
+    return blockchain
+
+def test_light_node_sync(blockchain):
+    light_node = LightNode([LocalPeer(blockchain)], header_range_size=2)
+
+    assert light_node.sync() == 5
+    assert light_node.tip.hash == blockchain.chain[-1].hash
+    assert light_node.sync() == 0
+
+    blockchain.add_block([])
+
+    assert light_node.sync() == 1
+    assert light_node.tip.hash == blockchain.chain[-1].hash
+
+def test_light_node_sync_refuses_headers_without_merkle_root(blockchain):
+    light_node = LightNode([RootlessPeer(blockchain)])
+
+    with pytest.raises(Exception, match='must have a merkle_root'):
+        light_node.sync()
+
+    assert len(light_node.header_chain) == 1
+
+def test_light_node_block(blockchain):
+    light_node = LightNode([TamperingPeer(blockchain), LocalPeer(blockchain)])
+    light_node.sync()
+
+    assert light_node.block(3) == blockchain.chain[3]
+    assert len(light_node.block_cache) == 1
+
+def test_light_node_block_skips_malformed_block(blockchain):
+    light_node = LightNode([MalformedPeer(blockchain), LocalPeer(blockchain)])
+    light_node.sync()
+
+    assert light_node.block(3) == blockchain.chain[3]
+
+def test_light_node_block_no_valid_peer(blockchain):
+    light_node = LightNode([TamperingPeer(blockchain)])
+    light_node.sync()
+
+    with pytest.raises(Exception, match='No peer served a valid block'):
+        light_node.block(3)
+
+def test_light_node_verify_transaction(blockchain):
+    light_node = LightNode([LocalPeer(blockchain)])
+    light_node.sync()
+    transaction_json = blockchain.chain[2].data[0]
+    proof = blockchain.transaction_proof(transaction_json['id'])
+
+    assert light_node.verify_transaction(transaction_json, proof)
+    assert not light_node.verify_transaction(dict(transaction_json, output={}), proof)
+    assert not light_node.verify_transaction(
+        transaction_json,
+        dict(proof, merkle_root=blockchain.chain[3].merkle_root)
+    )
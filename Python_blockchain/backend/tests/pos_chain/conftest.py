@@ -0,0 +1,12 @@
+import os
+import sys
+
+# POS_chain is a separate project with flat imports and no tests of its own,
+# so its directory is put on the path for the tests here.
+POS_CHAIN_DIRECTORY = os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', '..', '..', 'POS_chain'
+))
+
+if POS_CHAIN_DIRECTORY not in sys.path:
+    sys.path.append(POS_CHAIN_DIRECTORY)
@@ -0,0 +1,104 @@
+from Block import Block
+from BlockTemplate import BlockTemplate
+from Blockchain import Blockchain
+from Transaction import Transaction
+from TransactionPool import TransactionPool
+
+def fund(blockchain, account, amount):
+    last_block = blockchain.blocks[-1]
+    block = Block([Transaction('faucet', account, amount, 'TRANSFER')],
+                  last_block.hash(), 'forger', last_block.block_number + 1)
+    blockchain.add_block(block)
+    return block
+
+def add_transfers(transaction_pool, sender, amounts):
+    transactions = [Transaction(sender, 'receiver', amount, 'TRANSFER')
+                    for amount in amounts]
+    transaction_pool.add_transactions(transactions)
+    return transactions
+
+def test_transactions_cover_and_uncover():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool()
+    block_template = BlockTemplate(blockchain, transaction_pool)
+    fund(blockchain, 'sender', 10)
+    transactions = add_transfers(transaction_pool, 'sender', [6, 6])
+
+    assert block_template.transactions() == transactions[:1]
+    assert list(block_template.uncovered['sender'].values()) == \
+        transactions[1:]
+
+    fund(blockchain, 'sender', 5)
+
+    assert block_template.transactions() == transactions
+    assert block_template.uncovered == {}
+
+    fund(blockchain, 'sender', -10)
+
+    assert block_template.transactions() == []
+    assert list(block_template.uncovered['sender'].values()) == transactions
+
+def test_transactions_reset_on_reorg():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool()
+    block_template = BlockTemplate(blockchain, transaction_pool)
+    fund(blockchain, 'sender', 10)
+    transactions = add_transfers(transaction_pool, 'sender', [6])
+
+    assert block_template.transactions() == transactions
+
+    blockchain.blocks = blockchain.blocks[:1]
+    blockchain.account.update_balance('sender', -10)
+    fund(blockchain, 'other', 10)
+
+    assert block_template.transactions() == []
+    assert block_template.tip is blockchain.blocks[-1]
+    assert list(block_template.uncovered['sender'].values()) == transactions
+
+def test_transactions_drop_evicted_transactions():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool(max_count=2)
+    block_template = BlockTemplate(blockchain, transaction_pool)
+    fund(blockchain, 'sender', 10)
+    transactions = add_transfers(transaction_pool, 'sender', [1, 2])
+
+    assert block_template.transactions() == transactions
+
+    uncovered_transactions = add_transfers(transaction_pool, 'poor', [1])
+
+    assert block_template.transactions() == transactions[1:]
+    assert list(block_template.uncovered['poor'].values()) == \
+        uncovered_transactions
+
+    transactions += add_transfers(transaction_pool, 'sender', [3])
+    transactions += add_transfers(transaction_pool, 'sender', [4])
+
+    assert transaction_pool.evicted_count == 3
+    assert block_template.transactions() == transactions[2:]
+    assert block_template.uncovered == {}
+
+def test_removed_transactions_give_uncovered_ones_a_chance():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool()
+    block_template = BlockTemplate(blockchain, transaction_pool)
+    fund(blockchain, 'sender', 10)
+    transactions = add_transfers(transaction_pool, 'sender', [6, 6])
+
+    assert block_template.transactions() == transactions[:1]
+
+    transaction_pool.remove_from_pool(transactions[:1])
+
+    assert block_template.transactions() == transactions[1:]
+    assert block_template.uncovered == {}
+
+def test_transactions_size_cap():
+    blockchain = Blockchain()
+    transaction_pool = TransactionPool()
+    fund(blockchain, 'sender', 10)
+    transactions = add_transfers(transaction_pool, 'sender', [1, 2, 3])
+    size = transaction_pool.transaction_sizes[transactions[0].id]
+
+    assert BlockTemplate(blockchain, transaction_pool, max_transactions=2)\
+        .transactions() == transactions[:2]
+    assert BlockTemplate(blockchain, transaction_pool, max_bytes=size + 1)\
+        .transactions() == transactions[:1]
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import time
+
+import pytest
+
+from backend.blockchain import block_store
+from backend.utils.merkle import merkle_root, merkle_proof
+from backend.wallet import keystore
+
+# POS_chain keeps copies of some backend modules; these tests hold the copies
+# to the backend originals so the two cannot drift apart.
+from MerkleTree import MerkleTree
+from BinaryCodec import BinaryCodec
+import BlockStore
+import KeyStore
+from Block import Block
+from Transaction import Transaction
+from Wallet import Wallet
+from Blockchain import Blockchain
+from Utils import BlockchainUtils
+
+# Messages, block hashes and binary blocks written by earlier revisions of
+# POS_chain: before binary blocks, before Merkle roots and after them.
+LEGACY_ENCODINGS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'legacy_encodings.json')
+
+def legacy_encodings(era):
+    with open(LEGACY_ENCODINGS_PATH) as legacy_file:
+        return json.load(legacy_file)[era]
+
+@pytest.mark.parametrize('size', [0, 1, 2, 3, 5, 8, 13])
+def test_merkle_tree_matches_backend(size):
+    items = [{'id': str(index), 'amount': index} for index in range(size)]
+
+    assert MerkleTree.root(items) == merkle_root(items)
+    for index in range(size):
+        assert MerkleTree.proof(items, index) == merkle_proof(items, index)
+
+def store_files(directory):
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), 'rb') as store_file:
+            files[name] = store_file.read()
+
+    return files
+
+def test_block_store_matches_backend(tmp_path):
+    directories = [str(tmp_path / 'pos'), str(tmp_path / 'backend')]
+    stores = [
+        BlockStore.BlockStore(directories[0], segment_size=64),
+        block_store.BlockStore(directories[1], segment_size=64)
+    ]
+    for store in stores:
+        for height in range(10):
+            store.append(f'hash_{height}', b'x' * 30)
+        store.close()
+
+    assert store_files(directories[0]) == store_files(directories[1])
+
+    for directory in directories:
+        with open(os.path.join(directory, 'blocks.idx'), 'r+b') as index_file:
+            index_file.truncate(2 * block_store.INDEX_ENTRY.size)
+        with open(os.path.join(directory, 'blocks-00004.dat'), 'r+b') as segment_file:
+            segment_file.seek(-1, os.SEEK_END)
+            segment_file.write(b'y')
+    stores = [
+        BlockStore.BlockStore(directories[0], segment_size=64),
+        block_store.BlockStore(directories[1], segment_size=64)
+    ]
+    for store in stores:
+        store.close()
+
+    assert [len(store.entries) for store in stores] == [4, 4]
+    assert store_files(directories[0]) == store_files(directories[1])
+
+def generate_test_key_bytes():
+    return os.urandom(16)
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+@pytest.mark.parametrize('key_pool_class', [KeyStore.KeyPool, keystore.KeyPool])
+def test_key_pool_matches_backend(key_pool_class):
+    key_pool = key_pool_class(
+        size=2, workers=1, generate=generate_test_key_bytes, load=bytes.hex)
+    try:
+        assert wait_for(lambda: len(key_pool) == 2)
+
+        keys = [key_pool.take() for _ in range(3)]
+
+        assert len(set(keys)) == 3
+        assert all(len(key) == 32 for key in keys)
+        assert wait_for(lambda: len(key_pool) == 2)
+    finally:
+        key_pool.close()
+
+    assert len(key_pool.take()) == 32
+    assert len(key_pool) == 1
+    assert key_pool.pending == 0
+
+def test_key_pool_take():
+    key_pool = KeyStore.KeyPool(size=1, workers=1)
+    try:
+        key_pair = key_pool.take()
+    finally:
+        key_pool.close()
+
+    assert key_pair.has_private()
+
+def test_version_1_objects_keep_their_legacy_hash():
+    wallet = Wallet()
+    transaction = wallet.create_transaction('receiver', 5, 'TRANSFER')
+    transaction.version = 1
+    block = wallet.create_block([transaction], 'last_hash', 1)
+    block.version = 1
+
+    for signed, decode in [
+        (transaction, Transaction.from_bytes),
+        (block, Block.from_bytes)
+    ]:
+        payload = signed.payload()
+
+        assert 'signature_scheme' not in payload
+        assert signed.payload_hash().hexdigest() == \
+            hashlib.sha256(json.dumps(payload).encode('utf-8')).hexdigest()
+
+        decoded = decode(signed.to_bytes())
+
+        assert decoded.version == 1
+        assert decoded.payload_hash().hexdigest() == signed.payload_hash().hexdigest()
+
+@pytest.mark.parametrize('era, version', [
+    ('baseline', 0),
+    ('binary', 0),
+    ('merkle', 1)
+])
+def test_legacy_block_keeps_its_hash(era, version):
+    encodings = legacy_encodings(era)
+    block = BlockchainUtils.decode(encodings['block_message']).data
+
+    assert block.version == version
+    assert block.hash() == encodings['block_hash']
+    assert block.merkle_root == Block.transactions_root(block.transactions)
+    assert ('merkle_root' in block.to_json()) == (version > 0)
+    assert Wallet.signature_hash_valid(
+        block.payload_hash(), block.signature, block.forger, 'rsa')
+
+    repickled_block = BlockchainUtils.decode(BlockchainUtils.encode(block))
+
+    assert repickled_block.version == version
+    assert repickled_block.hash() == block.hash()
+
+    decoded_block = Block.from_bytes(block.to_bytes())
+
+    assert decoded_block.version == version
+    assert decoded_block.hash() == block.hash()
+
+@pytest.mark.parametrize('era, version', [('binary', 0), ('merkle', 1)])
+def test_legacy_binary_block_keeps_its_hash(tmp_path, era, version):
+    encodings = legacy_encodings(era)
+    block_bytes = bytes.fromhex(encodings['block_bytes'])
+    block = Block.from_bytes(block_bytes, encodings['block_hash'])
+
+    assert block.version == version
+    assert block.hash() == encodings['block_hash']
+
+    store = BlockStore.BlockStore(str(tmp_path))
+    store.append(encodings['block_hash'], block_bytes)
+    blockchain = Blockchain(store)
+
+    assert blockchain.blocks[0].version == version
+    assert blockchain.latest_block_hash() == encodings['block_hash']
+    store.close()
+
+@pytest.mark.parametrize('value', [
+    None,
+    True,
+    -300,
+    2.5,
+    'TRANSFER',
+    'abcdef0123',
+    '-----BEGIN not a key',
+    [1, 'two', {'three': 3}]
+])
+def test_binary_codec_round_trip(value):
+    buffer = bytearray()
+    BinaryCodec.write_value(buffer, value)
+
+    assert BinaryCodec.read_value(bytes(buffer), 0) == (value, len(buffer))
+
+@pytest.mark.parametrize('scheme', ['rsa', 'ed25519'])
+def test_binary_round_trip(scheme):
+    wallet = Wallet(scheme=scheme)
+    receiver = Wallet(scheme=scheme).public_key_string()
+    transactions = [
+        wallet.create_transaction(receiver, amount, 'TRANSFER')
+        for amount in [1, 2.5]
+    ]
+    block = wallet.create_block(transactions, 'last_hash', 1)
+
+    for transaction in transactions:
+        decoded_transaction = Transaction.from_bytes(transaction.to_bytes())
+
+        assert decoded_transaction.to_json() == transaction.to_json()
+        assert BinaryCodec.pem_to_der(transaction.receiver_public_key) is not None
+
+    decoded_block = Block.from_bytes(block.to_bytes())
+
+    assert decoded_block.to_json() == block.to_json()
+    assert decoded_block.hash() == block.hash()
+    assert Wallet.signature_hash_valid(
+        decoded_block.payload_hash(),
+        decoded_block.signature,
+        decoded_block.forger,
+        decoded_block.signature_scheme
+    )
+
+class RecordingP2P:
+    def __init__(self):
+        self.socket_connector = None
+        self.broadcasts = []
+
+    def broadcast(self, message):
+        self.broadcasts.append(message)
+
+@pytest.mark.parametrize('era', ['baseline', 'binary', 'merkle'])
+def test_node_handles_legacy_transaction(era):
+    pytest.importorskip('p2pnetwork')
+    from Node import Node
+
+    message = BlockchainUtils.decode(
+        legacy_encodings(era)['transaction_message'])
+    transaction = message.data
+
+    assert transaction.version == 1
+    assert transaction.signature_scheme == 'rsa'
+    assert 'signature_scheme' not in transaction.to_json()
+
+    node = Node('127.0.0.1', 10001)
+    node.p2p = RecordingP2P()
+    node.handle_transaction(transaction)
+
+    assert node.transaction_pool.transaction_exists(transaction)
+    assert len(node.p2p.broadcasts) == 1
+
+def test_node_skips_verifying_known_transactions(monkeypatch):
+    pytest.importorskip('p2pnetwork')
+    from Node import Node
+
+    wallet = Wallet()
+    transaction = wallet.create_transaction('receiver', 5, 'TRANSFER')
+    node = Node('127.0.0.1', 10001)
+    node.p2p = RecordingP2P()
+    node.handle_transaction(transaction)
+
+    def signature_hash_valid(*args):
+        raise Exception('Known transactions must not be verified again')
+
+    monkeypatch.setattr(Wallet, 'signature_hash_valid', signature_hash_valid)
+    node.handle_transaction(transaction)
+
+    assert len(node.p2p.broadcasts) == 1
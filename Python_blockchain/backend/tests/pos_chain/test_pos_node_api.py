@@ -0,0 +1,78 @@
+import json
+import types
+
+import pytest
+
+from backend.config import API_RANGE_LIMIT
+
+import NodeAPI
+from Block import Block
+from Blockchain import Blockchain
+from Transaction import Transaction
+from TransactionPool import TransactionPool
+
+@pytest.fixture
+def blockchain():
+    blockchain = Blockchain()
+    for block_number in range(1, 4):
+        transactions = [
+            Transaction('sender', 'receiver', amount, 'TRANSFER')
+            for amount in range(block_number)
+        ]
+        blockchain.add_block(Block(
+            transactions, blockchain.latest_block_hash(), 'forger',
+            block_number))
+    return blockchain
+
+@pytest.fixture
+def client(blockchain):
+    node_api = NodeAPI.NodeAPI()
+    node_api.inject_node(types.SimpleNamespace(
+        blockchain=blockchain, transaction_pool=TransactionPool()))
+    NodeAPI.NodeAPI.register(node_api.app, route_base='/')
+
+    return node_api.app.test_client()
+
+def test_range_limit_matches_backend():
+    assert NodeAPI.API_RANGE_LIMIT == API_RANGE_LIMIT
+
+def test_blockchain_route_streams_the_chain(client, blockchain):
+    response = client.get('/blockchain')
+
+    assert response.is_streamed
+    assert json.loads(response.get_data()) == blockchain.to_json()
+    assert response.headers['ETag'] == f'"{blockchain.latest_block_hash()}"'
+    assert client.get(
+        '/blockchain',
+        headers={'If-None-Match': response.headers['ETag']}
+    ).status_code == 304
+
+def test_blockchain_length_route(client):
+    response = client.get('/blockchain/length')
+
+    assert response.get_json() == 4
+    assert client.get(
+        '/blockchain/length',
+        headers={'If-None-Match': response.headers['ETag']}
+    ).status_code == 304
+
+def test_blockchain_range_route(client, blockchain, monkeypatch):
+    blocks_json = blockchain.to_json()['blocks']
+
+    assert client.get('/blockchain/range?start=1&end=3').get_json() == \
+        blocks_json[1:3]
+    assert client.get('/blockchain/range?start=-5').get_json() == blocks_json
+
+    monkeypatch.setattr(NodeAPI, 'API_RANGE_LIMIT', 2)
+
+    assert client.get('/blockchain/range?start=1').get_json() == \
+        blocks_json[1:3]
+
+def test_transaction_proof_route(client, blockchain):
+    transaction = blockchain.blocks[3].transactions[1]
+
+    proof = client.get(f'/transaction/{transaction.id}/proof').get_json()
+
+    assert proof['height'] == 3
+    assert Blockchain.verify_transaction_proof(transaction.to_json(), proof)
+    assert client.get('/transaction/unknown/proof').status_code == 404
@@ -0,0 +1,74 @@
+from Transaction import Transaction
+from TransactionPool import TransactionPool
+
+def transfers(amounts):
+    return [Transaction('sender', 'receiver', amount, 'TRANSFER')
+            for amount in amounts]
+
+def test_add_transaction():
+    transaction_pool = TransactionPool()
+    transaction = transfers([1])[0]
+
+    assert transaction_pool.add_transaction(transaction)
+    assert not transaction_pool.add_transaction(transaction)
+    assert transaction_pool.transaction_exists(transaction)
+    assert list(transaction_pool.transactions) == [transaction]
+    assert transaction_pool.transaction_bytes == len(transaction.to_bytes())
+
+def test_add_transactions():
+    transaction_pool = TransactionPool()
+    transactions = transfers([1, 2, 3])
+    transaction_pool.add_transaction(transactions[0])
+
+    assert transaction_pool.add_transactions(transactions) == 2
+    assert list(transaction_pool.transactions) == transactions
+    assert [transaction for _, transaction in
+            transaction_pool.transactions_since(0)] == transactions[1:]
+
+def test_remove_from_pool():
+    transaction_pool = TransactionPool()
+    transactions = transfers([1, 2, 3])
+    transaction_pool.add_transactions(transactions)
+
+    transaction_pool.remove_from_pool(transactions[:2] + transfers([4]))
+
+    assert list(transaction_pool.transactions) == transactions[2:]
+    assert not transaction_pool.transaction_exists(transactions[0])
+    assert transaction_pool.transaction_bytes == \
+        len(transactions[2].to_bytes())
+    assert transaction_pool.metrics()['evicted_count'] == 0
+
+def test_eviction_at_max_count():
+    transaction_pool = TransactionPool(max_count=2)
+    transactions = transfers([1, 2, 3])
+
+    for transaction in transactions:
+        transaction_pool.add_transaction(transaction)
+
+    assert list(transaction_pool.transactions) == transactions[1:]
+    assert transaction_pool.evicted_count == 1
+    assert transaction_pool.evicted_bytes == len(transactions[0].to_bytes())
+
+def test_eviction_at_max_bytes():
+    transactions = transfers([1, 2, 3])
+    size = len(transactions[0].to_bytes())
+    transaction_pool = TransactionPool(max_bytes=2 * size)
+
+    assert transaction_pool.add_transactions(transactions) == 3
+    assert list(transaction_pool.transactions) == transactions[1:]
+    assert transaction_pool.metrics() == {
+        'transaction_count': 2,
+        'transaction_bytes': 2 * size,
+        'evicted_count': 1,
+        'evicted_bytes': size
+    }
+
+def test_eviction_by_amount():
+    transaction_pool = TransactionPool(max_count=2, priority='amount')
+    transactions = transfers([2, 1, 3])
+    transaction_pool.add_transactions(transactions)
+
+    assert list(transaction_pool.transactions) == \
+        [transactions[0], transactions[2]]
+    assert transaction_pool.best_transactions(1) == [transactions[2]]
+    assert transaction_pool.evicted_count == 1
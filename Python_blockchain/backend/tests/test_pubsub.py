@@ -0,0 +1,240 @@
+import asyncio
+import copy
+import json
+import socket
+import threading
+
+import pytest
+
+from backend.blockchain.blockchain import Blockchain
+from backend.pubsub import (
+    PubSub,
+    BrokerTransport,
+    Listener,
+    TransactionBatcher,
+    CHANNELS
+)
+from backend.pubsub_broker import PubSubBroker, FRAME_HEADER, encode_frame
+from backend.wallet.transaction import Transaction
+from backend.wallet.transaction_pool import TransactionPool
+from backend.wallet.wallet import Wallet
+
+@pytest.fixture
+def broker_port():
+    loop = asyncio.new_event_loop()
+    broker = PubSubBroker(port=0)
+    port = loop.run_until_complete(broker.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    yield port
+
+    asyncio.run_coroutine_threadsafe(broker.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+class RecordingListener:
+    def __init__(self, expected):
+        self.messages = []
+        self.expected = expected
+        self.received = threading.Event()
+
+    def handle(self, channel, message):
+        self.messages.append((channel, message))
+        if len(self.messages) == self.expected:
+            self.received.set()
+
+def test_broker_delivers_to_subscribers(broker_port):
+    listener = RecordingListener(2)
+    subscriber = BrokerTransport(port=broker_port)
+    subscriber.subscribe(['TEST', 'BLOCK'], listener)
+    publisher = BrokerTransport(port=broker_port)
+    publisher.subscribe(['TEST'], RecordingListener(0))
+
+    # The first message waits until the subscription has reached the broker
+    while not listener.messages:
+        publisher.publish('TEST', {'foo': 'bar'})
+        listener.received.wait(0.05)
+    publisher.publish('TRANSACTION', {'ignored': True})
+    publisher.publish('BLOCK', {'height': 1})
+
+    assert listener.received.wait(5)
+    assert listener.messages[-1] == ('BLOCK', {'height': 1})
+    assert all(channel != 'TRANSACTION' for channel, _ in listener.messages)
+
+    subscriber.close()
+    publisher.close()
+
+def test_broker_transport_reconnects_after_bad_frame():
+    loop = asyncio.new_event_loop()
+    connections = []
+    reconnected = threading.Event()
+
+    async def serve(reader, writer):
+        connections.append(writer)
+        if len(connections) == 1:
+            writer.write(FRAME_HEADER.pack(2 ** 31))
+        else:
+            reconnected.set()
+
+    server = loop.run_until_complete(asyncio.start_server(serve, '127.0.0.1', 0))
+    port = server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    transport = BrokerTransport(port=port, reconnect_delay=0.01)
+
+    assert reconnected.wait(5)
+
+    transport.close()
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+def test_broker_transport_bounds_pending_frames():
+    with socket.socket() as unused_socket:
+        unused_socket.bind(('127.0.0.1', 0))
+        port = unused_socket.getsockname()[1]
+
+    transport = BrokerTransport(
+        port=port,
+        reconnect_delay=60,
+        max_pending_frames=2
+    )
+    for index in range(5):
+        transport.publish('BLOCK', {'height': index})
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), transport.loop).result()
+
+    assert transport.dropped_frames == 3
+    assert list(transport.pending_frames) == [
+        encode_frame({
+            'type': 'publish',
+            'channel': 'BLOCK',
+            'message': {'height': index}
+        })
+        for index in [3, 4]
+    ]
+
+    transport.close()
+
+def test_pubsub_broadcast_transaction_over_broker(broker_port):
+    transaction_pool = TransactionPool()
+    pubsub = PubSub(
+        Blockchain(),
+        transaction_pool,
+        transport=BrokerTransport(port=broker_port)
+    )
+    transaction = Transaction(Wallet(), 'recipient', 1)
+
+    for _ in range(100):
+        pubsub.broadcast_transaction(transaction)
+        if transaction.id in transaction_pool.transaction_map:
+            break
+        threading.Event().wait(0.05)
+
+    assert json.dumps(transaction_pool.transaction_map[transaction.id].to_json()) \
+        == json.dumps(transaction.to_json())
+
+    pubsub.close()
+
+def test_listener_handle_transaction():
+    transaction_pool = TransactionPool()
+    transaction = Transaction(Wallet(), 'recipient', 1)
+
+    Listener(Blockchain(), transaction_pool).handle(
+        CHANNELS['TRANSACTION'],
+        transaction.to_json()
+    )
+
+    assert transaction.id in transaction_pool.transaction_map
+
+def test_transaction_batcher_flushes_on_size():
+    batches = []
+    batcher = TransactionBatcher(batches.append, max_size=2, max_delay=60)
+    transactions = [Transaction(Wallet(), 'recipient', i) for i in range(3)]
+    for transaction in transactions:
+        batcher.add(transaction.to_json())
+
+    assert batches == [[transaction.to_json() for transaction in transactions[:2]]]
+
+    batcher.flush()
+
+    assert batches[-1] == [transactions[2].to_json()]
+
+def test_transaction_batcher_flushes_on_bytes():
+    batches = []
+    transaction = Transaction(Wallet(), 'recipient', 1)
+    batcher = TransactionBatcher(
+        batches.append,
+        max_bytes=len(json.dumps(transaction.to_json())) + 1,
+        max_delay=60
+    )
+    batcher.add(transaction.to_json())
+    batcher.add(Transaction(Wallet(), 'recipient', 1).to_json())
+
+    assert batches == [[transaction.to_json()]]
+    batcher.flush()
+
+def test_transaction_batcher_flushes_after_delay():
+    published = threading.Event()
+    batches = []
+
+    def publish(batch):
+        batches.append(batch)
+        published.set()
+
+    batcher = TransactionBatcher(publish, max_delay=0.01)
+    transaction = Transaction(Wallet(), 'recipient', 1)
+    batcher.add(transaction.to_json())
+
+    assert published.wait(5)
+    assert batches == [[transaction.to_json()]]
+
+def test_transaction_batcher_coalesces_updates():
+    batches = []
+    batcher = TransactionBatcher(batches.append, max_delay=60)
+    sender_wallet = Wallet()
+    transaction = Transaction(sender_wallet, 'recipient', 1)
+    batcher.add(dict(transaction.to_json()))
+    transaction.update(sender_wallet, 'next-recipient', 2)
+    batcher.add(transaction.to_json())
+    batcher.flush()
+
+    assert batches == [[transaction.to_json()]]
+
+def test_transaction_batcher_copies_transactions():
+    batches = []
+    batcher = TransactionBatcher(batches.append, max_delay=60)
+    sender_wallet = Wallet()
+    transaction = Transaction(sender_wallet, 'recipient', 1)
+    added_json = copy.deepcopy(transaction.to_json())
+    batcher.add(transaction.to_json())
+    transaction.update(sender_wallet, 'next-recipient', 2)
+    batcher.flush()
+
+    assert batches == [[added_json]]
+
+def test_listener_handle_transaction_batch():
+    transaction_pool = TransactionPool()
+    transactions = [Transaction(Wallet(), 'recipient', i) for i in range(3)]
+
+    Listener(Blockchain(), transaction_pool).handle(
+        CHANNELS['TRANSACTION'],
+        [transaction.to_json() for transaction in transactions]
+    )
+
+    assert transaction_pool.transaction_count == 3
+
+def test_listener_handle_transaction_batch_skips_bad_entries():
+    transaction_pool = TransactionPool()
+    transactions = [Transaction(Wallet(), 'recipient', i) for i in range(3)]
+    transaction_jsons = [transaction.to_json() for transaction in transactions]
+
+    Listener(Blockchain(), transaction_pool).handle(
+        CHANNELS['TRANSACTION'],
+        transaction_jsons[:1] + [{'id': 'bad'}] + transaction_jsons[1:]
+    )
+
+    assert transaction_pool.transaction_count == 3
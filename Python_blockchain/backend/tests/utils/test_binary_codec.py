@@ -0,0 +1,47 @@
+import pytest
+
+from backend.utils.binary_codec import (
+    write_varint,
+    read_varint,
+    write_value,
+    read_value
+)
+
+def test_varint_round_trip():
+    for number in [0, 1, 127, 128, 300, 2 ** 64 + 5]:
+        buffer = bytearray()
+        write_varint(buffer, number)
+
+        assert read_varint(buffer, 0) == (number, len(buffer))
+
+def test_value_round_trip():
+    values = [
+        None, True, False, 0, -1, 42, -2 ** 70, 25.5, 'foo', '', 'abc',
+        'deadbeef', 'DEADBEEF', [1, 'two', [3.0]], {'a': 1, 'b': {'c': None}}
+    ]
+
+    for value in values:
+        buffer = bytearray()
+        write_value(buffer, value)
+        decoded_value, offset = read_value(buffer, 0)
+
+        assert decoded_value == value
+        assert type(decoded_value) == type(value)
+        assert offset == len(buffer)
+
+def test_value_tuple_becomes_list():
+    buffer = bytearray()
+    write_value(buffer, (1, 2))
+
+    assert read_value(buffer, 0)[0] == [1, 2]
+
+def test_hex_string_is_compact():
+    hash = 'ab' * 32
+    buffer = bytearray()
+    write_value(buffer, hash)
+
+    assert len(buffer) == 34
+
+def test_value_unknown_type():
+    with pytest.raises(Exception, match='Cannot encode value of type set'):
+        write_value(bytearray(), {1})
@@ -1,7 +1,23 @@
-from backend.utils.crypto_hash import crypto_hash
+from backend.utils.crypto_hash import crypto_hash, CryptoHashTemplate
 
 def test_crypto_hash():
     # It should create the same hash with arguments of different data types
     # in any order.
     assert crypto_hash(1, [2], 'three') == crypto_hash('three', 1, [2])
     assert crypto_hash('foo') == 'b2213295d564916f89a6a42455567c87c3f480fcd7a1c15e220f17d7169a790b'
+
+def test_crypto_hash_template():
+    # It should create the same hash as crypto_hash for every kind of fixed
+    # data, whether it sorts before or after the changing numbers.
+    for data in ['foo', [{'id': 'a1'}, 2], {'bar': 1}, 5, None, -3, 1.5]:
+        template = CryptoHashTemplate('last_hash', data)
+
+        for timestamp, difficulty, nonce in [(1, 3, 0), (1638000000, 12, 999)]:
+            assert template.hash(timestamp, difficulty, nonce) == \
+                crypto_hash(timestamp, 'last_hash', data, difficulty, nonce)
+
+def test_crypto_hash_template_changing_string_argument():
+    template = CryptoHashTemplate('foo', [3])
+
+    assert template.hash('bar') == crypto_hash('foo', [3], 'bar')
+    assert template.hash('zzz') == crypto_hash('foo', [3], 'zzz')
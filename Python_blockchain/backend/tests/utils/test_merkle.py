@@ -0,0 +1,35 @@
+import pytest
+
+from backend.utils.merkle import (
+    EMPTY_ROOT,
+    merkle_root,
+    merkle_proof,
+    verify_merkle_proof
+)
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 8, 13])
+def test_merkle_proofs(size):
+    items = [{'id': str(index)} for index in range(size)]
+    root = merkle_root(items)
+
+    for index, item in enumerate(items):
+        proof = merkle_proof(items, index)
+
+        assert verify_merkle_proof(item, proof, root)
+        assert len(proof) <= size.bit_length()
+
+def test_merkle_proof_rejects_other_items():
+    items = [{'id': str(index)} for index in range(5)]
+    root = merkle_root(items)
+
+    assert not verify_merkle_proof({'id': 'other'}, merkle_proof(items, 2), root)
+    assert not verify_merkle_proof(items[1], merkle_proof(items, 2), root)
+
+def test_merkle_root_depends_on_order():
+    assert merkle_root([1, 2]) != merkle_root([2, 1])
+
+def test_merkle_root_ignores_key_order():
+    assert merkle_root([{'a': 1, 'b': 2}]) == merkle_root([{'b': 2, 'a': 1}])
+
+def test_empty_merkle_root():
+    assert merkle_root([]) == EMPTY_ROOT
@@ -0,0 +1,65 @@
+from backend.utils.crypto_hash import crypto_hash
+from backend.utils.hex_to_binary import hex_to_binary
+from backend.utils.proof_of_work import (
+    difficulty_to_target,
+    target_to_difficulty,
+    target_to_bits,
+    bits_to_target,
+    leading_zero_bits,
+    digest_meets_target,
+    hash_meets_difficulty,
+    TARGET_CACHE_SIZE
+)
+
+def test_difficulty_to_target():
+    assert difficulty_to_target(1) == 2 ** 255
+    assert difficulty_to_target(3) == 2 ** 253
+    assert difficulty_to_target(0) == 2 ** 256
+
+def test_fractional_difficulty_to_target():
+    target = difficulty_to_target(3.5)
+
+    assert difficulty_to_target(4) < target < difficulty_to_target(3)
+    assert abs(target_to_difficulty(target) - 3.5) < 1e-9
+
+def test_target_bits_round_trip():
+    for difficulty in [1, 3, 8, 20, 3.5]:
+        target = difficulty_to_target(difficulty)
+        bits = target_to_bits(target)
+
+        assert bits < 2 ** 32
+        assert bits_to_target(target_to_bits(bits_to_target(bits))) == \
+            bits_to_target(bits)
+        # The compact form keeps the three most significant bytes.
+        assert abs(bits_to_target(bits) - target) < target / 2 ** 15
+
+def test_bitcoin_genesis_bits():
+    assert bits_to_target(0x1d00ffff) == 0xffff * 2 ** 208
+    assert target_to_bits(0xffff * 2 ** 208) == 0x1d00ffff
+
+def test_leading_zero_bits_matches_hex_to_binary():
+    for data in range(50):
+        hash = crypto_hash(data)
+        binary_hash = hex_to_binary(hash)
+
+        assert leading_zero_bits(hash) == \
+            len(binary_hash) - len(binary_hash.lstrip('0'))
+
+def test_hash_meets_difficulty():
+    assert hash_meets_difficulty('0' * 3 + 'f' * 61, 12)
+    assert not hash_meets_difficulty('0' * 3 + 'f' * 61, 13)
+    assert hash_meets_difficulty('0000000000111abc', 10)
+    assert not hash_meets_difficulty('fff', 3)
+    assert not hash_meets_difficulty('evil_hash', 3)
+
+def test_digest_meets_target():
+    digest = bytes.fromhex('00' + 'ff' * 31)
+
+    assert digest_meets_target(digest, difficulty_to_target(8))
+    assert not digest_meets_target(digest, difficulty_to_target(9))
+
+def test_difficulty_to_target_cache_is_bounded():
+    for step in range(TARGET_CACHE_SIZE * 2):
+        difficulty_to_target(1 + step / 100)
+
+    assert difficulty_to_target.cache_info().currsize <= TARGET_CACHE_SIZE
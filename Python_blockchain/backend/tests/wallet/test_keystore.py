@@ -0,0 +1,62 @@
+import os
+import time
+
+import pytest
+
+from backend.wallet.keystore import KeyPool
+from backend.wallet.wallet import Wallet
+
+def test_save_and_load_wallet(tmp_path):
+    path = str(tmp_path / 'wallet.json')
+    wallet = Wallet()
+    wallet.save(path)
+    loaded_wallet = Wallet.load(path)
+
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert loaded_wallet.address == wallet.address
+    assert loaded_wallet.public_key == wallet.public_key
+
+    data = { 'foo': 'test_data' }
+    assert Wallet.verify(wallet.public_key, data, loaded_wallet.sign(data))
+
+def test_save_and_load_wallet_with_password(tmp_path):
+    path = str(tmp_path / 'wallet.json')
+    wallet = Wallet()
+    wallet.save(path, 'secret')
+
+    assert 'ENCRYPTED' in open(path).read()
+    assert Wallet.load(path, password='secret').public_key == wallet.public_key
+
+    with pytest.raises(Exception):
+        Wallet.load(path, password='wrong')
+
+def test_load_or_create(tmp_path):
+    path = str(tmp_path / 'wallet.json')
+    wallet = Wallet.load_or_create(path)
+
+    assert Wallet.load_or_create(path).address == wallet.address
+
+def test_key_pool():
+    key_pool = KeyPool(size=2, workers=1)
+    try:
+        keys = [key_pool.take() for _ in range(4)]
+        wallet_key = key_pool.take()
+    finally:
+        key_pool.close()
+
+    public_keys = {Wallet(private_key=key).public_key for key in keys + [wallet_key]}
+    assert len(public_keys) == 5
+
+def test_wallet_takes_key_from_pool():
+    key_pool = KeyPool(size=1, workers=1)
+    Wallet.key_pool = key_pool
+    try:
+        deadline = time.time() + 10
+        while not len(key_pool) and time.time() < deadline:
+            time.sleep(0.01)
+        pooled_key = key_pool.keys[0]
+
+        assert Wallet().private_key is pooled_key
+    finally:
+        Wallet.key_pool = None
+        key_pool.close()
@@ -0,0 +1,98 @@
+from backend.wallet.ledger import BalanceLedger
+from backend.wallet.wallet import Wallet
+from backend.wallet.transaction import Transaction
+from backend.blockchain.blockchain import Blockchain
+from backend.config import STARTING_BALANCE
+
+def scan_balance(blockchain, address):
+    """
+    The balance of the address computed by scanning every block of the chain.
+    """
+    balance = STARTING_BALANCE
+
+    for block in blockchain.chain:
+        for transaction in block.data:
+            if transaction['input']['address'] == address:
+                balance = transaction['output'][address]
+            elif address in transaction['output']:
+                balance += transaction['output'][address]
+
+    return balance
+
+def test_ledger_starting_balance():
+    assert BalanceLedger().get_balance('address') == STARTING_BALANCE
+
+def test_ledger_matches_chain_scan():
+    blockchain = Blockchain()
+    sender = Wallet(blockchain)
+    recipient = Wallet(blockchain)
+    miner = Wallet(blockchain)
+
+    blockchain.add_block([
+        Transaction(sender, recipient.address, 50).to_json(),
+        Transaction.reward_transaction(miner).to_json()
+    ])
+    blockchain.add_block([
+        Transaction(recipient, sender.address, 20).to_json(),
+        Transaction(Wallet(), recipient.address, 5).to_json()
+    ])
+
+    for wallet in [sender, recipient, miner]:
+        assert blockchain.get_balance(wallet.address) == \
+            scan_balance(blockchain, wallet.address)
+        assert wallet.balance == scan_balance(blockchain, wallet.address)
+
+def test_ledger_ignores_non_transaction_data():
+    blockchain = Blockchain()
+    blockchain.add_block('test-data')
+
+    assert blockchain.get_balance('address') == STARTING_BALANCE
+    assert blockchain.ledger.height == len(blockchain.chain)
+
+def test_ledger_follows_replaced_chain():
+    blockchain = Blockchain()
+    wallet = Wallet()
+    longer_blockchain = Blockchain()
+    longer_blockchain.add_block([Transaction(wallet, 'recipient', 10).to_json()])
+    longer_blockchain.add_block([Transaction(Wallet(), wallet.address, 5).to_json()])
+
+    assert blockchain.get_balance(wallet.address) == STARTING_BALANCE
+
+    blockchain.replace_chain(longer_blockchain.chain)
+
+    assert blockchain.get_balance(wallet.address) == STARTING_BALANCE - 10 + 5
+
+def test_ledger_rebuilds_when_chain_is_set():
+    blockchain = Blockchain()
+    wallet = Wallet()
+    blockchain.add_block([Transaction(wallet, 'recipient', 10).to_json()])
+
+    assert blockchain.get_balance(wallet.address) == STARTING_BALANCE - 10
+
+    blockchain.chain = blockchain.chain[:1]
+
+    assert blockchain.get_balance(wallet.address) == STARTING_BALANCE
+
+def test_ledger_revert_to():
+    blockchain = Blockchain()
+    wallet = Wallet(blockchain)
+    blockchain.add_block([Transaction(wallet, 'recipient', 10).to_json()])
+    transaction = Transaction(wallet, 'recipient', 20).to_json()
+    blockchain.add_block([transaction])
+
+    ledger = BalanceLedger()
+    ledger.sync(blockchain.chain)
+    assert ledger.get_balance('recipient') == STARTING_BALANCE + 30
+    assert transaction['id'] in ledger.transaction_ids
+
+    ledger.revert_to(2)
+
+    assert ledger.height == 2
+    assert ledger.get_balance(wallet.address) == STARTING_BALANCE - 10
+    assert ledger.get_balance('recipient') == STARTING_BALANCE + 10
+    assert transaction['id'] not in ledger.transaction_ids
+
+    ledger.revert_to(0)
+
+    assert ledger.balances == {}
+    assert ledger.transaction_ids == set()
@@ -0,0 +1,46 @@
+import pytest
+
+from backend.wallet.signature_batch import first_invalid_signature, verify_signatures
+from backend.wallet.transaction import Transaction
+from backend.wallet.wallet import Wallet
+
+def signature_entry(transaction):
+    return (
+        transaction.id,
+        transaction.input['public_key'],
+        transaction.output,
+        transaction.input['signature']
+    )
+
+@pytest.fixture
+def signatures():
+    return [
+        signature_entry(Transaction(Wallet(), 'recipient', i)) for i in range(6)
+    ]
+
+@pytest.fixture
+def bad_transaction():
+    transaction = Transaction(Wallet(), 'recipient', 1)
+    transaction.input['signature'] = Wallet().sign(transaction.output)
+    return transaction
+
+def test_first_invalid_signature(signatures, bad_transaction):
+    assert first_invalid_signature(signatures) is None
+    assert first_invalid_signature(
+        signatures + [signature_entry(bad_transaction)]
+    ) == bad_transaction.id
+
+def test_verify_signatures(signatures):
+    verify_signatures(signatures)
+
+def test_verify_signatures_parallel(signatures):
+    verify_signatures(signatures, workers=2, batch_size=2)
+
+def test_verify_signatures_parallel_invalid_signature(signatures, bad_transaction):
+    signatures.insert(3, signature_entry(bad_transaction))
+
+    with pytest.raises(
+        Exception,
+        match=f'Transaction {bad_transaction.id} has an invalid signature'
+    ):
+        verify_signatures(signatures, workers=2, batch_size=2)
@@ -0,0 +1,30 @@
+from backend.wallet.signature_cache import SignatureCache
+
+def test_signature_cache_hits_and_misses():
+    cache = SignatureCache(10)
+    key = SignatureCache.key('public_key', b'data', (1, 2))
+
+    assert cache.get(key) is None
+    cache.set(key, True)
+    assert cache.get(key) is True
+
+    assert cache.info() == {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 10}
+
+def test_signature_cache_key():
+    key = SignatureCache.key('public_key', b'data', (1, 2))
+
+    assert key == SignatureCache.key('public_key', b'data', [1, 2])
+    assert key != SignatureCache.key('public_key', b'data', (2, 1))
+    assert key != SignatureCache.key('other_public_key', b'data', (1, 2))
+    assert key != SignatureCache.key('public_key', b'other_data', (1, 2))
+
+def test_signature_cache_evicts_least_recently_used():
+    cache = SignatureCache(2)
+    cache.set('a', True)
+    cache.set('b', True)
+    cache.get('a')
+    cache.set('c', False)
+
+    assert cache.get('a') is True
+    assert cache.get('b') is None
+    assert cache.get('c') is False
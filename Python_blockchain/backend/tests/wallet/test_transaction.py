@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from backend.wallet.transaction import Transaction
@@ -24,6 +26,15 @@ def test_transaction():
         transaction.input['signature']
     )
 
+def test_transaction_to_json_is_a_new_dict():
+    transaction = Transaction(Wallet(), 'recipient', 50)
+    transaction_json = transaction.to_json()
+    transaction_json['id'] = 'evil_id'
+
+    assert transaction.id != 'evil_id'
+    assert list(transaction.to_json()) == ['id', 'output', 'input']
+    assert not hasattr(transaction, '__dict__')
+
 def test_transaction_exceeds_balance():
     with pytest.raises(Exception, match='Amount exceeds wallet balance'):
         Transaction(Wallet(), 'recipient', 9001)
@@ -118,3 +129,32 @@ def test_invalid_reward_transaction_invalid_amount():
 
     with pytest.raises(Exception, match='Invalid mining reward'):
         Transaction.is_valid_transaction(reward_transaction)
+
+def test_transaction_bytes_round_trip():
+    transaction = Transaction(Wallet(), 'recipient', 50)
+    transaction_bytes = transaction.to_bytes()
+    restored_transaction = Transaction.from_bytes(transaction_bytes)
+
+    assert json.dumps(restored_transaction.to_json()) == \
+        json.dumps(transaction.to_json())
+    assert len(transaction_bytes) < len(json.dumps(transaction.to_json())) / 2
+    Transaction.is_valid_transaction(restored_transaction)
+
+def test_reward_transaction_bytes_round_trip():
+    transaction = Transaction.reward_transaction(Wallet())
+    restored_transaction = Transaction.from_bytes(transaction.to_bytes())
+
+    assert restored_transaction.to_json() == transaction.to_json()
+
+def test_transaction_bytes_round_trip_unusual_input():
+    transaction = Transaction(Wallet(), 'recipient', 50)
+    transaction.input = {'address': 'sender', 'public_key': 'not a key'}
+    restored_transaction = Transaction.from_bytes(transaction.to_bytes())
+
+    assert restored_transaction.to_json() == transaction.to_json()
+
+def test_transaction_bytes_unsupported_version():
+    transaction_bytes = Transaction(Wallet(), 'recipient', 50).to_bytes()
+
+    with pytest.raises(Exception, match='Unsupported transaction format version'):
+        Transaction.from_bytes(b'\x09' + transaction_bytes[1:])
@@ -35,3 +35,142 @@ def test_clear_blockchain_transactions():
 
     assert not transaction_1.id in transaction_pool.transaction_map
     assert not transaction_2.id in transaction_pool.transaction_map
+
+def test_existing_transaction():
+    transaction_pool = TransactionPool()
+    wallet = Wallet()
+    transaction = Transaction(wallet, 'recipient', 1)
+    transaction_pool.set_transaction(transaction)
+
+    assert transaction_pool.existing_transaction(wallet.address) == transaction
+    assert transaction_pool.existing_transaction('unknown') is None
+
+def test_transaction_counters():
+    transaction_pool = TransactionPool()
+    wallet = Wallet()
+    transaction = Transaction(wallet, 'recipient', 1)
+    transaction_pool.set_transaction(transaction)
+
+    assert transaction_pool.transaction_count == 1
+    assert transaction_pool.transaction_bytes == len(transaction.to_bytes())
+
+    transaction.update(wallet, 'next_recipient', 2)
+    transaction_pool.set_transaction(transaction)
+
+    assert transaction_pool.transaction_count == 1
+    assert transaction_pool.transaction_bytes == len(transaction.to_bytes())
+
+    transaction_pool.remove_transaction(transaction.id)
+
+    assert transaction_pool.transaction_count == 0
+    assert transaction_pool.transaction_bytes == 0
+    assert transaction_pool.existing_transaction(wallet.address) is None
+
+def test_clear_blockchain_transactions_only_new_blocks():
+    transaction_pool = TransactionPool()
+    blockchain = Blockchain()
+    transaction_1 = Transaction(Wallet(), 'recipient', 1)
+    blockchain.add_block([transaction_1.to_json()])
+    transaction_pool.clear_blockchain_transactions(blockchain)
+
+    # A transaction that is already in the chain but shows up again after
+    # the clear is found in the ledger, though its block is not looked at.
+    transaction_pool.set_transaction(transaction_1)
+    transaction_2 = Transaction(Wallet(), 'recipient', 2)
+    transaction_pool.set_transaction(transaction_2)
+    transaction_3 = Transaction(Wallet(), 'recipient', 3)
+    transaction_pool.set_transaction(transaction_3)
+    blockchain.add_block([transaction_2.to_json()])
+
+    transaction_pool.clear_blockchain_transactions(blockchain)
+
+    assert transaction_1.id not in transaction_pool.transaction_map
+    assert transaction_2.id not in transaction_pool.transaction_map
+    assert transaction_3.id in transaction_pool.transaction_map
+
+def test_clear_blockchain_transactions_after_replaced_chain():
+    transaction_pool = TransactionPool()
+    blockchain = Blockchain()
+    blockchain.add_block([Transaction(Wallet(), 'recipient', 1).to_json()])
+    transaction_pool.clear_blockchain_transactions(blockchain)
+
+    transaction = Transaction(Wallet(), 'recipient', 1)
+    transaction_pool.set_transaction(transaction)
+    fork = Blockchain()
+    fork.add_block([transaction.to_json()])
+    fork.add_block([Transaction(Wallet(), 'recipient', 1).to_json()])
+    blockchain.replace_chain(fork.chain)
+
+    transaction_pool.clear_blockchain_transactions(blockchain)
+
+    assert transaction.id not in transaction_pool.transaction_map
+
+def test_clear_blockchain_transactions_resumes_from_common_ancestor(monkeypatch):
+    transaction_pool = TransactionPool()
+    blockchain = Blockchain()
+    for i in range(3):
+        blockchain.add_block([Transaction(Wallet(), 'recipient', i).to_json()])
+    transaction_pool.clear_blockchain_transactions(blockchain)
+
+    transaction = Transaction(Wallet(), 'recipient', 1)
+    transaction_pool.set_transaction(transaction)
+    fork = Blockchain()
+    fork.chain = blockchain.chain[:3]
+    fork.add_block([transaction.to_json()])
+    fork.add_block([Transaction(Wallet(), 'recipient', 1).to_json()])
+    blockchain.replace_chain(fork.chain)
+
+    cleared_blocks = []
+    monkeypatch.setattr(
+        transaction_pool,
+        'clear_block_transactions',
+        cleared_blocks.extend
+    )
+    transaction_pool.clear_blockchain_transactions(blockchain)
+
+    assert cleared_blocks == blockchain.chain[3:]
+    assert transaction.id not in transaction_pool.transaction_map
+
+def test_evicts_oldest_over_count_limit():
+    transaction_pool = TransactionPool(max_count=2)
+    transactions = [Transaction(Wallet(), 'recipient', i) for i in range(3)]
+    for transaction in transactions:
+        transaction_pool.set_transaction(transaction)
+
+    assert transactions[0].id not in transaction_pool.transaction_map
+    assert transactions[1].id in transaction_pool.transaction_map
+    assert transactions[2].id in transaction_pool.transaction_map
+    assert transaction_pool.evicted_count == 1
+    assert transaction_pool.evicted_bytes == len(transactions[0].to_bytes())
+
+def test_evicts_over_byte_limit():
+    transaction = Transaction(Wallet(), 'recipient', 1)
+    transaction_pool = TransactionPool(max_bytes=2 * len(transaction.to_bytes()))
+    for _ in range(5):
+        transaction_pool.set_transaction(Transaction(Wallet(), 'recipient', 1))
+
+    assert transaction_pool.transaction_bytes <= transaction_pool.max_bytes
+    assert transaction_pool.metrics()['evicted_count'] == \
+        5 - transaction_pool.transaction_count
+
+def test_evicts_smallest_amount_first():
+    transaction_pool = TransactionPool(max_count=2, priority='amount')
+    large = Transaction(Wallet(), 'recipient', 50)
+    small = Transaction(Wallet(), 'recipient', 5)
+    medium = Transaction(Wallet(), 'recipient', 20)
+    for transaction in [large, small, medium]:
+        transaction_pool.set_transaction(transaction)
+
+    assert small.id not in transaction_pool.transaction_map
+    assert transaction_pool.best_transactions(5) == [large, medium]
+
+def test_best_transactions():
+    transaction_pool = TransactionPool()
+    transactions = [Transaction(Wallet(), 'recipient', i) for i in range(4)]
+    for transaction in transactions:
+        transaction_pool.set_transaction(transaction)
+    transaction_pool.remove_transaction(transactions[3].id)
+
+    assert transaction_pool.best_transactions(2) == \
+        [transactions[2], transactions[1]]
+    assert transaction_pool.best_transactions(10) == transactions[2::-1]
@@ -50,3 +50,18 @@ def test_calulate_balance():
 
     assert Wallet.calculate_balance(blockchain, wallet.address) == \
         STARTING_BALANCE - amount + received_amount_1 + received_amount_2
+
+def test_verify_caches_results():
+    data = { 'foo': 'test_data' }
+    wallet = Wallet()
+    signature = wallet.sign(data)
+
+    Wallet.verify(wallet.public_key, data, signature)
+    info = Wallet.verify_cache_info()
+    assert Wallet.verify(wallet.public_key, data, signature)
+    cached_info = Wallet.verify_cache_info()
+
+    assert cached_info['signatures']['hits'] == info['signatures']['hits'] + 1
+    assert cached_info['public_keys']['misses'] == info['public_keys']['misses']
+
+    assert not Wallet.verify(wallet.public_key, { 'foo': 'other_data' }, signature)
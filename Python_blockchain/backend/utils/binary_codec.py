@@ -0,0 +1,138 @@
+import re
+import struct
+import sys
+
+NONE_TAG = 0
+FALSE_TAG = 1
+TRUE_TAG = 2
+INT_TAG = 3
+FLOAT_TAG = 4
+STRING_TAG = 5
+HEX_STRING_TAG = 6
+LIST_TAG = 7
+DICT_TAG = 8
+
+FLOAT = struct.Struct('<d')
+HEX_STRING_PATTERN = re.compile('(?:[0-9a-f]{2})+')
+
+def write_varint(buffer, number):
+    """
+    Append an unsigned integer in LEB128 form: 7 bits per byte, with the high
+    bit set on every byte except the last.
+    """
+    while number >= 0x80:
+        buffer.append((number & 0x7f) | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+def read_varint(data, offset):
+    """
+    Read an unsigned LEB128 integer and return it with the offset after it.
+    """
+    number = 0
+    shift = 0
+
+    while True:
+        byte = data[offset]
+        offset += 1
+        number |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return number, offset
+        shift += 7
+
+def write_bytes(buffer, value):
+    write_varint(buffer, len(value))
+    buffer += value
+
+def read_bytes(data, offset):
+    length, offset = read_varint(data, offset)
+
+    return bytes(data[offset:offset + length]), offset + length
+
+def write_value(buffer, value):
+    """
+    Append a JSON-compatible value (None, bool, int, float, str, list, tuple or
+    dict) with a one byte type tag.
+    - Integers are zigzag encoded varints, so small negative numbers stay
+    small too.
+    - Lowercase hex strings, like hashes and ids, are stored as raw bytes at
+    half their length.
+    - Tuples are stored as lists, the same way json.dumps treats them.
+    """
+    if value is None:
+        buffer.append(NONE_TAG)
+    elif value is False:
+        buffer.append(FALSE_TAG)
+    elif value is True:
+        buffer.append(TRUE_TAG)
+    elif isinstance(value, int):
+        buffer.append(INT_TAG)
+        write_varint(buffer, value << 1 if value >= 0 else (-value << 1) - 1)
+    elif isinstance(value, float):
+        buffer.append(FLOAT_TAG)
+        buffer += FLOAT.pack(value)
+    elif isinstance(value, str):
+        if HEX_STRING_PATTERN.fullmatch(value):
+            buffer.append(HEX_STRING_TAG)
+            write_bytes(buffer, bytes.fromhex(value))
+        else:
+            buffer.append(STRING_TAG)
+            write_bytes(buffer, value.encode('utf-8'))
+    elif isinstance(value, (list, tuple)):
+        buffer.append(LIST_TAG)
+        write_varint(buffer, len(value))
+        for item in value:
+            write_value(buffer, item)
+    elif isinstance(value, dict):
+        buffer.append(DICT_TAG)
+        write_varint(buffer, len(value))
+        for key, item in value.items():
+            write_value(buffer, key)
+            write_value(buffer, item)
+    else:
+        raise Exception(f'Cannot encode value of type {type(value).__name__}')
+
+def read_value(data, offset):
+    """
+    Read a value written by write_value and return it with the offset after it.
+    """
+    tag = data[offset]
+    offset += 1
+
+    if tag == NONE_TAG:
+        return None, offset
+    if tag == FALSE_TAG:
+        return False, offset
+    if tag == TRUE_TAG:
+        return True, offset
+    if tag == INT_TAG:
+        number, offset = read_varint(data, offset)
+        return (number >> 1 if not number & 1 else -((number + 1) >> 1)), offset
+    if tag == FLOAT_TAG:
+        return FLOAT.unpack_from(data, offset)[0], offset + FLOAT.size
+    if tag == STRING_TAG:
+        value, offset = read_bytes(data, offset)
+        return value.decode('utf-8'), offset
+    if tag == HEX_STRING_TAG:
+        value, offset = read_bytes(data, offset)
+        return value.hex(), offset
+    if tag == LIST_TAG:
+        length, offset = read_varint(data, offset)
+        items = []
+        for _ in range(length):
+            item, offset = read_value(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == DICT_TAG:
+        length, offset = read_varint(data, offset)
+        items = {}
+        for _ in range(length):
+            key, offset = read_value(data, offset)
+            if type(key) is str:
+                # Keys such as addresses repeat from one value to the next,
+                # interned they are stored once.
+                key = sys.intern(key)
+            items[key], offset = read_value(data, offset)
+        return items, offset
+
+    raise Exception(f'Unknown value tag: {tag}')
@@ -10,8 +10,65 @@ def crypto_hash(*args):
 
     return hashlib.sha256(joined_data.encode('utf-8')).hexdigest()
 
+class CryptoHashTemplate:
+    """
+    This class produces the same hashes as crypto_hash for a set of fixed
+    arguments combined with a few changing numeric arguments (for example the
+    timestamp, difficulty and nonce of a block that is being mined).
+    - The fixed arguments are serialized only once.
+    - crypto_hash sorts the serialized arguments, and a serialized string
+    always sorts before a serialized number, so the fixed strings are fed into
+    a sha-256 state up front. Every hash starts from a copy of that state.
+    - The remaining fixed arguments keep their encoded bytes and are only
+    merged with the changing arguments in sorted order.
+    """
+    def __init__(self, *fixed_args):
+        super(CryptoHashTemplate, self).__init__()
+        self.fixed_args = fixed_args
+        stringified_args = sorted(map(lambda data: json.dumps(data), fixed_args))
+
+        self.prefix = [data for data in stringified_args if data < '-']
+        self.suffix = [data for data in stringified_args if data >= '-']
+        self.encoded_suffix = {data: data.encode('utf-8') for data in self.suffix}
+
+        self.prefix_hash = hashlib.sha256(''.join(self.prefix).encode('utf-8'))
+
+    def digest(self, *args):
+        """
+        Return the raw sha-256 digest of the fixed arguments combined with the
+        given arguments.
+        """
+        stringified_args = list(map(lambda data: json.dumps(data), args))
+
+        if (
+            self.prefix and stringified_args
+            and min(stringified_args) < self.prefix[-1]
+        ):
+            # A changing argument would sort into the pre-hashed prefix.
+            return bytes.fromhex(crypto_hash(*self.fixed_args, *args))
+
+        data_hash = self.prefix_hash.copy()
+
+        for data in sorted(self.suffix + stringified_args):
+            encoded_data = self.encoded_suffix.get(data)
+            data_hash.update(
+                encoded_data if encoded_data is not None else data.encode('utf-8')
+            )
+
+        return data_hash.digest()
+
+    def hash(self, *args):
+        """
+        Return the hex sha-256 hash of the fixed arguments combined with the
+        given arguments, identical to crypto_hash(*fixed_args, *args).
+        """
+        return self.digest(*args).hex()
+
 def main():
     print(f"crypto_hash('one', 2, [3]): {crypto_hash('one', 2, [3])}")
     print(f"crypto_hash(2, 'one', [3]): {crypto_hash(2, 'one', [3])}")
+
+    template = CryptoHashTemplate('one', [3])
+    print(f"CryptoHashTemplate('one', [3]).hash(2): {template.hash(2)}")
 if __name__ == '__main__':
     main()
@@ -0,0 +1,82 @@
+import hashlib
+import json
+
+# Leaves and inner nodes are hashed with different prefixes, so an inner node
+# can never be passed off as a leaf.
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+EMPTY_ROOT = hashlib.sha256(b'').hexdigest()
+
+def leaf_hash(item):
+    """
+    Return the hash of a json-compatible item (such as a transaction json) as a
+    leaf of the Merkle tree. The json is canonical: sorted keys, no spaces.
+    """
+    encoded_item = json.dumps(item, sort_keys=True, separators=(',', ':'))
+
+    return hashlib.sha256(LEAF_PREFIX + encoded_item.encode('utf-8')).digest()
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def merkle_levels(items):
+    """
+    Return every level of the Merkle tree over the items, from the leaves up
+    to the root. A node without a sibling is promoted to the next level
+    unchanged.
+    """
+    level = [leaf_hash(item) for item in items]
+    levels = [level]
+
+    while len(level) > 1:
+        level = [
+            node_hash(level[index], level[index + 1])
+            if index + 1 < len(level) else level[index]
+            for index in range(0, len(level), 2)
+        ]
+        levels.append(level)
+
+    return levels
+
+def merkle_root(items):
+    """
+    Return the hex Merkle root of the items.
+    """
+    if not items:
+        return EMPTY_ROOT
+
+    return merkle_levels(items)[-1][0].hex()
+
+def merkle_proof(items, index):
+    """
+    Return the inclusion proof of the item at the given index: the sibling
+    hashes on the way up to the root, each as [side, hex hash], where side
+    tells whether the sibling is on the 'left' or the 'right'.
+    """
+    proof = []
+
+    for level in merkle_levels(items)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(['left' if sibling < index else 'right', level[sibling].hex()])
+        index //= 2
+
+    return proof
+
+def verify_merkle_proof(item, proof, root):
+    """
+    Check that the item is part of the tree with the given hex root.
+    """
+    hash = leaf_hash(item)
+
+    for side, sibling in proof:
+        sibling = bytes.fromhex(sibling)
+        if side == 'left':
+            hash = node_hash(sibling, hash)
+        elif side == 'right':
+            hash = node_hash(hash, sibling)
+        else:
+            return False
+
+    return hash.hex() == root
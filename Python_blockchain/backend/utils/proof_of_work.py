@@ -0,0 +1,110 @@
+import functools
+import math
+
+HASH_BITS = 256
+HASH_HEX_LENGTH = HASH_BITS // 4
+
+# Difficulties can be fractional, so the levels seen over time are unbounded.
+TARGET_CACHE_SIZE = 256
+
+@functools.lru_cache(maxsize=TARGET_CACHE_SIZE)
+def difficulty_to_target(difficulty):
+    """
+    Return the 256-bit integer target for the given difficulty. A hash meets
+    the proof of work requirement when its value is below the target.
+    - An integer difficulty of n means n leading zero bits, so the target is
+    2 ** (256 - n).
+    - A fractional difficulty lies between the targets of its neighbours, for
+    example a difficulty of 3.5 is sqrt(2) times harder than 3.
+    - Targets are cached for the TARGET_CACHE_SIZE most recent difficulty
+    levels, since the miners and validators look the same few levels up over
+    and over again.
+    """
+    if difficulty <= 0:
+        return 1 << HASH_BITS
+
+    whole_bits = math.floor(difficulty)
+    target = 1 << (HASH_BITS - whole_bits)
+
+    if difficulty != whole_bits:
+        target = int(target * 2 ** (whole_bits - difficulty))
+
+    return target
+
+def target_to_difficulty(target):
+    """
+    Return the (possibly fractional) difficulty that corresponds to the given
+    target.
+    """
+    return HASH_BITS - math.log2(target)
+
+def target_to_bits(target):
+    """
+    Encode the target in the compact 32-bit form used by block headers: the
+    high byte is the length of the target in bytes, the low three bytes are
+    its most significant bytes.
+    """
+    size = (target.bit_length() + 7) // 8
+
+    if size <= 3:
+        compact = target << (8 * (3 - size))
+    else:
+        compact = target >> (8 * (size - 3))
+
+    # The mantissa is treated as signed, so keep its top bit clear.
+    if compact & 0x00800000:
+        compact >>= 8
+        size += 1
+
+    return compact | (size << 24)
+
+def bits_to_target(bits):
+    """
+    Decode a compact 32-bit target back into its 256-bit integer form.
+    """
+    size = bits >> 24
+    mantissa = bits & 0x007fffff
+
+    if size <= 3:
+        return mantissa >> (8 * (3 - size))
+
+    return mantissa << (8 * (size - 3))
+
+def hash_to_int(hash):
+    """
+    Return the integer value of a hex hash, aligned to 256 bits so that a
+    shorter hex string is read as the leading digits of a full hash.
+    """
+    return int(hash, 16) << (4 * (HASH_HEX_LENGTH - len(hash)))
+
+def leading_zero_bits(hash):
+    """
+    Return the number of leading zero bits of a hex hash.
+    """
+    return HASH_BITS - hash_to_int(hash).bit_length()
+
+def digest_meets_target(digest, target):
+    """
+    Check a raw 32-byte sha-256 digest against the target.
+    """
+    return int.from_bytes(digest, 'big') < target
+
+def hash_meets_difficulty(hash, difficulty):
+    """
+    Check a hex hash against the target of the given difficulty. Hashes that
+    are not hex strings never meet the requirement.
+    """
+    try:
+        return hash_to_int(hash) < difficulty_to_target(difficulty)
+    except (TypeError, ValueError):
+        return False
+
+def main():
+    target = difficulty_to_target(3)
+    print(f'difficulty_to_target(3): {target:064x}')
+    print(f'target_to_bits(target): {target_to_bits(target):08x}')
+    print(f'difficulty_to_target(3.5): {difficulty_to_target(3.5):064x}')
+    print(f"leading_zero_bits('0fff'): {leading_zero_bits('0fff')}")
+
+if __name__ == '__main__':
+    main()
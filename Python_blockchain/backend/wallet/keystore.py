@@ -0,0 +1,154 @@
+import collections
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from backend.config import KEY_POOL_SIZE, KEY_POOL_WORKERS
+
+def generate_private_key():
+    return ec.generate_private_key(ec.SECP256K1(), default_backend())
+
+def generate_private_key_bytes():
+    """
+    Generate a private key and return it DER encoded, so it can be sent back
+    from a worker process.
+    """
+    return generate_private_key().private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+def load_private_key_bytes(private_key_bytes):
+    return serialization.load_der_private_key(
+        private_key_bytes,
+        password=None,
+        backend=default_backend()
+    )
+
+def save_keys(path, address, private_key, password=None):
+    """
+    Write a wallet's address and private key to a keystore file, readable by
+    its owner only. The key is PEM encoded, and encrypted with the password
+    when one is given. The file is replaced atomically.
+    """
+    if password is None:
+        encryption_algorithm = serialization.NoEncryption()
+    else:
+        encryption_algorithm = serialization.BestAvailableEncryption(
+            password.encode('utf-8')
+        )
+
+    keystore = {
+        'address': address,
+        'private_key': private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=encryption_algorithm
+        ).decode('utf-8')
+    }
+
+    temporary_path = f'{path}.tmp'
+    file_descriptor = os.open(
+        temporary_path,
+        os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+        0o600
+    )
+    with os.fdopen(file_descriptor, 'w') as keystore_file:
+        json.dump(keystore, keystore_file)
+    os.replace(temporary_path, path)
+
+def load_keys(path, password=None):
+    """
+    Read the address and private key of a keystore file written by save_keys.
+    """
+    with open(path) as keystore_file:
+        keystore = json.load(keystore_file)
+
+    private_key = serialization.load_pem_private_key(
+        keystore['private_key'].encode('utf-8'),
+        password=None if password is None else password.encode('utf-8'),
+        backend=default_backend()
+    )
+
+    return keystore['address'], private_key
+
+class KeyPool:
+    """
+    This class keeps up to size private keys generated ahead of time by worker
+    processes, so a new wallet takes a ready key instead of generating one.
+    - Every key taken is replaced in the background.
+    - When the pool runs dry, the key is generated in the calling thread.
+    """
+    def __init__(
+        self,
+        size=KEY_POOL_SIZE,
+        workers=KEY_POOL_WORKERS,
+        generate=generate_private_key_bytes,
+        load=load_private_key_bytes
+    ):
+        super(KeyPool, self).__init__()
+        self.size = size
+        self.generate = generate
+        self.load = load
+        self.keys = collections.deque()
+        self.pending = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.refill()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def refill(self):
+        """
+        Start generating keys until the ready and pending keys fill the pool.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            missing = max(self.size - len(self.keys) - self.pending, 0)
+            self.pending += missing
+
+        for _ in range(missing):
+            try:
+                future = self.executor.submit(self.generate)
+            except RuntimeError:
+                return
+            future.add_done_callback(self.key_generated)
+
+    def key_generated(self, future):
+        with self.lock:
+            self.pending -= 1
+
+        if future.cancelled():
+            return
+
+        try:
+            self.keys.append(self.load(future.result()))
+        except Exception as e:
+            print(f'\n -- Could not generate a pooled key: {e}')
+
+    def take(self):
+        """
+        Return a ready key, or a freshly generated one when there is none.
+        """
+        try:
+            key = self.keys.popleft()
+        except IndexError:
+            key = self.load(self.generate())
+
+        self.refill()
+
+        return key
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,103 @@
+from backend.config import STARTING_BALANCE
+
+class BalanceLedger:
+    """
+    This class keeps an index of wallet address -> balance for a chain of
+    blocks, so balances can be looked up without scanning the chain.
+    - It follows the same rules as scanning the chain from the genesis block:
+    every address starts with the STARTING_BALANCE, a transaction resets the
+    balance of its sender to the change output, and any other output is added
+    to the balance of its recipient.
+    - It remembers how many blocks of the chain it has applied (its height),
+    so it can be brought up to date by applying only the newer blocks.
+    - It also keeps the ids of the applied transactions with the height of
+    the block that holds them, and a journal of what every block changed, so
+    the ledger can be rolled back to the common ancestor of a fork without
+    replaying the chain.
+    """
+    def __init__(self):
+        super(BalanceLedger, self).__init__()
+        self.balances = {}
+        self.transaction_heights = {}
+        self.journal = []
+        self.height = 0
+
+    @property
+    def transaction_ids(self):
+        return self.transaction_heights.keys()
+
+    def get_balance(self, address):
+        return self.balances.get(address, STARTING_BALANCE)
+
+    def apply_transaction(self, transaction_json):
+        """
+        This BalanceLedger class method updates the balances touched by the
+        given serialized transaction.
+        """
+        sender = transaction_json['input']['address']
+
+        for address, amount in transaction_json['output'].items():
+            if address == sender:
+                self.balances[address] = amount
+            else:
+                self.balances[address] = self.get_balance(address) + amount
+
+    def apply_block(self, block):
+        """
+        This BalanceLedger class method applies every transaction of the given
+        block. Blocks whose data is not a list of transactions (such as blocks
+        mined with plain test data) carry no balances.
+        """
+        previous_balances = {}
+        transaction_ids = []
+
+        if isinstance(block.data, list):
+            for transaction_json in block.data:
+                if isinstance(transaction_json, dict):
+                    for address in transaction_json['output']:
+                        previous_balances.setdefault(
+                            address,
+                            self.balances.get(address)
+                        )
+                    self.apply_transaction(transaction_json)
+
+                    transaction_id = transaction_json.get('id')
+                    if transaction_id not in self.transaction_heights:
+                        self.transaction_heights[transaction_id] = self.height
+                        transaction_ids.append(transaction_id)
+
+        self.journal.append((previous_balances, transaction_ids))
+        self.height += 1
+
+    def revert_to(self, height):
+        """
+        This BalanceLedger class method rolls the ledger back to the given
+        height, undoing the most recently applied blocks one by one.
+        """
+        while self.height > height:
+            previous_balances, transaction_ids = self.journal.pop()
+
+            for address, balance in previous_balances.items():
+                if balance is None:
+                    self.balances.pop(address, None)
+                else:
+                    self.balances[address] = balance
+
+            for transaction_id in transaction_ids:
+                del self.transaction_heights[transaction_id]
+            self.height -= 1
+
+    def sync(self, chain):
+        """
+        This BalanceLedger class method brings the ledger up to date with the
+        given chain by applying the blocks after its height. A chain shorter
+        than the ledger's height is rebuilt from scratch.
+        """
+        if self.height > len(chain):
+            self.balances = {}
+            self.transaction_heights = {}
+            self.journal = []
+            self.height = 0
+
+        for height in range(self.height, len(chain)):
+            self.apply_block(chain[height])
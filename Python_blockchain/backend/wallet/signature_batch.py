@@ -0,0 +1,58 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from backend.wallet.wallet import Wallet
+from backend.config import SIGNATURE_VERIFY_WORKERS, SIGNATURE_BATCH_SIZE
+
+def first_invalid_signature(signatures):
+    """
+    Verify a batch of (transaction_id, public_key, data, signature) entries in
+    order and return the id of the first transaction whose signature is
+    invalid, or None when they are all valid.
+    """
+    for transaction_id, public_key, data, signature in signatures:
+        if not Wallet.verify(public_key, data, signature):
+            return transaction_id
+
+    return None
+
+def verify_signatures(
+    signatures,
+    workers=SIGNATURE_VERIFY_WORKERS,
+    batch_size=SIGNATURE_BATCH_SIZE
+):
+    """
+    Verify all of the given (transaction_id, public_key, data, signature)
+    entries and raise an exception naming the transaction of an invalid one.
+    - The entries are split into batches of batch_size, which are verified
+    across a pool of worker processes.
+    - As soon as a batch reports an invalid signature, the batches that have
+    not started yet are cancelled.
+    - With a single worker, or when everything fits in one batch, the entries
+    are verified in this process.
+    """
+    if workers <= 1 or len(signatures) <= batch_size:
+        invalid_transaction_id = first_invalid_signature(signatures)
+    else:
+        invalid_transaction_id = None
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    first_invalid_signature,
+                    signatures[start:start + batch_size]
+                )
+                for start in range(0, len(signatures), batch_size)
+            ]
+
+            for future in as_completed(futures):
+                invalid_transaction_id = future.result()
+
+                if invalid_transaction_id is not None:
+                    for pending_future in futures:
+                        pending_future.cancel()
+                    break
+
+    if invalid_transaction_id is not None:
+        raise Exception(
+            f'Transaction {invalid_transaction_id} has an invalid signature'
+        )
@@ -0,0 +1,71 @@
+import collections
+import hashlib
+import json
+import threading
+
+class SignatureCache:
+    """
+    This class is a bounded LRU cache of signature verification results.
+    - Entries are keyed by a sha-256 digest of the public key, the signed data
+    and the signature, so a repeated verification costs a hash and a lookup.
+    - Once maxsize entries are stored, the least recently used one is dropped.
+    - It counts its hits and misses, and it is safe to share between threads.
+    """
+    def __init__(self, maxsize):
+        super(SignatureCache, self).__init__()
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(public_key, data_bytes, signature):
+        """
+        Return the cache key of a verification of the serialized data.
+        """
+        key_hash = hashlib.sha256(public_key.encode('utf-8'))
+        key_hash.update(b'\0')
+        key_hash.update(data_bytes)
+        key_hash.update(b'\0')
+        key_hash.update(json.dumps(list(signature)).encode('utf-8'))
+
+        return key_hash.digest()
+
+    def get(self, key):
+        """
+        Return the cached result for the key, or None on a miss.
+        """
+        with self.lock:
+            result = self.entries.get(key)
+
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+
+            return result
+
+    def set(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.entries),
+                'maxsize': self.maxsize
+            }
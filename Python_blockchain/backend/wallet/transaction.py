@@ -1,9 +1,28 @@
+import sys
 import time
 import uuid
 
-from backend.wallet.wallet import Wallet
+from backend.wallet.wallet import (
+    Wallet,
+    compress_public_key,
+    decompress_public_key
+)
+from backend.utils.binary_codec import (
+    write_value,
+    read_value,
+    write_bytes,
+    read_bytes
+)
 from backend.config import MINING_REWARD, MINING_REWARD_INPUT
 
+TRANSACTION_FORMAT_VERSION = 1
+
+REWARD_INPUT = 0
+SIGNED_INPUT = 1
+VALUE_INPUT = 2
+
+SIGNED_INPUT_KEYS = ['timestamp', 'amount', 'address', 'public_key', 'signature']
+
 class Transaction:
     """
     This class will serve to document an exchange in currency from a sender to
@@ -11,7 +30,10 @@ class Transaction:
     - It is comprised of an initialization function, an output creation method,
     an input creation method and an update method for wallet owners who perform
     multiple transactions in rapid succession.
+    - The fields are slots, so a transaction carries no per-instance __dict__.
     """
+    __slots__ = ('id', 'output', 'input')
+
     def __init__(
         self,
         sender_wallet=None,
@@ -102,8 +124,10 @@ class Transaction:
         This Transaction class method will serialize the transaction so that web
         APIs can more eaily parse the transaction data. It simply takes the
         Transaction object and returns it as a dictionary.
+        - The dictionary is new on every call, its values are the transaction's
+        own.
         """
-        return self.__dict__
+        return {'id': self.id, 'output': self.output, 'input': self.input}
 
     @staticmethod
     def from_json(transaction_json):
@@ -113,9 +137,111 @@ class Transaction:
         """
         return Transaction(**transaction_json)
 
+    def to_bytes(self):
+        """
+        This Transaction class method serializes the transaction into a compact,
+        versioned binary form.
+        - A regular signed input stores the sender's public key as a 33 byte
+        compressed point and the signature as two 32 byte integers, instead of
+        the PEM text and decimal numbers of the JSON form.
+        - The mining reward input is a single marker byte.
+        - Any other input is stored as a generic value.
+        """
+        buffer = bytearray([TRANSACTION_FORMAT_VERSION])
+        write_value(buffer, self.id)
+        write_value(buffer, self.output)
+
+        if self.input == MINING_REWARD_INPUT:
+            buffer.append(REWARD_INPUT)
+        elif Transaction.is_compact_input(self.input):
+            buffer.append(SIGNED_INPUT)
+            write_value(buffer, self.input['timestamp'])
+            write_value(buffer, self.input['amount'])
+            write_value(buffer, self.input['address'])
+            write_bytes(buffer, compress_public_key(self.input['public_key']))
+            for number in self.input['signature']:
+                buffer += number.to_bytes(32, 'big')
+        else:
+            buffer.append(VALUE_INPUT)
+            write_value(buffer, self.input)
+
+        return bytes(buffer)
+
+    @staticmethod
+    def is_compact_input(input):
+        """
+        Check whether the input has the shape created by create_input, with a
+        public key and signature that survive the compact encoding unchanged.
+        """
+        if list(input) != SIGNED_INPUT_KEYS:
+            return False
+
+        try:
+            (r, s) = input['signature']
+            return (
+                all(
+                    type(number) is int and 0 <= number < 2 ** 256
+                    for number in (r, s)
+                )
+                and decompress_public_key(
+                    compress_public_key(input['public_key'])
+                ) == input['public_key']
+            )
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def from_bytes(transaction_bytes, offset=0):
+        """
+        This Transaction class method deserializes the binary form created by
+        to_bytes back into a Transaction instance.
+        """
+        transaction, _ = Transaction.read_bytes(transaction_bytes, offset)
+
+        return transaction
+
+    @staticmethod
+    def read_bytes(transaction_bytes, offset):
+        """
+        Read a transaction at the offset and return it with the offset after it.
+        """
+        version = transaction_bytes[offset]
+        if version != TRANSACTION_FORMAT_VERSION:
+            raise Exception(f'Unsupported transaction format version: {version}')
+
+        id, offset = read_value(transaction_bytes, offset + 1)
+        output, offset = read_value(transaction_bytes, offset)
+        input_type = transaction_bytes[offset]
+        offset += 1
+
+        if input_type == REWARD_INPUT:
+            input = dict(MINING_REWARD_INPUT)
+        elif input_type == SIGNED_INPUT:
+            timestamp, offset = read_value(transaction_bytes, offset)
+            amount, offset = read_value(transaction_bytes, offset)
+            address, offset = read_value(transaction_bytes, offset)
+            point, offset = read_bytes(transaction_bytes, offset)
+            input = {
+                'timestamp': timestamp,
+                'amount': amount,
+                'address': sys.intern(address),
+                'public_key': decompress_public_key(point),
+                'signature': [
+                    int.from_bytes(transaction_bytes[offset:offset + 32], 'big'),
+                    int.from_bytes(transaction_bytes[offset + 32:offset + 64], 'big')
+                ]
+            }
+            offset += 64
+        elif input_type == VALUE_INPUT:
+            input, offset = read_value(transaction_bytes, offset)
+        else:
+            raise Exception(f'Unknown transaction input type: {input_type}')
+
+        return Transaction(id=id, output=output, input=input), offset
+
 
     @staticmethod
-    def is_valid_transaction(transaction):
+    def is_valid_transaction(transaction, verify_signature=True):
         """
         This Transaction class method validates transactions.
         - It will raise an exception for invalid transactions.
@@ -125,7 +251,9 @@ class Transaction:
         at the time of the transaction is equal to the output total.
         - Lastly, it performs a check to make sure that the Wallet.verify()
         function for the given data returns True, otherwise it raises an
-        exception.
+        exception. Callers that verify signatures in bulk (see
+        backend.wallet.signature_batch) skip this step with
+        verify_signature=False.
         """
         if transaction.input == MINING_REWARD_INPUT:
             if list(transaction.output.values()) != [MINING_REWARD]:
@@ -137,7 +265,7 @@ class Transaction:
         if transaction.input['amount'] != output_total:
             raise Exception('Invalid transaction output values')
 
-        if not Wallet.verify(
+        if verify_signature and not Wallet.verify(
             transaction.input['public_key'],
             transaction.output,
             transaction.input['signature']
@@ -157,10 +285,10 @@ class Transaction:
 
 def main():
     transaction = Transaction(Wallet(), 'recipient', 15)
-    print(f'transaction.__dict__: {transaction.__dict__}')
+    print(f'transaction.to_json(): {transaction.to_json()}')
 
     transaction_json = transaction.to_json()
     restored_transaction = Transaction.from_json(transaction_json)
-    print(f'restored_transaction.__dict__: {restored_transaction.__dict__}')
+    print(f'restored_transaction.to_json(): {restored_transaction.to_json()}')
 if __name__ == '__main__':
     main()
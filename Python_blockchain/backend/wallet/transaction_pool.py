@@ -0,0 +1,270 @@
+import bisect
+import heapq
+import itertools
+
+from backend.config import (
+    TRANSACTION_POOL_MAX_COUNT,
+    TRANSACTION_POOL_MAX_BYTES,
+    TRANSACTION_POOL_PRIORITY
+)
+
+def oldest_priority(transaction, sequence):
+    """
+    Transactions that entered the pool earlier have a lower priority.
+    """
+    return sequence
+
+def amount_priority(transaction, sequence):
+    """
+    Transactions that move a larger amount away from their sender have a
+    higher priority.
+    """
+    sender = transaction.input['address']
+
+    return transaction.input.get('amount', 0) - transaction.output.get(sender, 0)
+
+def fee_priority(transaction, sequence):
+    """
+    Transactions that pay a higher fee have a higher priority. Transactions
+    without a fee attribute pay none.
+    """
+    return getattr(transaction, 'fee', 0)
+
+PRIORITIES = {
+    'oldest': oldest_priority,
+    'amount': amount_priority,
+    'fee': fee_priority
+}
+
+class TransactionPool:
+    """
+    The transaction pool holds the transactions that have been broadcast to the
+    network but have not been mined into a block yet.
+    - Transactions are indexed by their id, and by the address of their sender
+    so a wallet's pending transaction can be found directly.
+    - It keeps count of its transactions and of their size in bytes (in their
+    binary form).
+    - It remembers how far into the blockchain it has already cleared, so
+    clearing after a new block only looks at the new blocks, and after a fork
+    only at the blocks above the common ancestor.
+    - It is bounded by max_count transactions and max_bytes bytes. When either
+    limit is exceeded, the transactions with the lowest priority are evicted.
+    The priority is 'oldest' (evict the oldest first), 'amount' (evict the
+    smallest transfer first), 'fee' (evict the lowest fee first) or a function
+    of (transaction, sequence). Ties evict the oldest transaction first.
+    """
+    def __init__(
+        self,
+        max_count=TRANSACTION_POOL_MAX_COUNT,
+        max_bytes=TRANSACTION_POOL_MAX_BYTES,
+        priority=TRANSACTION_POOL_PRIORITY
+    ):
+        super(TransactionPool, self).__init__()
+        self.transaction_map = {}
+        self.address_map = {}
+        self.transaction_sizes = {}
+        self.transaction_bytes = 0
+        self.cleared_chain = []
+        self.cleared_height = 0
+        self.cleared_sequence = -1
+
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.priority = PRIORITIES.get(priority, priority)
+        self.sequence = itertools.count()
+        self.sequences = {}
+        # Heaps of (priority, sequence, id) for eviction and of
+        # (-priority, sequence, id) for picking the best transactions. Entries of
+        # removed or replaced transactions are skipped when they come up.
+        self.eviction_heap = []
+        self.best_heap = []
+        # (sequence, id) of every set transaction, in the order they were set,
+        # so readers can pick up only the transactions set after a sequence.
+        self.arrivals = []
+        self.evicted_count = 0
+        self.evicted_bytes = 0
+
+    @property
+    def transaction_count(self):
+        return len(self.transaction_map)
+
+    def set_transaction(self, transaction):
+        """
+        Set a transaction in the transaction pool, replacing an earlier version
+        of it (a transaction that was updated by its sender keeps its id).
+        Afterwards, the lowest priority transactions are evicted until the pool
+        is within its limits again, which may evict the new transaction itself.
+        """
+        if transaction.id in self.transaction_map:
+            self.transaction_bytes -= self.transaction_sizes[transaction.id]
+
+        size = len(transaction.to_bytes())
+        self.transaction_map[transaction.id] = transaction
+        self.transaction_sizes[transaction.id] = size
+        self.transaction_bytes += size
+        self.address_map[transaction.input['address']] = transaction.id
+
+        sequence = next(self.sequence)
+        priority = self.priority(transaction, sequence)
+        self.sequences[transaction.id] = sequence
+        heapq.heappush(self.eviction_heap, (priority, sequence, transaction.id))
+        heapq.heappush(self.best_heap, (-priority, sequence, transaction.id))
+        self.arrivals.append((sequence, transaction.id))
+
+        self.evict()
+        self.compact()
+
+    def is_current_entry(self, entry):
+        return self.sequences.get(entry[2]) == entry[1]
+
+    def evict(self):
+        """
+        Evict the lowest priority transactions while the pool is over its
+        count or byte limit.
+        """
+        while self.eviction_heap and (
+            self.transaction_count > self.max_count
+            or self.transaction_bytes > self.max_bytes
+        ):
+            entry = heapq.heappop(self.eviction_heap)
+
+            if self.is_current_entry(entry):
+                self.evicted_count += 1
+                self.evicted_bytes += self.transaction_sizes[entry[2]]
+                self.remove_transaction(entry[2])
+
+    def compact(self):
+        """
+        Rebuild the heaps once most of their entries are stale, so they stay
+        proportional to the size of the pool.
+        """
+        if len(self.eviction_heap) > 2 * self.transaction_count + 64:
+            self.eviction_heap = list(filter(self.is_current_entry, self.eviction_heap))
+            heapq.heapify(self.eviction_heap)
+
+        if len(self.best_heap) > 2 * self.transaction_count + 64:
+            self.best_heap = list(filter(self.is_current_entry, self.best_heap))
+            heapq.heapify(self.best_heap)
+
+        if len(self.arrivals) > 2 * self.transaction_count + 64:
+            self.arrivals = list(filter(
+                lambda arrival: self.sequences.get(arrival[1]) == arrival[0],
+                self.arrivals
+            ))
+
+    def transactions_since(self, sequence):
+        """
+        Return the (sequence, transaction) pairs of the transactions in the pool
+        that were set after the given sequence number, oldest first.
+        """
+        start = bisect.bisect_left(self.arrivals, (sequence + 1,))
+
+        return [
+            (arrival_sequence, self.transaction_map[transaction_id])
+            for arrival_sequence, transaction_id in self.arrivals[start:]
+            if self.sequences.get(transaction_id) == arrival_sequence
+        ]
+
+    def best_transactions(self, count):
+        """
+        Return up to count transactions of the pool, highest priority first.
+        """
+        entries = []
+
+        while self.best_heap and len(entries) < count:
+            entry = heapq.heappop(self.best_heap)
+            if self.is_current_entry(entry):
+                entries.append(entry)
+
+        for entry in entries:
+            heapq.heappush(self.best_heap, entry)
+
+        return [self.transaction_map[entry[2]] for entry in entries]
+
+    def existing_transaction(self, address):
+        """
+        Find the transaction in the pool that was sent by the given address.
+        """
+        return self.transaction_map.get(self.address_map.get(address))
+
+    def remove_transaction(self, transaction_id):
+        """
+        Remove the transaction with the given id from the pool, if it is there.
+        """
+        transaction = self.transaction_map.pop(transaction_id, None)
+
+        if transaction is None:
+            return
+
+        self.transaction_bytes -= self.transaction_sizes.pop(transaction_id)
+        del self.sequences[transaction_id]
+
+        address = transaction.input['address']
+        if self.address_map.get(address) == transaction_id:
+            del self.address_map[address]
+
+    def transaction_data(self):
+        """
+        Return the transactions of the transaction pool in their json form.
+        """
+        return list(map(
+            lambda transaction: transaction.to_json(),
+            self.transaction_map.values()
+        ))
+
+    def metrics(self):
+        """
+        Return the size and eviction counters of the transaction pool.
+        """
+        return {
+            'transaction_count': self.transaction_count,
+            'transaction_bytes': self.transaction_bytes,
+            'evicted_count': self.evicted_count,
+            'evicted_bytes': self.evicted_bytes
+        }
+
+    def clear_block_transactions(self, blocks):
+        """
+        Delete the transactions recorded in the given blocks from the pool.
+        """
+        for block in blocks:
+            if not isinstance(block.data, list):
+                continue
+
+            for transaction in block.data:
+                if isinstance(transaction, dict):
+                    self.remove_transaction(transaction.get('id'))
+
+    def clear_blockchain_transactions(self, blockchain):
+        """
+        Delete blockchain recorded transactions from the transaction pool.
+        - Only the blocks added since the last clear are looked at.
+        - If the chain was replaced by a fork since the last clear, the blocks
+        above its common ancestor with the chain of the last clear are looked
+        at again.
+        - Transactions set since the last clear whose id the ledger already
+        holds (such as a mined transaction that was broadcast again) are
+        deleted too.
+        """
+        chain = blockchain.chain
+        start = self.cleared_height
+
+        if chain is not self.cleared_chain:
+            ancestor = blockchain.common_ancestor(self.cleared_chain)
+            start = 0 if ancestor is None else min(ancestor + 1, start)
+
+        self.clear_block_transactions(
+            chain[height] for height in range(start, len(chain))
+        )
+
+        blockchain.ledger.sync(chain)
+        for _, transaction in self.transactions_since(self.cleared_sequence):
+            if transaction.id in blockchain.ledger.transaction_ids:
+                self.remove_transaction(transaction.id)
+
+        # The chain is replaced, never shrunk in place, so holding on to it
+        # keeps the blocks of the last clear around for the next one.
+        self.cleared_chain = chain
+        self.cleared_height = len(chain)
+        self.cleared_sequence = self.arrivals[-1][0] if self.arrivals else -1
+        self.compact()
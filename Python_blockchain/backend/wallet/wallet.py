@@ -1,11 +1,19 @@
+import functools
 import json
+import os
 import uuid
 import random
 # ec = elliptical cryptography
 # dss = digital signature standard
 # json = Java Script Object Notation
 # uuid = Universally Unique Identifier
-from backend.config import STARTING_BALANCE
+from backend.config import (
+    STARTING_BALANCE,
+    PUBLIC_KEY_CACHE_SIZE,
+    SIGNATURE_CACHE_SIZE
+)
+from backend.wallet.signature_cache import SignatureCache
+from backend.wallet.keystore import generate_private_key, save_keys, load_keys
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives.asymmetric.utils import (
@@ -15,23 +23,105 @@ from cryptography.hazmat.primitives.asymmetric.utils import (
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.exceptions import InvalidSignature
 
+verified_signatures = SignatureCache(SIGNATURE_CACHE_SIZE)
+
+@functools.lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def load_public_key(public_key):
+    """
+    Deserialize a PEM public key. The most recently used keys are cached, since
+    the same senders sign transaction after transaction.
+    """
+    return serialization.load_pem_public_key(
+        public_key.encode('utf-8'),
+        default_backend()
+    )
+
+@functools.lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def compress_public_key(public_key):
+    """
+    Return the 33 byte compressed point of a PEM public key.
+    """
+    return load_public_key(public_key).public_bytes(
+        encoding=serialization.Encoding.X962,
+        format=serialization.PublicFormat.CompressedPoint
+    )
+
+@functools.lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def decompress_public_key(point):
+    """
+    Return the PEM public key of a compressed point, serialized the same way as
+    Wallet.serialize_public_key.
+    """
+    return ec.EllipticCurvePublicKey.from_encoded_point(
+        ec.SECP256K1(),
+        point
+    ).public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode('utf-8')
+
 class Wallet:
     """
     This class represents the individual wallet for users on the blockchain.
     It keeps track of the miner's crptyo balance.
     It also allows a miner to authorize transactions.
+    - A new wallet takes its private key from Wallet.key_pool, when a key pool
+    is set, instead of generating one.
+    - A wallet saved to a keystore file is loaded back with the same address
+    and keys.
     """
-    def __init__(self, blockchain=None):
+    key_pool = None
+
+    def __init__(self, blockchain=None, private_key=None, address=None):
         super(Wallet, self).__init__()
         self.blockchain = blockchain
-        self.address = str(uuid.uuid4())[:30].replace("-", str(random.randint(0,9)))
-        self.private_key = ec.generate_private_key(
-            ec.SECP256K1(),
-            default_backend()
-        )
+        if address is None:
+            address = str(uuid.uuid4())[:30].replace("-", str(random.randint(0,9)))
+        self.address = address
+        if private_key is None:
+            private_key = Wallet.new_private_key()
+        self.private_key = private_key
         self.public_key = self.private_key.public_key()
         self.serialize_public_key()
 
+    @staticmethod
+    def new_private_key():
+        if Wallet.key_pool is not None:
+            return Wallet.key_pool.take()
+
+        return generate_private_key()
+
+    def save(self, path, password=None):
+        """
+        This Wallet class method writes the address and private key of the
+        wallet to a keystore file.
+        """
+        save_keys(path, self.address, self.private_key, password)
+
+    @staticmethod
+    def load(path, blockchain=None, password=None):
+        """
+        This static method loads a wallet from a keystore file.
+        """
+        address, private_key = load_keys(path, password)
+
+        return Wallet(blockchain, private_key, address)
+
+    @staticmethod
+    def load_or_create(path, blockchain=None, password=None):
+        """
+        This static method loads the wallet of a keystore file, or creates a
+        wallet and saves it there when the file does not exist yet, so a node
+        keeps its identity across restarts.
+        """
+        if os.path.exists(path):
+            return Wallet.load(path, blockchain, password)
+
+        wallet = Wallet(blockchain)
+        wallet.save(path, password)
+
+        return wallet
+
     @property
     def balance(self):
         return Wallet.calculate_balance(self.blockchain, self.address)
@@ -63,23 +153,53 @@ class Wallet:
         the original public key and the data. It processes the given signature,
         a utf-8 encoded json of the given data, and the public key, then returns
         a boolean that determines whether or not the signature is valid.
+        - Results are kept in a cache keyed by a digest of the public key, data
+        and signature, so a transaction that is verified again (when it enters
+        the pool and again when its block is validated) is a cache lookup.
+        - Deserialized public keys are cached as well.
         """
-        deserialized_public_key = serialization.load_pem_public_key(
-            public_key.encode('utf-8'),
-            default_backend()
-        )
+        data_bytes = json.dumps(data).encode('utf-8')
+        cache_key = SignatureCache.key(public_key, data_bytes, signature)
+        signature_valid = verified_signatures.get(cache_key)
+
+        if signature_valid is not None:
+            return signature_valid
+
+        deserialized_public_key = load_public_key(public_key)
 
         (r, s) = signature
 
         try:
             deserialized_public_key.verify(
                 encode_dss_signature(r, s),
-                json.dumps(data).encode('utf-8'),
+                data_bytes,
                 ec.ECDSA(hashes.SHA256())
             )
-            return True
+            signature_valid = True
         except InvalidSignature:
-            return False
+            signature_valid = False
+
+        verified_signatures.set(cache_key, signature_valid)
+
+        return signature_valid
+
+    @staticmethod
+    def verify_cache_info():
+        """
+        This static method reports the hit and miss counters of the
+        verification caches.
+        """
+        public_key_info = load_public_key.cache_info()
+
+        return {
+            'public_keys': {
+                'hits': public_key_info.hits,
+                'misses': public_key_info.misses,
+                'size': public_key_info.currsize,
+                'maxsize': public_key_info.maxsize
+            },
+            'signatures': verified_signatures.info()
+        }
 
     @staticmethod
     def calculate_balance(blockchain, address):
@@ -89,26 +209,16 @@ class Wallet:
         - The balance can be found by summing the ouptut values that belong to
         the given address since the most recent transaction by that specific
         address.
-        - Iterate through the blockchain.
-        - Check to see if the given address is the sender.
         - Any time the address conducts a new transaction it resets its balance.
         - Or else, if the given address is the recipient, then add the output
         amount to the balance of the address.
-        - Finally, return the calculated balance of the given wallet address.
+        - The blockchain keeps these balances in its ledger as blocks are added,
+        so the lookup does not scan the chain.
         """
-        balance = STARTING_BALANCE
-
         if not blockchain:
-            return balance
-
-        for block in blockchain.chain:
-            for transaction in block.data:
-                if transaction['input']['address'] == address:
-                    balance = transaction['output'][address]
-                elif address in transaction['output']:
-                    balance += transaction['output'][address]
+            return STARTING_BALANCE
 
-        return balance
+        return blockchain.get_balance(address)
 
 def main():
     wallet = Wallet()